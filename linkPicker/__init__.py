@@ -1,11 +1,17 @@
 import os
-import maya.cmds as cmds
 
-if int(cmds.about(version=True)) >= 2025:
-    from PySide6 import QtCore
-else:
-    from PySide2 import QtCore
+try:
+    import maya.cmds as cmds
+except ImportError:
+    cmds = None # outside of Maya only the Qt-free modules (e.g. pickerModel, path) are usable
     
 
 ICONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linkPickerIcons')
-QtCore.QDir.addSearchPath('linkPickerIcons', ICONS_PATH)
+
+if cmds is not None:
+    if int(cmds.about(version=True)) >= 2025:
+        from PySide6 import QtCore
+    else:
+        from PySide2 import QtCore
+        
+    QtCore.QDir.addSearchPath('linkPickerIcons', ICONS_PATH)
@@ -11,11 +11,18 @@ class ConfigManager(object):
                                   'toolBoxCheckBox'      : True,
 
                                   'viewModeComboBox'     : 2,
-                                  'ZoomSlider'           : 25},
+                                  'ZoomSlider'           : 25,
+                                  'selectionSyncLatency' : 0},
                                   
                      'settings': {'queue'     : 20, 
                                   'undo'      : True,    
-                                  'undoToFile': False}}
+                                  'undoToFile': False,
+                                  'undoMemory': 0, # MB, 0: no limit
+                                  'undoSpill' : False},
+                                  
+                     'mirror'  : {'markers': [['L', 'R'], ['l', 'r'], ['lt', 'rt'], 
+                                              ['left', 'right'], ['Left', 'Right'], ['LEFT', 'RIGHT']],
+                                  'regex'  : []}}
     
     CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
     
@@ -8,6 +8,8 @@ if int(cmds.about(version=True)) >= 2025:
     from PySide6 import QtWidgets
 else:
     from PySide2 import QtWidgets
+    
+from . import pickerJournal, pickerCache, saveWorker
 
 
 class FileManager(object):
@@ -29,41 +31,41 @@ class FileManager(object):
         pickerView = self.parent.tabWidget.currentWidget()
         if not hasattr(pickerView, 'getAllPickerButtons'):
             return None, None  
-        data = pickerView.get(undoToFile)
-        return pickerView, data
+        document = pickerView.getSnapshot(undoToFile)
+        return pickerView, document
         
         
-    def showFileWindow(self, pickerView, data, path=''):
+    def showFileWindow(self, pickerView, document, path=''):
         newFilePath, _ = QtWidgets.QFileDialog.getSaveFileName(self.parent, 'Save File', path, 'Link Picker Files (*.lpk)')
         if not newFilePath:
             return
         pickerView.cacheSavePath = newFilePath
-        data['cacheSavePath'] = newFilePath
-        self._saveToFile(data, newFilePath)
+        document.cacheSavePath   = newFilePath
+        self._saveToFile(pickerView, document, newFilePath)
         
         self.parent.updateTabToolTip(pickerView)
         
     def save(self, undoToFile):
-        pickerView, data = self.getDatas(undoToFile)
+        pickerView, document = self.getDatas(undoToFile)
         if pickerView is None:
             return
-        filePath = data['cacheSavePath']
+        filePath = document.cacheSavePath
         
         if self.checkPath(filePath):
-            self._saveToFile(data, filePath)
+            self._saveToFile(pickerView, document, filePath)
         else:
-            self.showFileWindow(pickerView, data, self._BASE_FILE_PATH)
+            self.showFileWindow(pickerView, document, self._BASE_FILE_PATH)
             
         #self.parent.updateTabToolTip(pickerView)
             
     
     def saveAs(self, undoToFile):
-        pickerView, data = self.getDatas(undoToFile)
+        pickerView, document = self.getDatas(undoToFile)
         if pickerView is None:
             return
-        filePath = data['cacheSavePath']
+        filePath = document.cacheSavePath
         basefilePath =  os.path.dirname(filePath) if self.checkPath(filePath) else self._BASE_FILE_PATH
-        self.showFileWindow(pickerView, data, basefilePath)
+        self.showFileWindow(pickerView, document, basefilePath)
         
         #self.parent.updateTabToolTip(pickerView)
         
@@ -74,25 +76,73 @@ class FileManager(object):
             return
         self.BASE_FILE_PATH = os.path.dirname(filePaths[0])
         
-        datas = []
+        datas   = []
+        replays = [] # journal events per picker, unsaved edits of a crashed session
         for pickerPath in filePaths:
-            with open(pickerPath, 'r') as f:
-                datas.append(json.load(f))
-        self.parent.set(datas)
+            journalPath = pickerJournal.pendingJournal(pickerPath)
+            if journalPath:
+                try:
+                    data, entries = pickerJournal.readJournal(journalPath)
+                    datas.append(data); replays.append(entries)
+                    om2.MGlobal.displayWarning(f'Unsaved edits of {pickerPath} were recovered from {journalPath}')
+                    continue
+                except (OSError, ValueError) as e:
+                    om2.MGlobal.displayWarning(f'Could not recover {journalPath}: {e}')
+            datas.append(pickerCache.load(pickerPath))
+            replays.append(None)
+        self._setRecovered(datas, replays)
+        
+        
+    def recoverAutosaves(self):
+        '''
+        Open the journals of pickers that had no file (unsaved or scene pickers) left by a crash
+        '''
+        openJournals = {picker.journal.path for picker in self.parent.tabWidget.getWidget()}
+        datas   = []
+        replays = []
+        for journalPath in pickerJournal.orphanJournals():
+            if journalPath in openJournals:
+                continue
+            try:
+                data, entries = pickerJournal.readJournal(journalPath)
+            except (OSError, ValueError) as e:
+                om2.MGlobal.displayWarning(f'Could not recover {journalPath}: {e}')
+                continue
+            data['pickerId'] = None # a new picker, it may still be open from the scene data
+            datas.append(data); replays.append(entries)
+            pickerJournal.removeJournal(journalPath)
+        if not datas:
+            om2.MGlobal.displayInfo('No autosaved pickers to recover')
+            return
+        self._setRecovered(datas, replays)
+        
+        
+    def _setRecovered(self, datas: list, replays: list):
+        for pickerView, entries in zip(self.parent.set(datas), replays):
+            if entries is None:
+                continue
+            pickerView.replayJournal(entries)
+            tabIndex = self.parent.tabWidget.indexOf(pickerView)
+            self.parent.tabWidget.setTabText(tabIndex, f'{self.parent.tabWidget.tabText(tabIndex)}*')
 
         
-    def _saveToFile(self, data, filePath):
-        try:
-            tabName = data['tabName']
-            if tabName[-1] == '*':
-                data['tabName'] = tabName[:-1]
-                
-            with open(filePath, 'w') as f:
-                json.dump(data, f, indent=4)
+    def _saveToFile(self, pickerView, document, filePath):
+        '''
+        The file is encoded and written by saveWorker, once it is on disk the tab is unflagged and the journal removed,
+        unless the picker was edited meanwhile (the file does not hold those edits) or its tab was closed
+        '''
+        journalVersion = pickerView.journal.version
+        
+        def saved(error):
+            if error is not None:
+                om2.MGlobal.displayError(f'Error occurred while saving the file: {filePath}. Error: {error}')
+                return
             om2.MGlobal.displayInfo(f'File saved successfully to: {filePath}')
-            self.parent.unflagUnsavedTab()
-        except IOError as e:
-            om2.MGlobal.displayError(f'Error occurred while saving the file: {filePath}. Error: {e}')
+            if pickerView.journal.version != journalVersion or pickerView not in self.parent.tabWidget.getWidget():
+                return
+            self.parent.unflagUnsavedTab(pickerView)
+            pickerView.journal.discard()
+            
+        saveWorker.saveFile(document, filePath, saved)
    
    
-   
\ No newline at end of file
@@ -0,0 +1,219 @@
+'''
+Validate .lpk files without Maya, many files in parallel
+
+    python -m linkPicker.lpkLint D:/assets/pickers --nodes sceneNodes.txt --output report.json
+
+Checks: unreadable files, duplicate buttonIds, invalid colors and sizes, buttons fully covered by another button,
+oversized undo histories, node ids missing from the node table and, with --nodes, nodes missing from the given list
+(a text file with one node per line, or a json list, e.g. an export of cmds.ls())
+The report is json: {'summary': {...}, 'files': [{'path': str, 'buttons': int, 'issues': [{'code', 'message', 'buttonId'}]}]}
+'''
+import os
+import sys
+import json
+import heapq
+import argparse
+import concurrent.futures
+
+from . import path
+
+
+BUTTON_SIZE_RANGE = (10, 400) # same clamp as the UI
+MAX_UNDO_COUNT    = 500
+MAX_UNDO_BYTES    = 5 * 1024 * 1024
+
+_workerArgs = () # set once per worker process, the node list is not pickled again for every file
+
+
+def _issue(code: str, message: str, buttonId: str = None) -> dict:
+    return {'code': code, 'message': message, 'buttonId': buttonId}
+
+
+def _isColor(value) -> bool:
+    return (isinstance(value, (list, tuple)) and len(value) in (3, 4)
+            and all(isinstance(c, int) and not isinstance(c, bool) and 0 <= c <= 255 for c in value))
+
+
+def _isSize(value) -> bool:
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and BUTTON_SIZE_RANGE[0] <= value <= BUTTON_SIZE_RANGE[1])
+
+
+def findCoveredButtons(rects: 'list[tuple[float, float, float, float, str]]') -> 'list[tuple[str, str]]':
+    '''
+    rects: [(x, y, width, height, buttonId), ...]
+    Sweep along x: rects sorted by left edge, then widest and tallest first, so a rect comes after every rect covering it
+    (of two identical rects the later one is covered)
+    Only the active rects, the ones not yet closed at the current left edge, are compared, the closed ones leave a heap
+    Returns [(coveredId, coveringId), ...]
+    '''
+    rects  = sorted(rects, key=lambda r: (r[0], -r[2], -r[3]))
+    active = {} # index -> rect still open at the current left edge
+    closes = [] # (right edge, index) heap of the active rects
+    pairs  = []
+    for index, (x, y, w, h, buttonId) in enumerate(rects):
+        while closes and closes[0][0] < x:
+            del active[heapq.heappop(closes)[1]]
+
+        right, bottom = x + w, y + h
+        for ax, ay, aw, ah, activeId in active.values():
+            if ax + aw >= right and ay <= y and ay + ah >= bottom:
+                pairs.append((buttonId, activeId))
+                break
+        active[index] = (x, y, w, h, buttonId)
+        heapq.heappush(closes, (right, index))
+    return pairs
+
+
+def lintData(data: dict, sceneNodes: 'set[str]' = None, maxUndoCount: int = MAX_UNDO_COUNT, maxUndoBytes: int = MAX_UNDO_BYTES) -> 'list[dict]':
+    issues      = []
+    buttonsData = data.get('buttons')
+    if not isinstance(buttonsData, list):
+        return [_issue('invalidFile', "no 'buttons' list")]
+
+    nodeTable = path.NodeTable(data.get('nodeTable', []))
+    namespace = data.get('namespace', ':')
+    namespace = ':' if namespace == '' else namespace
+
+    buttonIds = set()
+    rects     = []
+    for index, buttonData in enumerate(buttonsData):
+        buttonId = buttonData.get('buttonId')
+        if not buttonId:
+            issues.append(_issue('missingButtonId', f'button {index} has no buttonId'))
+            buttonId = f'#{index}'
+        elif buttonId in buttonIds:
+            issues.append(_issue('duplicateButtonId', f'buttonId {buttonId} is used more than once', buttonId))
+        buttonIds.add(buttonId)
+
+        for key in ('color', 'textColor'):
+            if not _isColor(buttonData.get(key)):
+                issues.append(_issue('invalidColor', f'{key} {buttonData.get(key)!r} is not an rgb color', buttonId))
+
+        scaleX, scaleY = buttonData.get('scaleX'), buttonData.get('scaleY')
+        for key, value in (('scaleX', scaleX), ('scaleY', scaleY)):
+            if not _isSize(value):
+                issues.append(_issue('invalidSize', f'{key} {value!r} is out of {BUTTON_SIZE_RANGE}', buttonId))
+
+        localPos = buttonData.get('localPos')
+        if _isSize(scaleX) and _isSize(scaleY) and isinstance(localPos, (list, tuple)) and len(localPos) == 2:
+            rects.append((localPos[0], localPos[1], scaleX, scaleY, buttonId))
+
+        nodeIds = buttonData.get('nodeIds')
+        if nodeIds is not None:
+            badIds = [nodeId for nodeId in nodeIds if not isinstance(nodeId, int) or not 0 <= nodeId < len(nodeTable)]
+            if badIds:
+                issues.append(_issue('invalidNodeId', f'node ids {badIds} are not in the node table', buttonId))
+                continue
+            nodes = nodeTable.names(nodeIds, namespace)
+        else:
+            nodes = path.updateNamespaceWithOptional(buttonData.get('oldNodes') or buttonData.get('nodes', []), namespace) \
+                    if namespace != ':' else (buttonData.get('oldNodes') or buttonData.get('nodes', []))
+
+        # command buttons only hold a placeholder node
+        if sceneNodes is not None and not buttonData.get('code'):
+            missing = [node for node in nodes if node not in sceneNodes]
+            if missing:
+                issues.append(_issue('missingNode', f'nodes not found: {missing}', buttonId))
+
+    for coveredId, coveringId in findCoveredButtons(rects):
+        issues.append(_issue('coveredButton', f'fully covered by button {coveringId}', coveredId))
+
+    undoDatas = (data.get('undos') or {}).get('undoDatas', [])
+    if len(undoDatas) > maxUndoCount:
+        issues.append(_issue('largeUndo', f'{len(undoDatas)} undo steps (max {maxUndoCount})'))
+    undoBytes = len(json.dumps(undoDatas))
+    if undoBytes > maxUndoBytes:
+        issues.append(_issue('largeUndo', f'undo history is {undoBytes} bytes (max {maxUndoBytes})'))
+    return issues
+
+
+def lintFile(filePath: str, sceneNodes: 'set[str]' = None, maxUndoCount: int = MAX_UNDO_COUNT, maxUndoBytes: int = MAX_UNDO_BYTES) -> dict:
+    try:
+        with open(filePath, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        return {'path': filePath, 'buttons': 0, 'issues': [_issue('unreadable', str(e))]}
+    if not isinstance(data, dict):
+        return {'path': filePath, 'buttons': 0, 'issues': [_issue('invalidFile', 'not a picker')]}
+
+    return {'path'   : filePath,
+            'buttons': len(data.get('buttons') or []),
+            'issues' : lintData(data, sceneNodes, maxUndoCount, maxUndoBytes)}
+
+
+def findFiles(paths: 'list[str]') -> 'list[str]':
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, names in os.walk(p):
+                files.extend(os.path.join(root, name) for name in names if name.lower().endswith('.lpk'))
+        else:
+            files.append(p)
+    return sorted(files)
+
+
+def loadNodeList(filePath: str) -> 'set[str]':
+    with open(filePath, 'r') as f:
+        text = f.read()
+    try:
+        nodes = json.loads(text)
+    except ValueError:
+        nodes = text.splitlines()
+    return {node.strip() for node in nodes if node.strip()}
+
+
+def _initWorker(*args):
+    global _workerArgs
+    _workerArgs = args
+
+
+def _lintFileInWorker(filePath: str) -> dict:
+    return lintFile(filePath, *_workerArgs)
+
+
+def lintFiles(files: 'list[str]', sceneNodes: 'set[str]' = None, jobs: int = None,
+              maxUndoCount: int = MAX_UNDO_COUNT, maxUndoBytes: int = MAX_UNDO_BYTES) -> dict:
+    '''
+    Lint the files in a process pool, jobs=1 runs in this process
+    '''
+    args = (sceneNodes, maxUndoCount, maxUndoBytes)
+    if jobs == 1 or len(files) < 2:
+        results = [lintFile(filePath, *args) for filePath in files]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_initWorker, initargs=args) as executor:
+            results = list(executor.map(_lintFileInWorker, files, chunksize=max(1, len(files) // 256)))
+
+    counts = {}
+    for result in results:
+        for issue in result['issues']:
+            counts[issue['code']] = counts.get(issue['code'], 0) + 1
+    return {'summary': {'files'          : len(results),
+                        'filesWithIssues': sum(1 for result in results if result['issues']),
+                        'issues'         : counts},
+            'files'  : results}
+
+
+def main(argv: 'list[str]' = None) -> int:
+    parser = argparse.ArgumentParser(prog='lpkLint', description='Validate LinkPicker .lpk files')
+    parser.add_argument('paths', nargs='+', help='.lpk files or directories (searched recursively)')
+    parser.add_argument('--nodes', help='node list (one per line, or a json list) to check the button nodes against')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes, default: cpu count')
+    parser.add_argument('--max-undo-count', type=int, default=MAX_UNDO_COUNT)
+    parser.add_argument('--max-undo-bytes', type=int, default=MAX_UNDO_BYTES)
+    parser.add_argument('--output', help='write the json report to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    sceneNodes = loadNodeList(args.nodes) if args.nodes else None
+    report     = lintFiles(findFiles(args.paths), sceneNodes, args.jobs, args.max_undo_count, args.max_undo_bytes)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+        sys.stdout.write('\n')
+    return 1 if report['summary']['filesWithIssues'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
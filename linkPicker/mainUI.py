@@ -1,3 +1,4 @@
+import os
 import sys
 import json
 import maya.cmds as cmds
@@ -12,9 +13,9 @@ else:
 
 from . import (
     qtUtils, widgets, colorWidget, toolBoxWidget, 
-    config, metaNode, fileManager, mainUIMenu, preferencesWidget, imageWidget)
+    config, metaNode, fileManager, mainUIMenu, preferencesWidget, imageWidget, pickerJournal, pickerCache, saveWorker)
     
-from .pickerViewWidgets import buttonManager, pickerView
+from .pickerViewWidgets import buttonManager, pickerView, mirror
 
 
 class MainUI(QtWidgets.QWidget):
@@ -24,12 +25,37 @@ class MainUI(QtWidgets.QWidget):
     
 
     # -----------------------------------------------------------------------------------
+    def markSelectionDirty(self, *args):
+        '''
+        SelectionChanged only marks the selection dirty, scripts selecting in loops fire it hundreds of times
+        All the events arriving before the sync runs are coalesced into a single updateButtonsSelection
+        '''
+        if pickerView.PickerView.isSelectionviaUiActive():
+           return
+           
+        if self.selectionDirty:
+            self.selectionEventsCoalesced += 1
+            return
+        self.selectionDirty = True
+        # 0 ms runs on the next event-loop turn
+        self.selectionSyncTimer.start(self.selectionSyncLatency)
+        
+        
+    def _syncSelection(self):
+        if not self.selectionDirty:
+            return
+        self.selectionDirty = False
+        self.updateButtonsSelection()
+        
+        
     def currentTabUpdateCallback(self):
         self.updateButtonsSelection(autoSwitchTab=False)
         
     
     def updateButtonsSelection(self, *args, autoSwitchTab=True):
-        
+        '''
+        Only the visible tab is synced, hidden tabs catch up with the diff since their last generation when shown
+        '''
         if pickerView.PickerView.isSelectionviaUiActive():
            return
   
@@ -37,69 +63,201 @@ class MainUI(QtWidgets.QWidget):
         if not allPickerViews:
             return
             
-        selectedNodes  = set(cmds.ls(sl=True, fl=True))     
-        if not selectedNodes:
-            for picker in allPickerViews:
-                picker.clearSelectedButtons()
-            return
-
-        # ----------------------------
-        allButtonsInfo = {picker: {button: set(button.nodes) for button in picker.allPickerButtons}
-                          for picker in allPickerViews}
-            
-        cacheSelectedButtons = []
-        for picker, buttons in allButtonsInfo.items():
-            selButtons = [button for button, nodes in buttons.items() if nodes <= selectedNodes]
- 
-            picker.clearSelectedButtons() 
+        selectedNodes = frozenset(cmds.ls(sl=True, fl=True))
+        if selectedNodes != self.selectedNodes:
+            self.selectedNodes        = selectedNodes
+            self.selectionGeneration += 1
             
-            if selButtons:
-                for button in selButtons:
-                    button.setSelected(True)
-                    if button not in picker.selectedButtons:
-                        picker.selectedButtons.append(button)
-                    cacheSelectedButtons.append(button)
+        currentPicker = self.getCurrentPickerView()
+        if currentPicker is None:
+            return
+        currentPicker.syncSelection(self.selectedNodes, self.selectionGeneration)
         
         # to tab
         if not autoSwitchTab:
             return
-        if not self.autoSwitchTab:
-            return
-            
-        currentPicker = self.getCurrentPickerView()
-        if currentPicker is None:
+        if not self.autoSwitchTab or not selectedNodes:
             return
             
-        currentAllNodes = {tuple(button.nodes) for button in currentPicker.allPickerButtons}
-    
-        for button in cacheSelectedButtons:
-            if tuple(button.nodes) in currentAllNodes:
+        currentAllNodes = currentPicker.getButtonsNodeKeys()
+        for picker in allPickerViews:
+            if picker is currentPicker:
                 continue
-            else:
-                for picker, buttons in allButtonsInfo.items():
-                    if button not in buttons:
-                        continue
-                    self.tabWidget.setCurrentWidget(picker)
-                    return 
+            for button in picker.getSelectableButtons(selectedNodes, selectedNodes):
+                if tuple(button.nodes) in currentAllNodes:
+                    continue
+                self.tabWidget.setCurrentWidget(picker) # currentTabUpdateCallback syncs it
+                return 
                     
 
+    # reference -------------------------------------------------------------------------
+    def referenceLoaded(self, referenceNode, resolvedFile, *args):
+        '''
+        Only the pickers of the loaded reference are added, the open tabs are left untouched
+        Their meta nodes are tagged like mergeNodes does, so closing the UI does not merge them a second time
+        '''
+        if om2.MFileIO.isOpeningFile():
+            return # SceneOpened merges every meta node at once
+            
+        refNode = om2.MFnDependencyNode(referenceNode).name()
+        pickerDataNodes, data = metaNode.getReferencePickerData(refNode)
+        if not data:
+            return
+            
+        for pickerDataNode in pickerDataNodes:
+            pickerDataNode.tagReference()
+        self.referencePickerDataNodes.setdefault(refNode, []).extend(pickerDataNodes)
+        
+        for pickerData in data:
+            picker = self._createNewTab(pickerData['tabName'], pickerData)
+            picker.referenceNode = refNode
+        self.currentTabUpdateCallback()
+        
+        
+    def _tagReferencePickers(self, references: dict):
+        '''
+        The pickers of references already loaded when the scene is opened or the UI shown are merged with the local ones,
+        they get their reference node too (see metaNode.referencedPickers), so unloading the reference closes their tabs
+        '''
+        self.referencePickerDataNodes.clear()
+        for picker in self.tabWidget.getWidget():
+            namespace = picker.namespace or ':'
+            picker.referenceNode = next((refNode for refNode, (_, pickerKeys) in references.items()
+                                         if (picker.pickerId, namespace) in pickerKeys
+                                         or (picker.getTabName().rstrip('*'), namespace) in pickerKeys), '')
+        for refNode, (pickerDataNodes, _) in references.items():
+            self.referencePickerDataNodes[refNode] = pickerDataNodes
+            
+            
+    def referenceUnloaded(self, referenceNode, resolvedFile, *args):
+        '''
+        Close exactly the tabs added by referenceLoaded for this reference
+        Untagging the meta nodes brings the pickers back when the reference is loaded again
+        '''
+        refNode = om2.MFnDependencyNode(referenceNode).name()
+        for picker in self.tabWidget.getWidget():
+            if picker.referenceNode == refNode:
+                self.tabWidget._closeTab(self.tabWidget.indexOf(picker), showWarning=False)
+                
+        for pickerDataNode in self.referencePickerDataNodes.pop(refNode, []):
+            if cmds.objExists(pickerDataNode.node):
+                pickerDataNode.untagReference()
+                
+
     def updateOpenScene(self, *args):
-        # metaNode.mergeNodes().set(self.get())
-        self.deleteAllTab()
-        data = metaNode.mergeNodes().get()
-        if data:
-            self.set(data)
+        '''
+        Open tabs are matched to the scene's pickers by pickerId (by tab name for data saved without one)
+        Matched tabs are patched in place, only the difference is created or closed
+        '''
+        self.referencePickerDataNodes.clear()
+        references = metaNode.referencedPickers()
+        data       = metaNode.mergeNodes().get()
+        if not data:
+            self.deleteAllTab()
+            return
+            
+        openPickers = {}
+        for picker in self.tabWidget.getWidget():
+            openPickers.setdefault(picker.pickerId, []).append(picker)
+            openPickers.setdefault(picker.getTabName().rstrip('*'), []).append(picker)
+            
+        usedPickers = []
+        for pickerData in data:
+            pickers = [picker for picker in openPickers.get(pickerData.get('pickerId') or pickerData['tabName'], []) 
+                       if picker not in usedPickers]
+            if pickers:
+                picker = pickers[0]
+                picker.reconcile(pickerData)
+                index = self.tabWidget.indexOf(picker)
+                self.tabWidget.setTabText(index, pickerData['tabName'])
+                self.updateTabToolTip(picker)
+            else:
+                picker = self._createNewTab(pickerData['tabName'], pickerData)
+            usedPickers.append(picker)
+            
+        for picker in self.tabWidget.getWidget():
+            if picker not in usedPickers:
+                self.tabWidget._closeTab(self.tabWidget.indexOf(picker), showWarning=False)
+                
+        # same tab order as the saved data
+        for index, picker in enumerate(usedPickers):
+            if self.tabWidget.indexOf(picker) != index:
+                self.tabWidget.tabBar.moveTab(self.tabWidget.indexOf(picker), index)
+                
+        self._tagReferencePickers(references)
+        self._updateNamespaceItem(self.tabWidget.currentIndex())
+        self.currentTabUpdateCallback()
 
     
+    # live reload -------------------------------------------------------------------------
+    def watchPickerFiles(self, *args):
+        '''
+        Watch the files of the open pickers, a file replaced by a save is a new file and has to be added again
+        '''
+        filePaths = {picker.cacheSavePath for picker in self.tabWidget.getWidget() 
+                     if picker.cacheSavePath and os.path.isfile(picker.cacheSavePath)}
+        watched   = set(self.fileWatcher.files())
+        if watched - filePaths:
+            self.fileWatcher.removePaths(list(watched - filePaths))
+        if filePaths - watched:
+            self.fileWatcher.addPaths(list(filePaths - watched))
+            
+            
+    def pickerFileChanged(self, filePath):
+        '''
+        A file is often written in several steps, the reload waits until the changes settle
+        '''
+        self.changedPickerFiles.add(filePath)
+        self.fileReloadTimer.start()
+        
+        
+    def reloadChangedFiles(self):
+        '''
+        The pickers of a changed file are patched with its buttons (PickerView.reloadFromFile), not rebuilt
+        Our own saves and the tabs with unsaved changes are left alone
+        '''
+        filePaths, self.changedPickerFiles = self.changedPickerFiles, set()
+        self.watchPickerFiles()
+        
+        for filePath in filePaths:
+            pickers = [picker for picker in self.tabWidget.getWidget() if picker.cacheSavePath == filePath]
+            if not pickers or not os.path.isfile(filePath) or saveWorker.isOwnWrite(filePath):
+                continue
+            try:
+                data = pickerCache.load(filePath)
+            except (OSError, ValueError) as e:
+                om2.MGlobal.displayWarning(f'Could not reload {filePath}: {e}')
+                continue
+                
+            for picker in pickers:
+                tabName = self.tabWidget.tabText(self.tabWidget.indexOf(picker))
+                if tabName.endswith('*'):
+                    om2.MGlobal.displayWarning(f"{filePath} changed on disk, the tab '{tabName[:-1]}' has unsaved changes and was not reloaded")
+                    continue
+                if picker.reloadFromFile(data):
+                    om2.MGlobal.displayInfo(f"Tab '{tabName}' reloaded from {filePath}")
+        self.currentTabUpdateCallback()
+        
+        
     def setScriptJobEnabled(self, enabled):
         if enabled and not MainUI._SCRIPT_JOB_NUMBERS:
-            jobMap = {'SelectionChanged': self.updateButtonsSelection,
+            jobMap = {'SelectionChanged': self.markSelectionDirty,
                       'NewSceneOpened'  : self.deleteAllTab,
                       'SceneOpened'     : self.updateOpenScene}
             
             for key, value in jobMap.items():
                 jobIndex = om2.MEventMessage.addEventCallback(key, value)
                 MainUI._SCRIPT_JOB_NUMBERS.append(jobIndex)
+            MainUI._SCRIPT_JOB_NUMBERS.extend(mirror.addCacheCallbacks())
+            MainUI._SCRIPT_JOB_NUMBERS.extend(saveWorker.addCallbacks())
+            
+            # the nodes of a reference are only reachable before it is unloaded or removed
+            referenceMap = {om2.MSceneMessage.kAfterCreateReference : self.referenceLoaded,
+                            om2.MSceneMessage.kAfterLoadReference   : self.referenceLoaded,
+                            om2.MSceneMessage.kBeforeUnloadReference: self.referenceUnloaded,
+                            om2.MSceneMessage.kBeforeRemoveReference: self.referenceUnloaded}
+            for message, func in referenceMap.items():
+                MainUI._SCRIPT_JOB_NUMBERS.append(om2.MSceneMessage.addReferenceCallback(message, func))
             
         elif not enabled and MainUI._SCRIPT_JOB_NUMBERS:
             try:
@@ -108,6 +266,10 @@ class MainUI(QtWidgets.QWidget):
             except Exception as e:
                 om2.MGlobal.displayWarning(f'Error removing callback: {e}')
             MainUI._SCRIPT_JOB_NUMBERS.clear()
+            mirror.removeCacheCallbacks()
+            saveWorker.removeCallbacks()
+            self.selectionSyncTimer.stop()
+            self.selectionDirty = False
             
     
     def showEvent(self, event):
@@ -125,10 +287,15 @@ class MainUI(QtWidgets.QWidget):
         self.currentTabUpdateCallback()
         
         # --------------------------------------
-        data = metaNode.mergeNodes().get()
+        references = metaNode.referencedPickers()
+        data       = metaNode.mergeNodes().get()
         if data:
             self.set(data)
+            self._tagReferencePickers(references)
             self.restoreSavedTabIndex()
+            
+        if pickerJournal.orphanJournals():
+            om2.MGlobal.displayWarning('Link Picker: unsaved pickers of a previous session can be recovered from File > Recover Autosaved Pickers')
         
         
     def closeEvent(self, event):
@@ -141,25 +308,33 @@ class MainUI(QtWidgets.QWidget):
             super().closeEvent(event)
             self.setScriptJobEnabled(False)
             
-        self.savePickerDataToSceneNode()
+        self.savePickerDataToSceneNode(wait=True) # the scene save callback goes away with the UI
         self.deleteAllTab()
         
         
-    def savePickerDataToSceneNode(self):
+    def savePickerDataToSceneNode(self, wait=False):
         '''
-        If a file is referenced while the picker is open, and the reference file contains pickerNode data,
-        the tabs will not refresh automatically (since no callback for references has been identified yet).
+        References loaded while the picker is open are added by referenceLoaded, references loaded while it is closed are not.
         Therefore, when closing the UI, it is necessary to check for any referenced pickerNode data again.
         If such data exists, synchronize it with the current pickerNode to ensure data consistency.
+        The pickers are only copied here, saveWorker encodes them and sets the meta node afterwards
         '''
-        refData    = metaNode.getReferenceNodeData() 
-        pickerData = self.get()
-        if refData:
-            pickerData.extend(refData)
+        refData   = metaNode.getReferenceNodeData() 
+        documents = [pickerView.getSnapshot() for pickerView in self.tabWidget.getWidget()]
+        saveWorker.saveSceneNode(documents, refData)
+        if wait:
+            saveWorker.flush()
         
-        metaNode.mergeNodes().set(pickerData)
         
         
+    def compactSceneData(self):
+        '''
+        Drop the duplicated pickers that older versions piled up in the scene's meta nodes
+        '''
+        saveWorker.flush()
+        before, after = metaNode.compactNodes()
+        om2.MGlobal.displayInfo(f'Link Picker scene data compacted: {before} -> {after} characters')
+        
         
     def saveCurrentTabIndex(self):
         self.savedTabIndex = -1 if self.tabWidget.count() <= 1 else self.tabWidget.currentIndex()
@@ -226,8 +401,7 @@ class MainUI(QtWidgets.QWidget):
         if self.pickerPaths:
             datas = []
             for pickerPath in self.pickerPaths:
-                with open(pickerPath, 'r') as f:
-                    datas.append(json.load(f))
+                datas.append(pickerCache.load(pickerPath))
             self.set(datas)
             
    
@@ -253,6 +427,25 @@ class MainUI(QtWidgets.QWidget):
         self._createConnections()
         
         self.pickerPaths = None
+        self.referencePickerDataNodes = {} # reference node -> meta nodes tagged by referenceLoaded
+        
+        self.selectedNodes            = frozenset() # Maya selection of the current generation
+        self.selectionGeneration      = 0
+        self.selectionDirty           = False
+        self.selectionEventsCoalesced = 0 # SelectionChanged events merged into an already pending sync
+        self.selectionSyncTimer = QtCore.QTimer(self)
+        self.selectionSyncTimer.setSingleShot(True)
+        self.selectionSyncTimer.timeout.connect(self._syncSelection)
+        
+        # the files of the open pickers, reloaded when saved from somewhere else
+        self.changedPickerFiles = set()
+        self.fileWatcher        = QtCore.QFileSystemWatcher(self)
+        self.fileWatcher.fileChanged.connect(self.pickerFileChanged)
+        self.fileReloadTimer = QtCore.QTimer(self)
+        self.fileReloadTimer.setSingleShot(True)
+        self.fileReloadTimer.setInterval(300)
+        self.fileReloadTimer.timeout.connect(self.reloadChangedFiles)
+        
         self.buttonManager = buttonManager.ButtonManager(self.toolBoxWidget)
         self.fileManager   = fileManager.FileManager(self)
         
@@ -297,15 +490,18 @@ class MainUI(QtWidgets.QWidget):
  
     def _createConnections(self):
         self.tabWidget.duplicateTriggered[int].connect(self.duplicateActiveTab)
+        self.tabWidget.duplicateWithUndoTriggered[int].connect(partial(self.duplicateActiveTab, withUndo=True))
         self.tabWidget.openClicked.connect(lambda: self.fileManager.open())
         self.tabWidget.newTab.connect(self._createNewTab)
         self.tabWidget.tabCount[int].connect(self.updateNamespaceWidgetTag) # hide namespaceWidget
+        self.tabWidget.tabCount[int].connect(self.watchPickerFiles)
         self.tabWidget.currentChanged.connect(self._updateNamespaceItem)
         self.tabWidget.currentChanged.connect(self.currentTabUpdateCallback) # update callback
         
         
         self.mainMenuBar.newTriggered.connect(self.tabWidget.newTab.emit)
         self.mainMenuBar.openTriggered.connect(lambda: self.fileManager.open())
+        self.mainMenuBar.recoverTriggered.connect(lambda: self.fileManager.recoverAutosaves())
         self.mainMenuBar.saveTriggered.connect(self._saveActionHandle)
         self.mainMenuBar.saveAsTriggered.connect(lambda: self.fileManager.saveAs(self.undoToFile))
         self.mainMenuBar.renameTabTriggered.connect(lambda: self.tabWidget._renameTab(self.tabWidget.currentIndex()))
@@ -318,6 +514,7 @@ class MainUI(QtWidgets.QWidget):
         
         self.mainMenuBar.changeBackgroundTriggered.connect(self._showImageWidget)
         self.mainMenuBar.changeNamespaceTriggered.connect(self._showNamespaceEdit)
+        self.mainMenuBar.compactSceneDataTriggered.connect(self.compactSceneData)
         self.mainMenuBar.preferencesTriggered.connect(self._showPreferences)
         
     
@@ -384,9 +581,13 @@ class MainUI(QtWidgets.QWidget):
         self.showTabClosewarning = data['general']['closeTabCheckBox']
 
         self.ZoomDrag      = data['general']['ZoomSlider']
+        self.selectionSyncLatency = data['general'].get('selectionSyncLatency', 0) # ms
         self.undoQueue     = data['settings']['queue']
         self.enableUndo    = data['settings']['undo']
         self.undoToFile    = data['settings']['undoToFile']
+        self.undoMemory    = data['settings'].get('undoMemory', 0)
+        self.undoSpill     = data['settings'].get('undoSpill', False)
+        mirror.clearCache() # mirror rules may have changed
         
         self.updatePickerTags()
         self.showToolBoxWidget(self.showToolBox)
@@ -406,7 +607,9 @@ class MainUI(QtWidgets.QWidget):
             picker.ZoomDrag   = self.ZoomDrag
             picker.undoQueue  = self.undoQueue
             picker.enableUndo = self.enableUndo
-            picker.setUndoMode(self.enableUndo, self.undoQueue)
+            picker.undoMemory = self.undoMemory
+            picker.undoSpill  = self.undoSpill
+            picker.setUndoMode(self.enableUndo, self.undoQueue, self.undoMemory, self.undoSpill)
             
     def showToolBoxWidget(self, _):
         self.toolBoxWidget.show() if _ else self.toolBoxWidget.hide()
@@ -459,8 +662,8 @@ class MainUI(QtWidgets.QWidget):
         if oldName[-1] != '*':
             self.tabWidget.setTabText(tabIndex, f'{oldName}*')
             
-    def unflagUnsavedTab(self):
-        currentPicker = self.getCurrentPickerView()
+    def unflagUnsavedTab(self, picker=None):
+        currentPicker = picker or self.getCurrentPickerView()
         if currentPicker is None:
             return
             
@@ -476,7 +679,9 @@ class MainUI(QtWidgets.QWidget):
                                                  midView       = self.midView,
                                                  ZoomDrag      = self.ZoomDrag,
                                                  undoQueue     = self.undoQueue,
-                                                 enableUndo    = self.enableUndo)
+                                                 enableUndo    = self.enableUndo,
+                                                 undoMemory    = self.undoMemory,
+                                                 undoSpill     = self.undoSpill)
 
         pickerViewInstance.updateTab.connect(self.flagUnsavedTab)
         
@@ -499,25 +704,31 @@ class MainUI(QtWidgets.QWidget):
             pickerViewInstance.set(data)
             self._updateNamespaceItem(index)
         self.updateTabToolTip(pickerViewInstance)
+        return pickerViewInstance
         
     def updateTabToolTip(self, picker):
         index = self.tabWidget.indexOf(picker)
         self.tabWidget.setTabToolTip(index, picker.cacheSavePath or 'Link Picker')
+        self.watchPickerFiles()
         
         
-    def duplicateActiveTab(self, index):
+    def duplicateActiveTab(self, index, withUndo=False):
+        '''
+        The copy is built straight from the open picker, without going through get() / set()
+        '''
         pickerView = self.tabWidget.widget(index) 
-        data = pickerView.get()
         
-        data['cacheSavePath'] = '' # update cacheSavePath
-        tabName = data['tabName']
+        tabName = self.tabWidget.tabText(index)
         if tabName[-1] == '*':
             tabName = tabName[:-1]
-        self._createNewTab(f'{tabName} (copy)', data)
+        newPickerView = self._createNewTab(f'{tabName} (copy)')
+        newPickerView.duplicateFrom(pickerView, withUndo)
+        self._updateNamespaceItem(self.tabWidget.indexOf(newPickerView))
         self.currentTabUpdateCallback()
         
         
     def deleteAllTab(self, *args):
+        self.referencePickerDataNodes.clear()
         pickerViews = self.tabWidget.getWidget()
         if not pickerViews:
             return
@@ -536,9 +747,9 @@ class MainUI(QtWidgets.QWidget):
         return pickerViewsData
         
         
-    def set(self, data: list):
+    def set(self, data: list) -> list:
         if not data:
-            return
-        for pickerData in data:
-            self._createNewTab(pickerData['tabName'], pickerData)
+            return []
+        pickerViews = [self._createNewTab(pickerData['tabName'], pickerData) for pickerData in data]
         self.currentTabUpdateCallback()
+        return pickerViews
@@ -12,6 +12,7 @@ class MainMenu(QtWidgets.QMenuBar):
     
     newTriggered       = QtCore.Signal()
     openTriggered      = QtCore.Signal()
+    recoverTriggered   = QtCore.Signal()
     saveTriggered      = QtCore.Signal()
     saveAsTriggered    = QtCore.Signal()
     renameTabTriggered = QtCore.Signal()
@@ -27,6 +28,7 @@ class MainMenu(QtWidgets.QMenuBar):
     changeBackgroundTriggered = QtCore.Signal()
     #resizeBackgroundTriggered = QtCore.Signal()
     changeNamespaceTriggered  = QtCore.Signal()
+    compactSceneDataTriggered = QtCore.Signal()
     #showToolBoxTriggered = QtCore.Signal(bool)
     preferencesTriggered = QtCore.Signal()
     
@@ -53,6 +55,7 @@ class MainMenu(QtWidgets.QMenuBar):
         
         self.newAction        = Action(QtGui.QIcon(':fileNew.png'), 'New...',   self.fileMenu, shortcut='Ctrl+N')
         self.openAction       = Action(QtGui.QIcon(':fileOpen.png'), 'Open...', self.fileMenu, shortcut='Ctrl+O')
+        self.recoverAction    = Action('Recover Autosaved Pickers', self.fileMenu)
         self.saveAction       = Action(QtGui.QIcon(':fileSave.png'), 'Save',    self.fileMenu, shortcut='Ctrl+S')
         self.saveAsAction     = Action('Save as...', self.fileMenu, shortcut='Ctrl+Shift+S')
         self.renameTabAction  = Action(QtGui.QIcon(':renamePreset.png'), 'Rename Tab',    self.fileMenu)
@@ -68,6 +71,7 @@ class MainMenu(QtWidgets.QMenuBar):
         self.changeBackgroundAction = Action(QtGui.QIcon('linkPickerIcons:backgroundLogo.png'), 'Change Background', self.editMenu)
         #self.resizeBackgroundAction = Action('Resize Background', self.editMenu)
         self.changeNamespaceAction  = Action('Change Namespace',  self.editMenu)
+        self.compactSceneDataAction = Action('Compact Scene Picker Data', self.editMenu)
         # self.ToolAction = Action('Show ToolBox', self.editMenu)
         # self.ToolAction.setCheckable(True)
         # self.ToolAction.setChecked(True)
@@ -77,6 +81,7 @@ class MainMenu(QtWidgets.QMenuBar):
 
         self.fileMenu.addAction(self.newAction)
         self.fileMenu.addAction(self.openAction)
+        self.fileMenu.addAction(self.recoverAction)
         self.fileMenu.addSeparator()
         self.fileMenu.addAction(self.saveAction)
         self.fileMenu.addAction(self.saveAsAction)
@@ -99,6 +104,7 @@ class MainMenu(QtWidgets.QMenuBar):
         #self.editMenu.addAction(self.resizeBackgroundAction)
         self.editMenu.addSeparator()
         self.editMenu.addAction(self.changeNamespaceAction)
+        self.editMenu.addAction(self.compactSceneDataAction)
         #self.editMenu.addSeparator()
         #self.editMenu.addAction(self.ToolAction)
         self.editMenu.addSeparator()
@@ -113,6 +119,7 @@ class MainMenu(QtWidgets.QMenuBar):
         
         self.newAction.triggered.connect(self.newTriggered.emit)
         self.openAction.triggered.connect(self.openTriggered.emit)
+        self.recoverAction.triggered.connect(self.recoverTriggered.emit)
         self.saveAction.triggered.connect(self.saveTriggered.emit)
         self.saveAsAction.triggered.connect(self.saveAsTriggered.emit)
         self.renameTabAction.triggered.connect(self.renameTabTriggered.emit)
@@ -128,6 +135,7 @@ class MainMenu(QtWidgets.QMenuBar):
         self.changeBackgroundAction.triggered.connect(self.changeBackgroundTriggered.emit)
         #self.resizeBackgroundAction.triggered.connect(self.resizeBackgroundTriggered.emit)
         self.changeNamespaceAction.triggered.connect(self.changeNamespaceTriggered.emit)
+        self.compactSceneDataAction.triggered.connect(self.compactSceneDataTriggered.emit)
         
         #self.ToolAction.triggered.connect(lambda _bool: self.showToolBoxTriggered.emit(_bool))
         self.preferencesAction.triggered.connect(self.preferencesTriggered.emit)
@@ -1,6 +1,31 @@
 import json
+import marshal
+import functools
 import maya.cmds as cmds
 
+from . import pickerModel
+
+
+def encode(data: list) -> str:
+    '''
+    linkPickerData string: one template per distinct picker content, see pickerModel.packPickers
+    '''
+    return json.dumps(pickerModel.packPickers(data))
+
+
+@functools.lru_cache(maxsize=16)
+def _decode(rawData: str) -> bytes:
+    return marshal.dumps(pickerModel.unpackPickers(json.loads(rawData)))
+
+
+def decode(rawData: str) -> list:
+    '''
+    The meta nodes of several references of the same file hold the same string, it is only parsed once
+    The parsed data is cached in marshal form: every call gets its own objects (much faster than parsing again),
+    a caller editing them can't change what the next one gets
+    '''
+    return marshal.loads(_decode(rawData))
+
 
 class PickerDataNode(object):
     
@@ -27,13 +52,20 @@ class PickerDataNode(object):
 
  
     def set(self, data: list):
+        self.setRaw(encode(data))
+        
+        
+    def setRaw(self, text: str):
+        '''
+        Data already encoded as a json string, see saveWorker
+        '''
         self.lockAttr(False)
-        cmds.setAttr(f'{self.node}.linkPickerData', json.dumps(data), type='string')
+        cmds.setAttr(f'{self.node}.linkPickerData', text, type='string')
         self.lockAttr(True)
         
  
     def get(self) -> list:
-        return json.loads(cmds.getAttr(f'{self.node}.linkPickerData'))
+        return decode(cmds.getAttr(f'{self.node}.linkPickerData'))
         
         
     def delete(self):
@@ -49,6 +81,9 @@ class PickerDataNode(object):
     def tagReference(self):
         cmds.setAttr(f'{self.node}.isReferenced', True)
         
+    def untagReference(self):
+        cmds.setAttr(f'{self.node}.isReferenced', False)
+        
     @property    
     def isReferenced(self) -> bool:
         return cmds.referenceQuery(self.node, isNodeReferenced=True)
@@ -82,11 +117,49 @@ def getReferenceNodeData() -> list:
         if not (cmds.objExists(f'{node}.isLinkPicker') and cmds.getAttr(f'{node}.isLinkPicker') and not cmds.getAttr(f'{node}.isReferenced')):
             continue
         if cmds.referenceQuery(node, isNodeReferenced=True):
-            refNodeDatas.extend(json.loads(cmds.getAttr(f'{node}.linkPickerData'))) 
+            refNodeDatas.extend(decode(cmds.getAttr(f'{node}.linkPickerData')))
                          
     return refNodeDatas
     
     
+def referencedPickers() -> 'dict[str, tuple[list[PickerDataNode], set[tuple[str, str]]]]':
+    '''
+    Reference node -> (its meta nodes, tagged or not, (pickerId, namespace) of their pickers)
+    mergeNodes copies the referenced pickers into the local node, this keeps where they came from
+    Data saved without a pickerId is keyed by its tab name
+    '''
+    references = {}
+    for node in cmds.ls(typ='network'):
+        if not (cmds.objExists(f'{node}.isLinkPicker') and cmds.getAttr(f'{node}.isLinkPicker')):
+            continue
+        if not cmds.referenceQuery(node, isNodeReferenced=True):
+            continue
+        pickerDataNodes, pickerKeys = references.setdefault(cmds.referenceQuery(node, referenceNode=True), ([], set()))
+        pickerDataNodes.append(PickerDataNode(node))
+        pickerKeys.update((data.get('pickerId') or data['tabName'], data.get('namespace') or ':')
+                          for data in decode(cmds.getAttr(f'{node}.linkPickerData')))
+    return references
+    
+    
+def getReferencePickerData(referenceNode: str) -> 'tuple[list[PickerDataNode], list]':
+    '''
+    Picker data of the meta nodes coming from one reference that have not been merged yet (not tagged)
+    Loading the same file again does not parse its data again, see decode
+    '''
+    pickerDataNodes = []
+    refNodeDatas    = []
+    for node in cmds.referenceQuery(referenceNode, nodes=True) or []:
+        if cmds.nodeType(node) != 'network' or not cmds.objExists(f'{node}.isLinkPicker'):
+            continue
+        if not cmds.getAttr(f'{node}.isLinkPicker') or cmds.getAttr(f'{node}.isReferenced'):
+            continue
+            
+        pickerDataNodes.append(PickerDataNode(node))
+        refNodeDatas.extend(decode(cmds.getAttr(f'{node}.linkPickerData')))
+        
+    return pickerDataNodes, refNodeDatas
+    
+    
 def mergeNodes() -> PickerDataNode:
     metaNodes = getPickerDataNode()
     
@@ -110,3 +183,17 @@ def mergeNodes() -> PickerDataNode:
     newNode = createPickerDataNode()
     newNode.set(newData)
     return newNode
+
+
+def compactNodes() -> 'tuple[int, int]':
+    '''
+    Rewrite the scene's meta nodes as one node without duplicated pickers, in the template format
+    For scenes that grew with every session before the data was deduplicated
+    Returns the size of the local picker data before and after, in characters
+    '''
+    before = sum(len(cmds.getAttr(f'{metaNode.node}.linkPickerData') or '')
+                 for metaNode in getPickerDataNode() if not metaNode.isReferenced)
+    
+    newNode = mergeNodes()
+    newNode.set(newNode.get())
+    return before, len(cmds.getAttr(f'{newNode.node}.linkPickerData'))
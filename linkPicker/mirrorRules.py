@@ -0,0 +1,75 @@
+'''
+Left/right naming rules of the mirror tools, plain python (no Qt, no Maya)
+pickerViewWidgets.mirror checks the mirrored names against the scene, pickerBatch uses the rules headless
+'''
+import re
+
+from . import config
+
+
+class MirrorRules(object):
+    '''
+    Left/right naming rules, read from the 'mirror' section of the config
+    
+    regex  : [[pattern, replacement], ...], tried first, the first pattern that matches wins
+    markers: [[left, right], ...], side tokens only match as a whole word,
+             so 'Right' in 'Leg_Right' is a side but 'R' and 'L' in 'Leg_Right' are not
+    '''
+    def __init__(self, data: dict = None):
+        data = data or config.ConfigManager.DEFAULT_CONFIG['mirror']
+        self.regexRules  = [(re.compile(pattern), replacement) for pattern, replacement in data.get('regex', [])]
+        self.markerRules = []
+        for left, right in data.get('markers', []):
+            self.markerRules.append((self._markerPattern(left), right))
+            self.markerRules.append((self._markerPattern(right), left))
+            
+            
+    @staticmethod
+    def _markerPattern(marker: str) -> 're.Pattern':
+        '''
+        Single letters must stand alone (L_arm, arm_L1), words may also start or end a camelCase name (leftArm, armLeft)
+        '''
+        if len(marker) == 1:
+            return re.compile(rf'(?<![A-Za-z0-9]){re.escape(marker)}(?![A-Za-z])')
+        before = '(?<![A-Z0-9])' if marker[0].isupper() else '(?<![A-Za-z0-9])'
+        return re.compile(rf'{before}{re.escape(marker)}(?![a-z])')
+        
+        
+    def mirrorBaseName(self, name: str) -> str:
+        for pattern, replacement in self.regexRules:
+            newName, count = pattern.subn(replacement, name)
+            if count:
+                return newName
+        for pattern, replacement in self.markerRules:
+            newName, count = pattern.subn(replacement, name)
+            if count:
+                return newName
+        return name
+        
+        
+    def mirrorName(self, name: str) -> str:
+        '''
+        Only the node names are mirrored, never the namespaces or the parents' namespaces
+        '''
+        parts = []
+        for part in name.split('|'):
+            namespace, sep, baseName = part.rpartition(':')
+            parts.append(f'{namespace}{sep}{self.mirrorBaseName(baseName)}')
+        return '|'.join(parts)
+
+
+_MIRROR_RULES = None
+
+def getMirrorRules() -> MirrorRules:
+    global _MIRROR_RULES
+    if _MIRROR_RULES is None:
+        _MIRROR_RULES = MirrorRules(config.ConfigManager().get().get('mirror'))
+    return _MIRROR_RULES
+
+
+def clearRules():
+    '''
+    The config changed, the rules are read again on the next use
+    '''
+    global _MIRROR_RULES
+    _MIRROR_RULES = None
@@ -1,3 +1,6 @@
+import sys
+
+
 def rootName(name: str) -> str:
     return name.rpartition('|')[-1]
 
@@ -26,4 +29,114 @@ def updateNamespaceWithOptional(oldNamespaces: list, newNamespace: str) -> 'list
     return updatedNamespaces
     
     
-
+class NodePath(object):
+    '''
+    A DAG path stored once: its full (original) name plus the namespace-stripped, interned components
+    The full name in another namespace is only built on demand, then cached per namespace
+    '''
+    __slots__ = ('fullName', 'parts', '_names')
+    
+    def __repr__(self):
+        return f'< NodePath: {self.fullName} >'
+        
+        
+    def __init__(self, fullName: str):
+        self.fullName = sys.intern(fullName)
+        self.parts    = tuple(sys.intern(part.split(':', 1)[-1]) for part in fullName.split('|'))
+        self._names   = {}
+        
+        
+    def name(self, namespace: str = ':') -> str:
+        '''
+        Same result as updateNamespaceWithOptional([fullName], namespace)[0], ':' returns the original name
+        '''
+        if namespace == ':':
+            return self.fullName
+            
+        name = self._names.get(namespace)
+        if name is None:
+            prefix = f'{namespace}:' if namespace else ''
+            name   = self._names[namespace] = sys.intern('|'.join(f'{prefix}{part}' for part in self.parts))
+        return name
+        
+        
+class NodeTable(object):
+    '''
+    Per-picker table of unique node paths
+    Each path is interned once and referred to by its integer id, in the buttons, in the undo data and in saved data
+    Ids are never reused or removed, so undo data stays valid for the whole session
+    '''
+    def __repr__(self):
+        return f'< NodeTable at {hex(id(self))}: {len(self.nodePaths)} nodes >'
+        
+        
+    def __init__(self, names: 'list[str]' = ()):
+        self.nodePaths = [] # id -> NodePath
+        self._ids      = {} # full name -> id
+        for name in names:
+            self.add(name)
+            
+            
+    def __len__(self) -> int:
+        return len(self.nodePaths)
+        
+        
+    def __getitem__(self, nodeId: int) -> NodePath:
+        return self.nodePaths[nodeId]
+        
+        
+    def add(self, name: str) -> int:
+        nodeId = self._ids.get(name)
+        if nodeId is None:
+            nodeId = self._ids[name] = len(self.nodePaths)
+            self.nodePaths.append(NodePath(name))
+        return nodeId
+        
+        
+    def ids(self, names: 'list[str]') -> 'list[int]':
+        return [self.add(name) for name in names]
+        
+        
+    def names(self, nodeIds: 'list[int]', namespace: str = ':') -> 'list[str]':
+        return [self.nodePaths[nodeId].name(namespace) for nodeId in nodeIds]
+        
+        
+    def buttonNodeIds(self, buttonData: dict) -> 'list[int]':
+        '''
+        Button data written before the node table existed stores the node names in 'oldNodes' / 'nodes'
+        '''
+        if 'nodeIds' in buttonData:
+            return buttonData['nodeIds']
+        return self.ids(buttonData.get('oldNodes') or buttonData.get('nodes', []))
+        
+        
+    def copy(self) -> 'NodeTable':
+        '''
+        The NodePaths never change once created, so the copy shares them and only the containers are copied
+        '''
+        nodeTable = NodeTable()
+        nodeTable.nodePaths = list(self.nodePaths)
+        nodeTable._ids      = dict(self._ids)
+        return nodeTable
+        
+        
+    def compact(self, usedIds: 'set[int]') -> 'tuple[NodeTable, dict[int, int]]':
+        '''
+        Table of the used ids only (same order), and the old id -> new id map
+        Ids are never removed from a live table, the saved data is written with the compacted one
+        '''
+        nodeTable = NodeTable()
+        remap     = {}
+        for nodeId in sorted(usedIds):
+            nodePath = self.nodePaths[nodeId]
+            remap[nodeId] = len(nodeTable.nodePaths)
+            nodeTable._ids[nodePath.fullName] = remap[nodeId]
+            nodeTable.nodePaths.append(nodePath)
+        return nodeTable, remap
+        
+        
+    def get(self, start: int = 0) -> 'list[str]':
+        '''
+        Names of the ids from start on, the ids added after a table of length start was taken
+        '''
+        return [nodePath.fullName for nodePath in self.nodePaths[start:]]
@@ -0,0 +1,208 @@
+'''
+Headless picker authoring, for mayapy / batch jobs
+
+Builds pickers on the document model (pickerModel) without any widget, the output has the same layout as PickerView.get(),
+so the .lpk files and the meta node data can be opened by the UI as if they were saved from it
+
+    from linkPicker import pickerBatch
+
+    builder = pickerBatch.PickerBuilder('Body')
+    arms    = builder.addButtons([{'nodes': ['L_arm_ctrl'], 'x': 0, 'y': 0}, {'nodes': ['L_hand_ctrl'], 'x': 0, 'y': 50}])
+    builder.styleButtons(arms, color=(255, 0, 0))
+    builder.mirrorButtons(arms, axisX=60)
+    builder.save('D:/pickers/body.lpk')
+'''
+import json
+import uuid
+
+from . import pickerModel, mirrorRules
+
+
+# same defaults as ButtonManager.getToolBoxInfo when there is no tool box
+DEFAULT_BUTTON = {'scaleX'   : 40,
+                  'scaleY'   : 40,
+                  'color'    : (255, 255, 0),
+                  'textColor': (0, 0, 0),
+                  'labelText': ''}
+
+
+class PickerBuilder(object):
+
+    def __repr__(self):
+        return f'< PickerBuilder {self.document.tabName!r}: {len(self.document)} buttons >'
+
+
+    def __init__(self, tabName: str = 'Untitled 1', document: pickerModel.PickerDocument = None):
+        self.document = document or pickerModel.PickerDocument(tabName)
+
+
+    @classmethod
+    def fromData(cls, data: dict) -> 'PickerBuilder':
+        return cls(document=pickerModel.PickerDocument.fromData(data))
+
+
+    @classmethod
+    def fromFile(cls, filePath: str) -> 'PickerBuilder':
+        with open(filePath, 'r') as f:
+            return cls.fromData(json.load(f))
+
+
+    @property
+    def records(self) -> 'list[pickerModel.ButtonRecord]':
+        return list(self.document)
+
+    # buttons ----------------------------------------------------------------------
+    def addButton(self, nodes    : 'list[str]',
+                        x        : float = 0.0,
+                        y        : float = 0.0,
+                        scaleX   : int   = None,
+                        scaleY   : int   = None,
+                        color    : tuple = None,
+                        textColor: tuple = None,
+                        labelText: str   = None,
+                        code     : dict  = None,
+                        buttonId : str   = None) -> pickerModel.ButtonRecord:
+        '''
+        x, y: top left corner in the picker's local space (the button's localPos)
+        '''
+        return self.addButtons([{'nodes': nodes, 'x': x, 'y': y, 'scaleX': scaleX, 'scaleY': scaleY, 'color': color,
+                                 'textColor': textColor, 'labelText': labelText, 'code': code, 'buttonId': buttonId}])[0]
+
+
+    def addButtons(self, buttonsInfo: 'list[dict]') -> 'list[pickerModel.ButtonRecord]':
+        '''
+        buttonsInfo: [{'nodes': list, 'x': float, 'y': float, 'scaleX': int, 'scaleY': int,
+                       'color': (r, g, b), 'textColor': (r, g, b), 'labelText': str, 'code': dict, 'buttonId': str}, ...]
+        Only 'nodes' is required, the others fall back to DEFAULT_BUTTON
+        '''
+        nodeTable = self.document.nodeTable
+        records   = []
+        for info in buttonsInfo:
+            get = lambda key: DEFAULT_BUTTON[key] if info.get(key) is None else info[key]
+            record = pickerModel.ButtonRecord(buttonId  = info.get('buttonId'),
+                                              x         = info.get('x', 0.0),
+                                              y         = info.get('y', 0.0),
+                                              scaleX    = get('scaleX'),
+                                              scaleY    = get('scaleY'),
+                                              color     = get('color'),
+                                              textColor = get('textColor'),
+                                              labelText = get('labelText'),
+                                              nodeIds   = nodeTable.ids(info['nodes']),
+                                              code      = info.get('code'))
+            records.append(self.document.addRecord(record))
+        return records
+
+
+    def addCommandButton(self, code: str, name: str = '', codeType: str = 'Python', **kwargs) -> pickerModel.ButtonRecord:
+        '''
+        Like CreateCommandButtonCmd, the button gets a unique placeholder node and its label is the command name
+        '''
+        kwargs['labelText'] = name
+        return self.addButton([str(uuid.uuid4())], code={'name': name, 'type': codeType, 'code': code}, **kwargs)
+
+
+    def removeButtons(self, records: 'list[pickerModel.ButtonRecord]'):
+        for record in records:
+            self.document.removeRecord(record.buttonId)
+
+
+    def moveButtons(self, records: 'list[pickerModel.ButtonRecord]', offsetX: float = 0.0, offsetY: float = 0.0):
+        for record in records:
+            record.x += offsetX
+            record.y += offsetY
+
+
+    def styleButtons(self, records  : 'list[pickerModel.ButtonRecord]',
+                           color    : tuple = None,
+                           textColor: tuple = None,
+                           scaleX   : int   = None,
+                           scaleY   : int   = None,
+                           labelText: str   = None):
+        '''
+        Only the given values are changed, sizes are clamped like in the UI (10 - 400)
+        '''
+        for record in records:
+            if color is not None:
+                record.color = tuple(color)
+            if textColor is not None:
+                record.textColor = tuple(textColor)
+            if scaleX is not None:
+                record.scaleX = max(10, min(scaleX, 400))
+            if scaleY is not None:
+                record.scaleY = max(10, min(scaleY, 400))
+            if labelText is not None:
+                record.labelText = labelText
+                if record.isCmdButton:
+                    record.code = dict(record.code, name=labelText)
+
+    # picker -----------------------------------------------------------------------
+    def setNamespace(self, namespace: str):
+        '''
+        Same as UpdateButtonsNamespaceCmd: ':' uses the original names,
+        '' strips the namespaces and makes the stripped names the new original names
+        '''
+        document = self.document
+        document.namespace = namespace
+        if namespace != '':
+            return
+        nodeTable = document.nodeTable
+        for record in document:
+            record.nodeIds = tuple(nodeTable.ids([nodeTable[nodeId].name('') for nodeId in record.nodeIds]))
+
+
+    def mirrorButtons(self, records: 'list[pickerModel.ButtonRecord]', axisX: float = 0.0, checkScene: bool = False) -> 'list[pickerModel.ButtonRecord]':
+        '''
+        Add mirrored copies of the buttons, flipped around the vertical line x = axisX (local space)
+        The nodes are renamed with the mirror rules of the config, checkScene keeps only the names that exist in the open scene
+        '''
+        allNodes = list(dict.fromkeys(node for record in records for node in self.document.nodeTable.names(record.nodeIds)))
+        if checkScene:
+            from .pickerViewWidgets import mirror # the scene check needs Maya
+
+            mirrorNodes = mirror.getMirrorObjs(allNodes)
+        else:
+            rules = mirrorRules.getMirrorRules()
+            mirrorNodes = [rules.mirrorName(node) for node in allNodes]
+        pairs = dict(zip(allNodes, mirrorNodes))
+
+        buttonsInfo = []
+        for record in records:
+            buttonsInfo.append({'nodes'    : [pairs[node] for node in self.document.nodeTable.names(record.nodeIds)],
+                                'x'        : 2 * axisX - record.x - record.scaleX,
+                                'y'        : record.y,
+                                'scaleX'   : record.scaleX,
+                                'scaleY'   : record.scaleY,
+                                'color'    : record.color,
+                                'textColor': record.textColor,
+                                'labelText': record.labelText,
+                                'code'     : record.code})
+        return self.addButtons(buttonsInfo)
+
+    # output -----------------------------------------------------------------------
+    def get(self) -> dict:
+        return self.document.toData()
+
+
+    def save(self, filePath: str):
+        '''
+        Same content as FileManager._saveToFile
+        '''
+        self.document.cacheSavePath = filePath
+        data = self.get()
+        with open(filePath, 'w') as f:
+            json.dump(data, f, indent=4)
+
+
+    def saveToMetaNode(self):
+        '''
+        Append the picker to the scene's meta node, the UI shows it as a tab when the scene is opened
+        '''
+        from . import metaNode # Maya is only needed here
+
+        pickerDataNode = metaNode.mergeNodes()
+        pickerDataNode.set(pickerDataNode.get() + [self.get()])
+
+
+def saveFiles(builders: 'list[PickerBuilder]', filePaths: 'list[str]'):
+    for builder, filePath in zip(builders, filePaths):
+        builder.save(filePath)
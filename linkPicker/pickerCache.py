@@ -0,0 +1,128 @@
+'''
+On-disk cache of parsed .lpk files, so opening a picker that was opened before skips the json parsing
+
+An entry is the file's parsed data in marshal form (only the json types, loads much faster than json),
+named by the sha1 of the file's bytes: a file copied or saved again with the same content hits the same entry
+Each entry also stores that sha1, an entry that does not carry the hash it is looked up by is a miss
+The cache is per user (~/.linkPicker/cache, created private, not used when owned by someone else):
+a picker's command code is run on click, nobody else may be able to plant an entry
+In one session a file whose mtime and size did not change is not even read again (_FILE_HASHES)
+The cache is capped at MAX_CACHE_BYTES, the least recently used entries are removed first (a hit touches its entry)
+marshal's format depends on the python version, each version has its own directory
+Any error reading an entry is a miss, the file is parsed again
+'''
+import os
+import sys
+import json
+import marshal
+import hashlib
+
+
+CACHE_DIR       = os.path.join(os.path.expanduser('~'), '.linkPicker', 'cache', f'py{sys.version_info[0]}{sys.version_info[1]}')
+CACHE_SUFFIX    = '.marshal'
+CACHE_FORMAT    = 1
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+_FILE_HASHES = {} # normalized path -> (mtime_ns, size, sha1)
+
+
+def _entryPath(fileHash: str) -> str:
+    return os.path.join(CACHE_DIR, f'{fileHash}{CACHE_SUFFIX}')
+
+
+def _cacheDirUsable() -> bool:
+    '''
+    The directory exists (created private) and belongs to this user
+    '''
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        return not hasattr(os, 'getuid') or os.stat(CACHE_DIR).st_uid == os.getuid()
+    except OSError:
+        return False
+
+
+def _readEntry(fileHash: str):
+    entryPath = _entryPath(fileHash)
+    try:
+        with open(entryPath, 'rb') as f:
+            entry = marshal.loads(f.read()) # much faster than marshal.load on the file object
+        cacheFormat, entryHash, data = entry
+        if cacheFormat != CACHE_FORMAT or entryHash != fileHash:
+            return None
+        os.utime(entryPath) # most recently used
+        return data
+    except Exception:
+        return None
+
+
+def _writeEntry(fileHash: str, data):
+    if not _cacheDirUsable():
+        return
+    entryPath = _entryPath(fileHash)
+    tmpPath   = f'{entryPath}.{os.getpid()}.tmp'
+    try:
+        with open(tmpPath, 'wb') as f:
+            f.write(marshal.dumps((CACHE_FORMAT, fileHash, data)))
+        os.replace(tmpPath, entryPath)
+        trim()
+    except (OSError, ValueError):
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+
+
+def load(filePath: str) -> dict:
+    '''
+    The data of an .lpk file, as json.load would return it
+    '''
+    stat = os.stat(filePath)
+    key  = os.path.normcase(os.path.abspath(filePath))
+
+    known = _FILE_HASHES.get(key)
+    if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size) and _cacheDirUsable():
+        data = _readEntry(known[2])
+        if data is not None:
+            return data
+
+    with open(filePath, 'rb') as f:
+        raw = f.read()
+    fileHash = hashlib.sha1(raw).hexdigest()
+    _FILE_HASHES[key] = (stat.st_mtime_ns, stat.st_size, fileHash)
+
+    data = _readEntry(fileHash) if _cacheDirUsable() else None
+    if data is None:
+        data = json.loads(raw.decode('utf-8'))
+        _writeEntry(fileHash, data)
+    return data
+
+
+def trim(maxBytes: int = None):
+    '''
+    Remove the least recently used entries until the cache fits in maxBytes (MAX_CACHE_BYTES)
+    '''
+    maxBytes = MAX_CACHE_BYTES if maxBytes is None else maxBytes
+    try:
+        entries = [entry for entry in os.scandir(CACHE_DIR) if entry.name.endswith(CACHE_SUFFIX)]
+    except OSError:
+        return
+
+    stats = []
+    for entry in entries:
+        try:
+            stats.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+        except OSError:
+            continue
+
+    total = sum(size for _, size, _ in stats)
+    for _, size, entryPath in sorted(stats):
+        if total <= maxBytes:
+            break
+        try:
+            os.remove(entryPath)
+            total -= size
+        except OSError:
+            continue
+
+
+def clear():
+    _FILE_HASHES.clear()
+    trim(0)
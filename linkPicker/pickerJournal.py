@@ -0,0 +1,331 @@
+'''
+Append-only journal of a picker's edits, for crash recovery
+
+The journals sit in a per-user directory (JOURNAL_DIR), never next to the picker file: a library .lpk is shared
+by several users, each one has its own journal of it, named by the hash of the file's path (file_<hash>.journal)
+Pickers without a file use picker_<pickerId>_<pid>.journal
+First line: a full snapshot (picker.get() with the whole node table, not compacted), then one line per undo stack event:
+    {'type': 'push',  'data': command.get()}   a command was pushed
+    {'type': 'merge', 'data': command.get()}   the last command was merged with a new one, this replaces it
+    {'type': 'index', 'index': int}            undo / redo
+The commands refer to nodes by node table id: an event also holds 'nodes', the names added to the table since
+the previous line, so the replayed table gives every id the node it had (the table is append-only)
+Each event only serializes the command, the snapshot is a copy of the document (PickerView.getSnapshot)
+encoded on the writer thread along with the writes
+Every COMPACT_EVERY events the journal is rewritten as a single snapshot
+The writer holds a lock on <journal>.lock while it owns a journal, a journal still locked by another
+Maya session is never offered for recovery
+The journal is removed when the picker is saved or its tab is closed, so it only survives a crash
+'''
+import os
+import json
+import queue
+import hashlib
+import threading
+
+try:
+    import maya.utils
+    import maya.api.OpenMaya as om2
+except ImportError:
+    om2 = None # outside of Maya the warnings are printed
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+JOURNAL_DIR    = os.path.join(os.path.expanduser('~'), '.linkPicker', 'journals')
+JOURNAL_SUFFIX = '.journal'
+LOCK_SUFFIX    = '.lock'
+COMPACT_EVERY  = 200
+
+
+def journalPath(cacheSavePath: str, pickerId: str) -> str:
+    if cacheSavePath:
+        pathHash = hashlib.sha1(os.path.normcase(os.path.abspath(cacheSavePath)).encode('utf-8')).hexdigest()
+        return os.path.join(JOURNAL_DIR, f'file_{pathHash}{JOURNAL_SUFFIX}')
+    # the process id keeps the journal of a crashed session apart from the same picker opened again
+    return os.path.join(JOURNAL_DIR, f'picker_{pickerId}_{os.getpid()}{JOURNAL_SUFFIX}')
+
+
+def _lock(f) -> bool:
+    '''
+    Non blocking exclusive lock of an open file, released when the file is closed
+    '''
+    try:
+        if os.name == 'nt':
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def isLocked(path: str) -> bool:
+    '''
+    The journal is being written by a running session, this one included
+    '''
+    lockPath = f'{path}{LOCK_SUFFIX}'
+    if not os.path.exists(lockPath):
+        return False
+    try:
+        with open(lockPath, 'a') as f:
+            return not _lock(f)
+    except OSError:
+        return True
+
+
+def removeJournal(path: str):
+    for filePath in (path, f'{path}{LOCK_SUFFIX}'):
+        if os.path.exists(filePath):
+            os.remove(filePath)
+
+
+def _warn(message: str):
+    if om2 is None:
+        print(message)
+        return
+    # Maya is main thread only
+    maya.utils.executeDeferred(om2.MGlobal.displayWarning, message)
+
+
+def _snapshotText(document: 'PickerDocument') -> str:
+    data = document.toData(compact=False) # the events refer to the ids of the live table
+    if data['tabName'].endswith('*'):
+        data['tabName'] = data['tabName'][:-1]
+    return json.dumps({'type': 'snapshot', 'data': data}) + '\n'
+
+
+class JournalWriter(threading.Thread):
+    '''
+    One daemon thread for all the journals, the operations of a path are applied in order
+    '''
+    def __init__(self):
+        super().__init__(name='linkPickerJournal', daemon=True)
+        self.queue  = queue.Queue()
+        self._files = {} # path -> open file, appended to
+        self._locks = {} # path -> open, locked lock file
+        self._taken = set() # paths locked by another session, their writes are skipped
+
+
+    def append(self, path: str, line: str):
+        self.queue.put(('append', path, line))
+
+
+    def snapshot(self, path: str, document: 'PickerDocument'):
+        '''
+        Replace the journal with the snapshot of the document, encoded on this thread
+        '''
+        self.queue.put(('snapshot', path, document))
+
+
+    def delete(self, path: str):
+        self.queue.put(('delete', path, None))
+
+
+    def flush(self):
+        '''
+        Wait until every queued operation is written
+        '''
+        self.queue.join()
+
+
+    def _close(self, path: str):
+        f = self._files.pop(path, None)
+        if f is not None:
+            f.close()
+
+
+    def _own(self, path: str):
+        if path in self._locks:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lockFile = open(f'{path}{LOCK_SUFFIX}', 'a')
+        if not _lock(lockFile):
+            lockFile.close()
+            self._taken.add(path)
+            raise OSError('the journal is used by another Maya session, edits of this picker are not journaled')
+        self._locks[path] = lockFile
+
+
+    def _apply(self, op: str, path: str, value):
+        if path in self._taken:
+            if op == 'delete':
+                self._taken.discard(path)
+            return
+        if op == 'append':
+            f = self._files.get(path)
+            if f is None:
+                self._own(path)
+                f = self._files[path] = open(path, 'a', encoding='utf-8')
+            f.write(value)
+        elif op == 'snapshot':
+            self._close(path)
+            self._own(path)
+            tmpPath = f'{path}.tmp'
+            with open(tmpPath, 'w', encoding='utf-8') as f:
+                f.write(_snapshotText(value))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmpPath, path)
+        elif op == 'delete':
+            self._close(path)
+            if os.path.exists(path):
+                os.remove(path)
+            lockFile = self._locks.pop(path, None)
+            if lockFile is not None:
+                lockFile.close()
+                os.remove(lockFile.name)
+
+
+    def run(self):
+        while True:
+            op, path, value = self.queue.get()
+            try:
+                self._apply(op, path, value)
+                # flush once the burst of events is written
+                if self.queue.empty():
+                    for f in self._files.values():
+                        f.flush()
+            except Exception as e:
+                _warn(f'Link Picker journal: {op} failed for {path}: {e}')
+            finally:
+                self.queue.task_done()
+
+
+_WRITER = None
+
+def getWriter() -> JournalWriter:
+    global _WRITER
+    if _WRITER is None:
+        _WRITER = JournalWriter()
+        _WRITER.start()
+    return _WRITER
+
+
+class PickerJournal(object):
+    '''
+    Journal of one picker, fed by its undo stack (UndoStack.journal)
+    Nothing is written until the first edit, which writes the snapshot
+    '''
+    def __repr__(self):
+        return f'< PickerJournal: {self.path} >'
+
+
+    def __init__(self, picker: 'PickerView'):
+        self.picker    = picker
+        self.path      = None # None: no snapshot written yet
+        self.entries   = 0
+        self.nodeTable = None # the picker's table when the snapshot was taken
+        self.tableSize = 0    # its length as of the last line written, later ids go with the next event
+        self.paused  = False
+        self.version = 0 # bumped by every undo stack event, a save checks it to know the picker changed meanwhile
+
+
+    def snapshot(self):
+        '''
+        Full state of the picker as the first and only line, replaces the current journal
+        '''
+        document = self.picker.getSnapshot(undoToFile=True)
+
+        path = journalPath(self.picker.cacheSavePath, self.picker.pickerId)
+        if self.path is not None and self.path != path:
+            getWriter().delete(self.path)
+        self.path      = path
+        self.entries   = 0
+        self.nodeTable = self.picker.nodeTable
+        self.tableSize = len(document.nodeTable)
+        getWriter().snapshot(path, document)
+
+
+    def _append(self, entry: dict):
+        if self.path is None or self.picker.nodeTable is not self.nodeTable:
+            # the snapshot already holds this edit (a replaced node table gives other ids, it needs a new snapshot too)
+            self.snapshot()
+            return
+        if len(self.nodeTable) > self.tableSize:
+            entry['nodes'] = self.nodeTable.get(self.tableSize)
+            self.tableSize = len(self.nodeTable)
+        getWriter().append(self.path, json.dumps(entry) + '\n')
+        self.entries += 1
+        if self.entries >= COMPACT_EVERY:
+            self.snapshot()
+
+
+    def pushed(self, command, merged: bool = False):
+        self.version += 1
+        if not self.paused:
+            self._append({'type': 'merge' if merged else 'push', 'data': command.get()})
+
+
+    def indexMoved(self, index: int):
+        self.version += 1
+        if not self.paused:
+            self._append({'type': 'index', 'index': index})
+
+
+    def discard(self):
+        '''
+        The picker was saved or closed, nothing to recover
+        '''
+        if self.path is not None:
+            getWriter().delete(self.path)
+        self.path    = None
+        self.entries = 0
+
+
+def readJournal(path: str) -> 'tuple[dict, list[dict]]':
+    '''
+    (snapshot data, events), a line cut by a crash ends the events
+    '''
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            break
+    if not entries or entries[0].get('type') != 'snapshot':
+        raise ValueError(f'{path} is not a picker journal')
+    return entries[0]['data'], entries[1:]
+
+
+def replay(undoStack: 'UndoStack', entries: 'list[dict]', nodeTable: 'NodeTable'):
+    '''
+    Apply the journal events on a picker set from the journal's snapshot, nodeTable is the picker's table
+    '''
+    for entry in entries:
+        nodeTable.ids(entry.get('nodes', ()))
+        typ = entry['type']
+        if typ == 'index':
+            undoStack.setIndex(entry['index'])
+            continue
+        if typ == 'merge' and undoStack.canUndo():
+            undoStack.undo()
+        undoStack.breakMerge()
+        undoStack.push(undoStack.commandFromData(entry['data']))
+
+
+def pendingJournal(filePath: str) -> str:
+    '''
+    The journal of a picker file when it is newer than the file (edits were not saved) and no running session writes it
+    '''
+    path = journalPath(filePath, None)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(filePath) and not isLocked(path):
+        return path
+    return ''
+
+
+def orphanJournals() -> 'list[str]':
+    '''
+    Journals of pickers without a file, left by a crash (the ones of running sessions are not listed)
+    '''
+    if not os.path.isdir(JOURNAL_DIR):
+        return []
+    paths = [os.path.join(JOURNAL_DIR, name) for name in os.listdir(JOURNAL_DIR)
+             if name.startswith('picker_') and name.endswith(JOURNAL_SUFFIX)]
+    return sorted(path for path in paths if not isLocked(path))
@@ -0,0 +1,357 @@
+'''
+Picker document model, the source of truth of a picker's data
+
+Plain python only (no Qt, no Maya), so it can be used and tested outside of Maya
+PickerView / PickerButton read and write it, get() / set() and the undo data are built from it
+'''
+import copy
+import json
+import uuid
+import hashlib
+
+from . import path
+
+
+class ButtonRecord(object):
+    '''
+    Data of one button, geometry in the picker's local space (unscaled)
+    '''
+    __slots__ = ('buttonId', 'x', 'y', 'scaleX', 'scaleY', 'color', 'textColor', 'labelText', 'nodeIds', 'code')
+
+    def __repr__(self):
+        return f'< ButtonRecord {self.buttonId}: {self.labelText!r} at ({self.x}, {self.y}) >'
+
+
+    def __init__(self, buttonId : str   = None,
+                       x        : float = 0.0,
+                       y        : float = 0.0,
+                       scaleX   : int   = 40,
+                       scaleY   : int   = 40,
+                       color    : tuple = (100, 100, 100),
+                       textColor: tuple = (10, 10, 10),
+                       labelText: str   = '',
+                       nodeIds  : tuple = (),
+                       code     : dict  = None):
+        self.buttonId  = buttonId or str(uuid.uuid4())
+        self.x         = float(x)
+        self.y         = float(y)
+        self.scaleX    = scaleX
+        self.scaleY    = scaleY
+        self.color     = tuple(color)
+        self.textColor = tuple(textColor)
+        self.labelText = labelText
+        self.nodeIds   = tuple(nodeIds)
+        self.code      = code
+
+
+    @property
+    def isMaxButton(self) -> bool:
+        return len(self.nodeIds) > 1
+
+
+    @property
+    def isCmdButton(self) -> bool:
+        return bool(self.code) and isinstance(self.code, dict)
+
+
+    def center(self, parentPos: tuple = (0.0, 0.0), sceneScale: float = 1.0) -> 'tuple[float, float]':
+        '''
+        Center of the button in view space, see pickerUtils.localToGlobal
+        '''
+        return (self.x * sceneScale + parentPos[0] + self.scaleX * sceneScale / 2.0,
+                self.y * sceneScale + parentPos[1] + self.scaleY * sceneScale / 2.0)
+
+
+    def copy(self) -> 'ButtonRecord':
+        '''
+        The node ids and the code dict are shared, they are replaced, never edited in place
+        '''
+        return ButtonRecord(self.buttonId, self.x, self.y, self.scaleX, self.scaleY,
+                            self.color, self.textColor, self.labelText, self.nodeIds, self.code)
+
+
+    @classmethod
+    def fromData(cls, data: dict, nodeTable: path.NodeTable) -> 'ButtonRecord':
+        return cls(buttonId  = data['buttonId'],
+                   x         = data['localPos'][0],
+                   y         = data['localPos'][1],
+                   scaleX    = data['scaleX'],
+                   scaleY    = data['scaleY'],
+                   color     = data['color'],
+                   textColor = data['textColor'],
+                   labelText = data['labelText'],
+                   nodeIds   = nodeTable.buttonNodeIds(data),
+                   code      = data.get('code'))
+
+
+    def toData(self) -> dict:
+        return {'localPos' : [self.x, self.y],
+                'color'    : list(self.color),
+                'scaleX'   : self.scaleX,
+                'scaleY'   : self.scaleY,
+                'textColor': list(self.textColor),
+                'labelText': self.labelText,
+                'nodeIds'  : list(self.nodeIds),
+                'buttonId' : self.buttonId,
+                'code'     : self.code}
+
+
+class PickerDocument(object):
+    '''
+    One picker: its settings, its node table and its button records in stacking order (bottom -> top)
+    '''
+    __slots__ = ('pickerId', 'tabName', 'namespace', 'cacheSavePath', 'sceneScale', 'buttonsParentPos',
+                 'midView', 'viewOffset', 'nodeTable', 'records', 'backgroundInfo', 'undos')
+
+    def __repr__(self):
+        return f'< PickerDocument {self.tabName!r}: {len(self.records)} buttons >'
+
+
+    def __init__(self, tabName: str = 'Null', pickerId: str = None):
+        self.pickerId         = pickerId or str(uuid.uuid4())
+        self.tabName          = tabName
+        self.namespace        = ':'
+        self.cacheSavePath    = ''
+        self.sceneScale       = 1.0
+        self.buttonsParentPos = (0.0, 0.0)
+        self.midView          = False
+        self.viewOffset       = (0.0, 0.0)
+        self.nodeTable        = path.NodeTable()
+        self.records          = {} # buttonId -> ButtonRecord
+        self.backgroundInfo   = {'imagePath': '', 'ImageWidth': 1, 'ImageHeight': 1, 'opacity': 1}
+        self.undos            = {'index': 0, 'undoDatas': []}
+
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+
+    def addRecord(self, record: ButtonRecord) -> ButtonRecord:
+        self.records[record.buttonId] = record
+        return record
+
+
+    def removeRecord(self, buttonId: str) -> ButtonRecord:
+        return self.records.pop(buttonId, None)
+
+
+    def setOrder(self, buttonIds: 'list[str]'):
+        '''
+        Stacking order, records missing from buttonIds keep their relative order on top
+        '''
+        records = {buttonId: self.records[buttonId] for buttonId in buttonIds if buttonId in self.records}
+        records.update(self.records)
+        self.records = records
+
+
+    def nodes(self, record: ButtonRecord) -> 'list[str]':
+        '''
+        Node names of a record in the picker's namespace, see PickerButton.nodes
+        '''
+        return self.nodeTable.names(record.nodeIds, ':' if self.namespace == '' else self.namespace)
+
+
+    def copy(self) -> 'PickerDocument':
+        document = PickerDocument(self.tabName)
+        for attr in ('namespace', 'cacheSavePath', 'sceneScale', 'buttonsParentPos', 'midView', 'viewOffset', 'backgroundInfo'):
+            setattr(document, attr, getattr(self, attr))
+        document.nodeTable = self.nodeTable.copy()
+        document.records   = {buttonId: record.copy() for buttonId, record in self.records.items()}
+        return document
+
+
+    def snapshot(self) -> 'PickerDocument':
+        '''
+        Copy keeping the picker id and the undo data, the data of a save is built from it off the main thread
+        Nothing mutable is shared with the live document (undo data, background, code dicts are deep copies),
+        so the main thread can keep editing while the worker encodes
+        '''
+        document = self.copy()
+        document.pickerId       = self.pickerId
+        document.undos          = copy.deepcopy(self.undos)
+        document.backgroundInfo = copy.deepcopy(self.backgroundInfo)
+        for record in document:
+            record.code = copy.deepcopy(record.code)
+        return document
+
+
+    @classmethod
+    def fromData(cls, data: dict) -> 'PickerDocument':
+        '''
+        Data of PickerView.get() / .lpk files, including the formats saved before the node table and the picker id
+        '''
+        document = cls(data.get('tabName', 'Null'), data.get('pickerId'))
+        document.namespace        = data.get('namespace', ':')
+        document.cacheSavePath    = data.get('cacheSavePath', '')
+        document.sceneScale       = data.get('sceneScale', 1.0)
+        document.buttonsParentPos = tuple(data.get('buttonsParentPos', (0.0, 0.0)))
+        document.midView          = data.get('midView', False)
+        document.viewOffset       = tuple(data.get('viewOffset', (0.0, 0.0)))
+        document.nodeTable        = path.NodeTable(data.get('nodeTable', []))
+        document.backgroundInfo   = data.get('backgroundInfo', document.backgroundInfo)
+        document.undos            = data.get('undos', document.undos)
+        for buttonData in data.get('buttons', []):
+            document.addRecord(ButtonRecord.fromData(buttonData, document.nodeTable))
+        return document
+
+
+    def toData(self, compact: bool = True) -> dict:
+        '''
+        compact: only write the node table entries still in use (ids remapped),
+                 False keeps the live table's ids, e.g. for a journal whose events refer to them
+        '''
+        data = {'tabName'         : self.tabName,
+                'origSceneScale'  : self.sceneScale,
+                'sceneScale'      : self.sceneScale,
+                'buttonsParentPos': list(self.buttonsParentPos),
+                'midView'         : self.midView,
+                'viewOffset'      : list(self.viewOffset),
+                'namespace'       : self.namespace,
+                'cacheSavePath'   : self.cacheSavePath,
+                'pickerId'        : self.pickerId}
+
+        # only the nodes still used by a button or the undo data are written, with their ids remapped
+        undos            = self.undos
+        nodeTable, remap = self.nodeTable, None
+        if compact:
+            usedIds = {nodeId for record in self.records.values() for nodeId in record.nodeIds}
+            collectNodeIds(self.undos, usedIds)
+            if len(usedIds) != len(self.nodeTable):
+                nodeTable, remap = self.nodeTable.compact(usedIds)
+                undos = remapNodeIds(undos, remap)
+        data['nodeTable'] = nodeTable.get()
+
+        buttonsData = []
+        for record in self.records.values():
+            buttonData = record.toData()
+            if remap is not None:
+                buttonData['nodeIds'] = [remap[nodeId] for nodeId in record.nodeIds]
+            # globalPos is the button's center in view space, only used to place the button before its localPos is restored
+            buttonData['globalPos'] = list(record.center(self.buttonsParentPos, self.sceneScale))
+            buttonsData.append(buttonData)
+        data['buttons']        = buttonsData
+        data['undos']          = undos
+        data['backgroundInfo'] = self.backgroundInfo
+        return data
+
+
+# node ids in the undo data -----------------------------------------------------------
+NODE_ID_KEYS = ('nodeIds', 'buttonNodeIds', 'newNodeIds') # keys of the command data holding node table ids
+
+def collectNodeIds(value, nodeIds: set):
+    '''
+    Add the node table ids found in value (undo data, any nesting) to nodeIds
+    '''
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in NODE_ID_KEYS and isinstance(item, (list, tuple)):
+                nodeIds.update(item)
+            else:
+                collectNodeIds(item, nodeIds)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            collectNodeIds(item, nodeIds)
+
+
+def remapNodeIds(value, remap: 'dict[int, int]'):
+    '''
+    Copy of value with its node table ids replaced through remap, the other values are shared
+    '''
+    if isinstance(value, dict):
+        return {key: [remap[nodeId] for nodeId in item] if key in NODE_ID_KEYS and isinstance(item, (list, tuple))
+                     else remapNodeIds(item, remap)
+                for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [remapNodeIds(item, remap) for item in value]
+    return value
+
+
+# scene storage ------------------------------------------------------------------------
+TEMPLATE_KEYS = ('nodeTable', 'buttons', 'backgroundInfo')
+
+def templateHash(template: dict) -> str:
+    return hashlib.sha1(json.dumps(template, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def pickerTemplate(data: dict) -> dict:
+    '''
+    The shared part of a picker's data (TEMPLATE_KEYS), without the view dependent globalPos of the buttons
+    '''
+    template = {key: data[key] for key in TEMPLATE_KEYS if key in data}
+    template['buttons'] = [{key: value for key, value in buttonData.items() if key != 'globalPos'}
+                           for buttonData in data.get('buttons', [])]
+    return template
+
+
+def _isDuplicate(data: dict, templateId: str, seen: set) -> bool:
+    '''
+    A picker duplicates an earlier one with the same stable id in the same namespace, whatever its view, undo or edits:
+    a referenced copy merged again after a pan or a zoom is still the same picker
+    The same rig referenced twice (two namespaces) shares the pickerId, both are kept
+    Data saved without a pickerId gets a new one on every load, its template hash is the id
+    '''
+    namespace = data.get('namespace') or ':'
+    key       = ('id', data['pickerId'], namespace) if data.get('pickerId') else ('template', templateId, namespace)
+    if key in seen:
+        return True
+    seen.add(key)
+    return False
+
+
+def dedupePickers(datas: 'list[dict]') -> 'list[dict]':
+    '''
+    The datas without the duplicates, the first one wins (the open tabs come before the referenced data)
+    '''
+    seen = set()
+    return [data for data in datas if not _isDuplicate(data, templateHash(pickerTemplate(data)), seen)]
+
+
+def packPickers(datas: 'list[dict]') -> dict:
+    '''
+    Picker datas as {'version': 2, 'templates': {hash: template}, 'pickers': [instance]}
+    The template is what the copies of a referenced picker share (node table, buttons, background), stored once per content hash,
+    the instance keeps the rest (pickerId, namespace, tab name, view state, undo) and the hash of its template
+    globalPos is dropped, it depends on the view and is not needed to set a picker
+    Duplicated pickers are dropped, see dedupePickers
+    '''
+    templates = {}
+    instances = []
+    seen      = set()
+    for data in datas:
+        template   = pickerTemplate(data)
+        templateId = templateHash(template)
+        if _isDuplicate(data, templateId, seen):
+            continue
+        templates.setdefault(templateId, template)
+
+        instance = {key: value for key, value in data.items() if key not in TEMPLATE_KEYS}
+        instance['template'] = templateId
+        instances.append(instance)
+    return {'version': 2, 'templates': templates, 'pickers': instances}
+
+
+def unpackPickers(stored) -> 'list[dict]':
+    '''
+    Picker datas of packPickers, the instances of a template share its (parsed once) button list
+    Data saved before the templates is a plain list, only its duplicates are dropped
+    '''
+    if isinstance(stored, list):
+        return dedupePickers(stored)
+    if not isinstance(stored, dict) or 'pickers' not in stored:
+        raise TypeError(f'Expected picker data, but got {type(stored).__name__}')
+
+    templates = stored.get('templates', {})
+    datas     = []
+    for instance in stored['pickers']:
+        template = templates.get(instance.get('template'))
+        if template is None:
+            raise ValueError(f"Picker {instance.get('tabName')!r} has no template {instance.get('template')}")
+        data = dict(template)
+        data.update(instance)
+        del data['template']
+        datas.append(data)
+    return datas
@@ -57,6 +57,41 @@ class ButtonManager(object):
         return button
         
         
+    def createBatch(self, buttonsInfo     : 'list[dict]', 
+                          buttonsParentPos: QtCore.QPointF, 
+                          sceneScale      : float,
+                          parent          : 'PickerView' = None) -> 'list[pickerButton.PickerButton]':
+        '''
+        Build many buttons in one pass, the buttons are not shown, the caller shows the whole batch at once
+        buttonsInfo: [{'globalPos': QPointF, 'nodes': list (or 'nodeIds': list), 'data': dict, 'buttonId': str, 'code': dict, 'record': ButtonRecord}, ...]
+        '''
+        toolBoxInfo = None
+        buttons     = []
+        for info in buttonsInfo:
+            data = info.get('data')
+            if data is None:
+                # the toolbox is only read once per batch
+                toolBoxInfo = toolBoxInfo or self.getToolBoxInfo()
+                data = toolBoxInfo
+            buttonId = info.get('buttonId')
+            button = pickerButton.PickerButton(globalPos   = info['globalPos'], 
+                                               parentPos   = buttonsParentPos,
+                                               color       = data['color'],
+                                               sceneScale  = sceneScale,
+                                               scaleX      = data['scaleX'], 
+                                               scaleY      = data['scaleY'],
+                                               textColor   = data['textColor'],
+                                               labelText   = data['labelText'],
+                                               parent      = parent,
+                                               nodes       = info.get('nodes'),
+                                               buttonId    = str(uuid.uuid4()) if buttonId is None else buttonId,
+                                               code        = info.get('code'),
+                                               nodeIds     = info.get('nodeIds'),
+                                               record      = info.get('record'))
+            buttons.append(button)
+        return buttons
+        
+        
     def updateToolBoxWidget(self, selectedButton):
         if self.toolBoxWidget is None:
             return
@@ -0,0 +1,142 @@
+'''
+Compiled code of the command buttons
+
+Python code is compiled once, when a button gets its code (load, create, edit), and cached by the sha1 of the source,
+so buttons sharing the same code share one code object and a click only runs it
+Syntax errors are reported when the code is compiled, not at click time
+Every run is timed per button, see getTimings / slowestButtons
+'''
+import time
+import hashlib
+import functools
+import traceback
+import __main__
+
+import maya.cmds as cmds
+import maya.mel as mel
+import maya.api.OpenMaya as om2
+
+
+class CompiledCode(object):
+    __slots__ = ('key', 'codeObject', 'error')
+
+    def __init__(self, key: str, codeObject: 'types.CodeType' = None, error: str = ''):
+        self.key        = key
+        self.codeObject = codeObject
+        self.error      = error
+
+
+class CommandTiming(object):
+    __slots__ = ('name', 'count', 'total', 'last', 'max')
+
+    def __repr__(self):
+        return f'< CommandTiming {self.name!r}: {self.count} runs, mean {self.mean * 1000:.2f} ms, max {self.max * 1000:.2f} ms >'
+
+
+    def __init__(self, name: str = ''):
+        self.name  = name
+        self.count = 0
+        self.total = 0.0
+        self.last  = 0.0
+        self.max   = 0.0
+
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.last   = seconds
+        self.max    = max(self.max, seconds)
+
+
+_COMPILED_CACHE = {} # sha1 of the source -> CompiledCode
+_TIMINGS        = {} # buttonId -> CommandTiming
+
+
+def codeKey(source: str) -> str:
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+def compileCode(codeData: dict) -> CompiledCode:
+    '''
+    Compile the python code of a command button, None for mel
+    A syntax error is shown once per source, the same code is never compiled twice
+    '''
+    if not codeData or codeData.get('type') != 'Python':
+        return None
+
+    source = codeData.get('code', '')
+    key    = codeKey(source)
+    compiled = _COMPILED_CACHE.get(key)
+    if compiled is not None:
+        return compiled
+
+    try:
+        compiled = CompiledCode(key, compile(source, f'<LinkPicker command: {codeData.get("name", "")}>', 'exec'))
+    except (SyntaxError, ValueError) as e:
+        compiled = CompiledCode(key, error=f'{type(e).__name__}: {e}')
+        om2.MGlobal.displayWarning(f'LinkPicker command button {codeData.get("name", "")!r} has an error: {compiled.error}')
+    _COMPILED_CACHE[key] = compiled
+    return compiled
+
+
+def clearCache():
+    _COMPILED_CACHE.clear()
+
+
+def _timing(buttonId: str, name: str) -> CommandTiming:
+    timing = _TIMINGS.get(buttonId)
+    if timing is None:
+        timing = _TIMINGS[buttonId] = CommandTiming(name)
+    timing.name = name
+    return timing
+
+
+def _runPython(compiled: CompiledCode, buttonId: str, name: str):
+    startTime = time.perf_counter()
+    try:
+        # same globals as the code strings run by evalDeferred
+        exec(compiled.codeObject, __main__.__dict__)
+    except Exception:
+        om2.MGlobal.displayError(f'An error occurred while executing the code:\n{traceback.format_exc()}')
+    finally:
+        _timing(buttonId, name).add(time.perf_counter() - startTime)
+
+
+def execute(codeData: dict, buttonId: str = ''):
+    '''
+    Run the code of a command button: python is deferred like before, from its cached code object, mel runs at once
+    '''
+    name = codeData.get('name', '')
+    if codeData['type'] != 'Python':
+        startTime = time.perf_counter()
+        try:
+            mel.eval(codeData['code'])
+        finally:
+            _timing(buttonId, name).add(time.perf_counter() - startTime)
+        return
+
+    compiled = compileCode(codeData)
+    if compiled.error:
+        om2.MGlobal.displayError(f'LinkPicker command button {name!r} was not run: {compiled.error}')
+        return
+    cmds.evalDeferred(functools.partial(_runPython, compiled, buttonId, name))
+
+
+def getTimings() -> 'dict[str, CommandTiming]':
+    return dict(_TIMINGS)
+
+
+def slowestButtons(count: int = 10) -> 'list[tuple[str, CommandTiming]]':
+    '''
+    [(buttonId, timing), ...] sorted by mean run time, slowest first
+    '''
+    return sorted(_TIMINGS.items(), key=lambda item: item[1].mean, reverse=True)[:count]
+
+
+def clearTimings():
+    _TIMINGS.clear()
@@ -1,10 +1,13 @@
 import maya.cmds as cmds
+import maya.api.OpenMaya as om2
 
 if int(cmds.about(version=True)) >= 2025:
     from PySide6 import QtCore
 else:
     from PySide2 import QtCore
 
+from .. import path
+from ..mirrorRules import MirrorRules, getMirrorRules, clearRules
 from . import pickerUtils
 
 
@@ -23,24 +26,113 @@ def reversePosition(selectedButtons : 'list[PickerButton]',
         button.updateLocalPos(globalTopLeftPos, buttonsParentPos, sceneScale)
         
 
+# ---------------------------------------------------------------------------
+class MirrorMapper(object):
+    '''
+    Left/right pairs of a single namespace
+    The existing names come from one scene query, every mirrored name is cached until the scene changes
+    '''
+    def __init__(self, namespace: str, rules: MirrorRules):
+        self.namespace = namespace
+        self.rules     = rules
+        self.pairs     = {}
+        self.existing  = set()
+        
+        for longName in cmds.ls(f'{namespace}:*' if namespace else '*', long=True) or []:
+            self.existing.add(longName)
+            # DAG nodes can also be named by any partial path, e.g. 'grp|L_arm' or 'L_arm'
+            if '|' in longName:
+                parts = longName.lstrip('|').split('|')
+                for index in range(len(parts)):
+                    self.existing.add('|'.join(parts[index:]))
+                    
+                    
+    def exists(self, name: str) -> bool:
+        return name in self.existing
+        
+        
+    def mirrorName(self, name: str) -> str:
+        mirrorName = self.pairs.get(name)
+        if mirrorName is None:
+            newName    = self.rules.mirrorName(name)
+            mirrorName = self.pairs[name] = newName if newName != name and self.exists(newName) else name
+        return mirrorName
+        
+        
+    def mirrorNames(self, names: 'list[str]') -> 'list[str]':
+        return [self.mirrorName(name) for name in names]
+        
+        
+_MIRROR_MAPPERS = {}
+_CALLBACK_IDS   = []
+
+
+def getMirrorMapper(namespace: str) -> MirrorMapper:
+    '''
+    Mappers are only kept while the scene callbacks are installed, otherwise nothing would tell them the scene has changed
+    '''
+    mapper = _MIRROR_MAPPERS.get(namespace)
+    if mapper is None:
+        mapper = MirrorMapper(namespace, getMirrorRules())
+        if _CALLBACK_IDS:
+            _MIRROR_MAPPERS[namespace] = mapper
+    return mapper
+    
+    
+def clearCache(*args):
+    clearRules()
+    _MIRROR_MAPPERS.clear()
+    
+    
+def _clearMappers(*args):
+    _MIRROR_MAPPERS.clear()
+    
+    
+def addCacheCallbacks() -> 'list[int]':
+    '''
+    Any node added, removed or renamed invalidates the cached pairs
+    The ids are returned so the owner can remove them with om2.MMessage.removeCallback
+    '''
+    _CALLBACK_IDS[:] = [om2.MDGMessage.addNodeAddedCallback(_clearMappers, 'dependNode'),
+                        om2.MDGMessage.addNodeRemovedCallback(_clearMappers, 'dependNode'),
+                        om2.MNodeMessage.addNameChangedCallback(om2.MObject(), _clearMappers)]
+    return list(_CALLBACK_IDS)
+    
+    
+def removeCacheCallbacks():
+    _CALLBACK_IDS.clear()
+    clearCache()
+    
+    
+# ---------------------------------------------------------------------------
 def findMirrorObjName(origName: str) -> str:
-    leftMarkers  = ['L_', '_L', 'left', 'Left', 'lt_', '_lt']
-    rightMarkers = ['R_', '_R', 'right', 'Right', 'rt_', '_rt']
-    
-    newName = None
-    for left, right in zip(leftMarkers, rightMarkers):
-        if left in origName:
-            newName = origName.replace(left, right)
-            break
-        elif right in origName:
-            newName = origName.replace(right, left)
-            break
-            
-    return newName if newName and cmds.objExists(newName) else origName
+    return getMirrorMapper(path.namespace(origName)).mirrorName(origName)
         
   
 def getMirrorObjs(nodeList: 'list[MayaNodeName]') -> 'list[MayaNodeName]':
-    return [findMirrorObjName(node) for node in nodeList]
+    mappers = {}
+    mirrorNodes = []
+    for node in nodeList:
+        namespace = path.namespace(node)
+        mapper = mappers.get(namespace)
+        if mapper is None:
+            mapper = mappers[namespace] = getMirrorMapper(namespace)
+        mirrorNodes.append(mapper.mirrorName(node))
+    return mirrorNodes
     
-
-
+    
+def getButtonsMirrorObjs(buttons: 'list[PickerButton]') -> 'dict[PickerButton, list[MayaNodeName]]':
+    '''
+    Max buttons share their nodes with the single buttons, every node is only mirrored once
+    '''
+    allNodes = list(dict.fromkeys(node for button in buttons for node in button.nodes))
+    pairs    = dict(zip(allNodes, getMirrorObjs(allNodes)))
+    return {button: [pairs[node] for node in button.nodes] for button in buttons}
+    
+    
+def getPickerMirrorObjs(pickerView: 'PickerView') -> 'dict[PickerButton, list[MayaNodeName]]':
+    return getButtonsMirrorObjs(list(pickerView.allPickerButtons))
+    
+    
+def getPickersMirrorObjs(pickerViews: 'list[PickerView]') -> 'dict[PickerButton, list[MayaNodeName]]':
+    return getButtonsMirrorObjs([button for pickerView in pickerViews for button in pickerView.allPickerButtons])
@@ -1,15 +1,14 @@
 import enum
 import uuid
 import maya.cmds as cmds
-import maya.mel as mel
 
 if int(cmds.about(version=True)) >= 2025:
     from PySide6 import QtWidgets, QtCore, QtGui
 else:
     from PySide2 import QtWidgets, QtCore, QtGui
 
-from .. import path, qtUtils
-from . import pickerUtils
+from .. import path, qtUtils, pickerModel
+from . import pickerUtils, commandCache
 
 
 class PickerButtonEnum(enum.Enum):
@@ -72,7 +71,9 @@ class PickerButton(QtWidgets.QWidget):
                        parent      : QtWidgets.QWidget = None,
                        nodes       : list = None,
                        buttonId    : str = None,
-                       code        : dict = None):  
+                       code        : dict = None,
+                       nodeIds     : list = None,
+                       record      : 'pickerModel.ButtonRecord' = None):  
         '''
         Args:
             globalPos (QPointF): Initial global position of the button when created.
@@ -86,8 +87,13 @@ class PickerButton(QtWidgets.QWidget):
             parent (QWidget)   : Parent widget.
             nodes (str)        : Maya node names
             buttonId (int)     : uuid
+            nodeIds (list)     : ids in the picker's node table, used instead of nodes when given
+            record (ButtonRecord): document record backing the button, a new one is made when not given
         '''
         super().__init__(parent)
+        self.record = record if record is not None else pickerModel.ButtonRecord(buttonId)
+        self.toolTipDirty     = False
+        self.toolTipNamespace = None
 
         self.scaleX     = scaleX
         self.scaleY     = scaleY
@@ -124,7 +130,7 @@ class PickerButton(QtWidgets.QWidget):
         self.buttonId = buttonId
         self.picker = parent
         
-        self.updateButton(nodes)
+        self.updateNodeIds(nodeIds) if nodeIds is not None else self.updateButton(nodes)
         
         self.buttonEnum = PickerButtonEnum.NONE
         '''
@@ -138,6 +144,92 @@ class PickerButton(QtWidgets.QWidget):
         self.buttonColor = PickerButton.STATE_COLOR if self.maxState else self.color
         self.update()'''
     
+    # record ---------------------------------------------------------------------------
+    '''
+    The button's data lives in its pickerModel.ButtonRecord, these properties only convert to / from Qt types
+    '''
+    @property
+    def buttonId(self) -> str:
+        return self.record.buttonId
+        
+    @buttonId.setter
+    def buttonId(self, buttonId: str):
+        self.record.buttonId = buttonId
+        
+        
+    @property
+    def localPos(self) -> QtCore.QPointF:
+        return QtCore.QPointF(self.record.x, self.record.y)
+        
+    @localPos.setter
+    def localPos(self, localPos: QtCore.QPointF):
+        self.record.x, self.record.y = localPos.x(), localPos.y()
+        
+        
+    @property
+    def scaleX(self) -> int:
+        return self.record.scaleX
+        
+    @scaleX.setter
+    def scaleX(self, scaleX: int):
+        self.record.scaleX = scaleX
+        
+        
+    @property
+    def scaleY(self) -> int:
+        return self.record.scaleY
+        
+    @scaleY.setter
+    def scaleY(self, scaleY: int):
+        self.record.scaleY = scaleY
+        
+        
+    @property
+    def color(self) -> QtGui.QColor:
+        return QtGui.QColor(*self.record.color)
+        
+    @color.setter
+    def color(self, color: QtGui.QColor):
+        self.record.color = (color.red(), color.green(), color.blue())
+        
+        
+    @property
+    def textColor(self) -> QtGui.QColor:
+        return QtGui.QColor(*self.record.textColor)
+        
+    @textColor.setter
+    def textColor(self, color: QtGui.QColor):
+        self.record.textColor = (color.red(), color.green(), color.blue())
+        
+        
+    @property
+    def labelText(self) -> str:
+        return self.record.labelText
+        
+    @labelText.setter
+    def labelText(self, labelText: str):
+        self.record.labelText = labelText
+        
+        
+    @property
+    def code(self) -> dict:
+        return self.record.code
+        
+    @code.setter
+    def code(self, code: dict):
+        self.record.code = code
+        commandCache.compileCode(code) # syntax errors are shown on load / edit, clicks reuse the compiled code
+        
+        
+    @property
+    def nodeIds(self) -> 'tuple[int]':
+        return self.record.nodeIds
+        
+    @nodeIds.setter
+    def nodeIds(self, nodeIds: 'tuple[int]'):
+        self.record.nodeIds = tuple(nodeIds)
+        
+    # ----------------------------------------------------------------------------------
     @property    
     def isCmdButton(self) -> bool:
         return self.code and isinstance(self.code, dict)
@@ -150,32 +242,83 @@ class PickerButton(QtWidgets.QWidget):
            
 
     def _setToolTop(self):
+        '''
+        The tooltip text is only built when Qt asks for it (see event), 
+        so creating or renaming thousands of buttons never joins their node lists up front
+        '''
+        self.toolTipDirty = True
+        
+        
+    def _buildToolTip(self):
         if self.isCmdButton:
             self.setToolTip(self.code['code'] or 'Null')
         else:
             tooltipText = '<br>'.join(f'-> {node}' for node in self.nodes)
             self.setToolTip(tooltipText)
+        self.toolTipDirty     = False
+        self.toolTipNamespace = self.namespace
+        
+        
+    def event(self, event):
+        if event.type() == QtCore.QEvent.ToolTip and (self.toolTipDirty or self.toolTipNamespace != self.namespace):
+            self._buildToolTip()
+        return super().event(event)
         
         
     def updateButton(self, nodes, oldNodes=None):
         '''
         Usually, updating a button only requires passing the nodes parameter
         The lodNodes parameter is only used in conjunction with undo functionality and is not mandatory
+        
+        The button only keeps its base paths (oldNodes), nodes are derived from them and the picker's namespace
         '''
-        self.oldNodes    = oldNodes or nodes
-        self.nodes       = nodes
-        self.isCircle    = len(nodes) > 1
+        self.updateNodeIds(self.picker.nodeTable.ids(oldNodes or nodes))
+        
+        
+    def updateNodeIds(self, nodeIds: 'list[int]'):
+        self.nodeIds     = tuple(nodeIds)
+        self._nodesCache = None
+        self.isCircle    = len(self.nodeIds) > 1
         self.isMaxButton = self.isCircle 
         self._setToolTop()
+        if self.picker is not None:
+            self.picker.invalidateSelectionSync()
         
         
-    def updateNamespace(self, namespace: str):
-            
-        self.nodes = self.oldNodes if namespace == ':' else path.updateNamespaceWithOptional(self.nodes, namespace) 
-        # clear namespace and update oldNodes
-        if namespace == '':
-            self.oldNodes = self.nodes
-        self._setToolTop()
+    @property
+    def nodePaths(self) -> 'list[path.NodePath]':
+        nodeTable = self.picker.nodeTable
+        return [nodeTable[nodeId] for nodeId in self.nodeIds]
+        
+        
+    @property
+    def namespace(self) -> str:
+        return self.picker.namespace if self.picker is not None else ':'
+        
+        
+    @property
+    def oldNodes(self) -> 'list[str]':
+        return [nodePath.fullName for nodePath in self.nodePaths]
+        
+        
+    @property
+    def nodes(self) -> 'list[str]':
+        '''
+        ':' shows the original names. '' shows them as well, since clearing the namespace rebases the buttons (see clearNamespace)
+        The names are cached per namespace, so switching the picker's namespace does no work until the nodes are needed
+        '''
+        namespace = self.namespace
+        if self._nodesCache is None or self._nodesCache[0] != namespace:
+            nodes = self.picker.nodeTable.names(self.nodeIds, ':' if namespace == '' else namespace)
+            self._nodesCache = (namespace, nodes)
+        return self._nodesCache[1]
+        
+        
+    def clearNamespace(self):
+        '''
+        Strip the namespace from the base paths, they become the button's new original names
+        '''
+        self.updateButton([nodePath.name('') for nodePath in self.nodePaths])
 
 
     def _createWidgets(self):
@@ -193,9 +336,9 @@ class PickerButton(QtWidgets.QWidget):
         self.labelText = text
         self.scaleText(sceneScale)
         
-        # update code data
+        # update code data, the dict may be shared with saved or cached data so it is replaced, not edited
         if self.isCmdButton:
-            self.code['name'] = text
+            self.code = dict(self.code, name=text)
         
     def scaleText(self, sceneScale: float):
         font = QtGui.QFont('Verdana', round(self.scaleY * sceneScale * 0.15))
@@ -341,7 +484,7 @@ class PickerButton(QtWidgets.QWidget):
             self.buttonEnum = PickerButtonEnum.NONE
             self.clickeMove(-1)  
             if self.rect().contains(qtUtils.getLocalPos(event).toPoint()):
-                cmds.evalDeferred(self.code['code']) if self.code['type'] == 'Python' else mel.eval(self.code['code'])
+                commandCache.execute(self.code, self.buttonId)
    
         super().mouseReleaseEvent(event)
 
@@ -1,3 +1,4 @@
+import uuid
 import maya.cmds as cmds
 import maya.api.OpenMaya as om2
 import enum
@@ -9,7 +10,7 @@ if int(cmds.about(version=True)) >= 2025:
 else:
     from PySide2 import QtWidgets, QtCore, QtGui
 
-from .. import widgets, qtUtils
+from .. import widgets, qtUtils, path, pickerModel, pickerJournal
 
 from . import (
     pickerButton, pickerMenu, pickerUtils, pickerStates,  
@@ -57,7 +58,9 @@ class PickerView(QtWidgets.QWidget):
                        midView       = False,
                        ZoomDrag      = 25,
                        undoQueue     = 20,
-                       enableUndo    = True):
+                       enableUndo    = True,
+                       undoMemory    = 0,
+                       undoSpill     = False):
                         
         super().__init__(parent)
         self.setFocusPolicy(QtCore.Qt.StrongFocus)
@@ -72,6 +75,8 @@ class PickerView(QtWidgets.QWidget):
         self.ZoomDrag   = ZoomDrag
         self.undoQueue  = undoQueue
         self.enableUndo = enableUndo
+        self.undoMemory = undoMemory # MB, 0: no limit
+        self.undoSpill  = undoSpill
         
         
         self.viewOffset = QtCore.QPointF(0, 0) 
@@ -115,7 +120,7 @@ class PickerView(QtWidgets.QWidget):
         self.endtPos          = QtCore.QPoint() # selectionBox end pos
         self.selectionBoxRect = QtCore.QRect()  # selectionBox Rect
         
-        self.allPickerButtons    = []
+        self.allPickerButtons    = zorder.ButtonsZOrder() # stacking order, bottom -> top
         self.nonMaxPickerButtons = []
         self.MaxPickerButtons    = []
         
@@ -130,12 +135,24 @@ class PickerView(QtWidgets.QWidget):
         # mirror buttons
         self.mirrorCacheButtons = {}
 
-        self.namespace = ':'
-        self.cacheSavePath = ''
+        '''
+        The document holds the picker's data (pickerId, namespace, node table, button records), see pickerModel
+        The pickerId matches the tab to its saved data (MainUI.updateOpenScene), 
+        the node table maps node paths <-> ids for the buttons and the undo data
+        '''
+        self.document = pickerModel.PickerDocument()
+        self.referenceNode = '' # reference the picker was loaded from, see MainUI.referenceLoaded
         self.mainUI = parent
         
         self.allPickerButtonsIdMap = {}    
-        self.undoStack = undo.PickerViewUndoStackBase(self, self.enableUndo, self.undoQueue)    
+        
+        # Maya selection last applied to the buttons, None forces a full pass (see syncSelection)
+        self._selectionIndex           = None
+        self.syncedSelectedNodes       = None
+        self.syncedSelectionGeneration = -1
+        self.undoStack = undo.PickerViewUndoStackBase(self, self.enableUndo, self.undoQueue, self.undoMemory * 1024 * 1024, self.undoSpill)
+        self.journal   = pickerJournal.PickerJournal(self) # crash recovery, see pickerJournal
+        self.undoStack.journal = self.journal
         #self.undoStack = QtWidgets.QUndoStack()
         self.undoCacheButtons = {}
         self.newNodes = [] # maya nodes by menu
@@ -146,13 +163,14 @@ class PickerView(QtWidgets.QWidget):
         self.keyPressed  = False
     
     
-    def setUndoMode(self, enableUndo, undoQueue):
+    def setUndoMode(self, enableUndo, undoQueue, undoMemory=0, undoSpill=False):
         self.undoStack.enableUndo = enableUndo
         if not enableUndo:
             self.undoStack.clear()
             return
         
         self.undoStack.setUndoLimit(undoQueue)
+        self.undoStack.setByteBudget(undoMemory * 1024 * 1024, undoSpill)
     
 
     def __getitem__(self, attr):
@@ -309,6 +327,8 @@ class PickerView(QtWidgets.QWidget):
             self.nonMaxPickerButtons.remove(button)
         if button.buttonId in self.allPickerButtonsIdMap:
             del self.allPickerButtonsIdMap[button.buttonId]
+        self.document.removeRecord(button.buttonId)
+        self.invalidateSelectionSync()
     
     @signalEmitter
     def _deleteSelectedButton(self):
@@ -348,7 +368,113 @@ class PickerView(QtWidgets.QWidget):
         for button in self.selectedButtons:
             button.setSelected(False)
         self.selectedButtons.clear()  
+        
+    # selection sync ---------------------------------------------------------------
+    def invalidateSelectionSync(self):
+        '''
+        Buttons or their nodes changed, the node index is rebuilt and the next sync is a full pass
+        '''
+        self._selectionIndex     = None
+        self.syncedSelectedNodes = None
+        
+        
+    def _getSelectionIndex(self) -> tuple:
+        '''
+        (namespace, {node: [buttons]}, {tuple(button.nodes)}), built lazily for the current namespace
+        '''
+        if self._selectionIndex is not None and self._selectionIndex[0] != self.namespace:
+            self.invalidateSelectionSync()
+            
+        if self._selectionIndex is None:
+            nodeButtons = {}
+            for button in self.allPickerButtons:
+                for node in button.nodes:
+                    nodeButtons.setdefault(node, []).append(button)
+            self._selectionIndex = (self.namespace, nodeButtons, {tuple(button.nodes) for button in self.allPickerButtons})
+        return self._selectionIndex
+        
+        
+    def getButtonsNodeKeys(self) -> 'set[tuple]':
+        return self._getSelectionIndex()[2]
+        
+        
+    def getSelectableButtons(self, candidateNodes: 'set[str]', selectedNodes: 'set[str]') -> 'list[PickerButton]':
+        '''
+        Buttons using any of candidateNodes whose nodes are all selected, in z-order
+        '''
+        nodeButtons = self._getSelectionIndex()[1]
+        buttons = set()
+        for node in candidateNodes:
+            for button in nodeButtons.get(node, ()):
+                if button not in buttons and all(buttonNode in selectedNodes for buttonNode in button.nodes):
+                    buttons.add(button)
+        return sorted(buttons, key=self.allPickerButtons.rank)
+        
+        
+    def syncSelection(self, selectedNodes: frozenset, generation: int):
+        '''
+        Highlight the buttons of Maya's selection, only the nodes changed since the last synced generation are visited
+        '''
+        if self.syncedSelectionGeneration == generation and self.syncedSelectedNodes is not None:
+            return
+        nodeButtons = self._getSelectionIndex()[1]
+        
+        if self.syncedSelectedNodes is None:
+            self.clearSelectedButtons()
+            addedNodes = selectedNodes
+        else:
+            for node in self.syncedSelectedNodes - selectedNodes:
+                for button in nodeButtons.get(node, ()):
+                    if button.selected:
+                        button.setSelected(False)
+                    if button in self.selectedButtons:
+                        self.selectedButtons.remove(button)
+            addedNodes = selectedNodes - self.syncedSelectedNodes
+            
+        for button in self.getSelectableButtons(addedNodes, selectedNodes):
+            button.setSelected(True)
+            if button not in self.selectedButtons:
+                self.selectedButtons.append(button)
+                
+        self.syncedSelectedNodes       = selectedNodes
+        self.syncedSelectionGeneration = generation
     
+    # document ---------------------------------------------------------
+    @property
+    def pickerId(self) -> str:
+        return self.document.pickerId
+        
+    @pickerId.setter
+    def pickerId(self, pickerId: str):
+        self.document.pickerId = pickerId
+        
+        
+    @property
+    def namespace(self) -> str:
+        return self.document.namespace
+        
+    @namespace.setter
+    def namespace(self, namespace: str):
+        self.document.namespace = namespace
+        
+        
+    @property
+    def cacheSavePath(self) -> str:
+        return self.document.cacheSavePath
+        
+    @cacheSavePath.setter
+    def cacheSavePath(self, cacheSavePath: str):
+        self.document.cacheSavePath = cacheSavePath
+        
+        
+    @property
+    def nodeTable(self) -> path.NodeTable:
+        return self.document.nodeTable
+        
+    @nodeTable.setter
+    def nodeTable(self, nodeTable: path.NodeTable):
+        self.document.nodeTable = nodeTable
+        
     # ------------------------------------------------------------------
     @property
     def isActiveTab(self) -> bool:
@@ -449,6 +575,32 @@ class PickerView(QtWidgets.QWidget):
                                            buttonId = buttonId,
                                            code = code)
         button.show()
+        self._registerButton(button)
+        return button
+        
+        
+    def createButtons(self, buttonsInfo: 'list[dict]') -> 'list[pickerButton.PickerButton]':
+        '''
+        Bulk version of createButton used by load, undo and multi-create
+        Repaints are suspended while the batch is built and registered, so the picker is only repainted once
+        buttonsInfo: [{'nodes': list (or 'nodeIds': list), 'data': dict, 'buttonId': str, 'code': dict, 'globalPos': QPointF}, ...]
+        '''
+        for info in buttonsInfo:
+            info.setdefault('globalPos', self.buttonGlobalPos)
+            
+        updatesEnabled = self.updatesEnabled()
+        self.setUpdatesEnabled(False)
+        try:
+            buttons = self.buttonManager.createBatch(buttonsInfo, self.buttonsParentPos, self.sceneScale, self)
+            for button in buttons:
+                self._registerButton(button)
+                button.show()
+        finally:
+            self.setUpdatesEnabled(updatesEnabled)
+        return buttons
+        
+        
+    def _registerButton(self, button):
         # to cache list
         if button.isMaxButton:
             self.MaxPickerButtons.append(button)
@@ -456,7 +608,8 @@ class PickerView(QtWidgets.QWidget):
             self.nonMaxPickerButtons.append(button)
         self.allPickerButtons.append(button)
         self.allPickerButtonsIdMap[button.buttonId] = button
-        return button
+        self.document.addRecord(button.record)
+        self.invalidateSelectionSync()
 
     @signalEmitter
     def createSingleButton(self): 
@@ -470,7 +623,7 @@ class PickerView(QtWidgets.QWidget):
     @signalEmitter
     def createMultipleButtons(self):
         nodeList:'list[MayaNodeName]' = self.pickerViewMenu.getSelectedNodes()
-        self.trackedButtons = [self.createButton([node]) for node in nodeList]
+        self.trackedButtons = self.createButtons([{'nodes': [node]} for node in nodeList])
             
          
     def _updateButtonsDuringDrag(self, startPos, endPos):
@@ -509,11 +662,11 @@ class PickerView(QtWidgets.QWidget):
             
     @signalEmitter
     def mirrorButtons(self, clickedPosX):
-        for mirrorButton in self.selectedButtons:
-            mirrorButtonData = mirrorButton.get()
-            mirrorNodes      = mirror.getMirrorObjs(mirrorButton.nodes)
-            newButton        = self.createButton(mirrorNodes, mirrorButtonData, code=mirrorButton.code)
-            
+        allMirrorNodes = mirror.getButtonsMirrorObjs(self.selectedButtons)
+        newButtons     = self.createButtons([{'nodes': allMirrorNodes[mirrorButton],
+                                              'data' : mirrorButton.get(),
+                                              'code' : mirrorButton.code} for mirrorButton in self.selectedButtons])
+        for mirrorButton, newButton in zip(self.selectedButtons, newButtons):
             oldGlobalPos = pickerUtils.localToGlobal(mirrorButton.localPos, self.buttonsParentPos, self.sceneScale)     
             topRightPosX = clickedPosX - oldGlobalPos.x() - (mirrorButton.scaleX * self.sceneScale)
 
@@ -616,6 +769,7 @@ class PickerView(QtWidgets.QWidget):
         Avoid triggering callbacks in a loop after selecting buttons within the UI
         '''  
         PickerView.setSelectionViaUi(True)
+        self.syncedSelectedNodes = None # the buttons may now drive Maya's selection, not the other way round
 
         if (self.selectedButtons and not self.clearSelectedNodes) or self.keyPressed:
             if self.selectedButtons:
@@ -630,16 +784,11 @@ class PickerView(QtWidgets.QWidget):
                 if oldSelNodes and self.keyPressed:
                     self.keyPressed = False
                     
-                    #selectedNodes.extend(oldSelNodes)
-                    selectedNodes = oldSelNodes + selectedNodes
-                    selectedNodes = list(OrderedDict.fromkeys(selectedNodes))
-      
-                    for button in self.nonMaxPickerButtons:
-                        node = button[0]
-                        if node in selectedNodes and not button.selected:
-                            selectedNodes.remove(node)  
+                    # keep the old selection first, minus the nodes of the buttons that are no longer selected
+                    unselectedNodes = {button[0] for button in self.nonMaxPickerButtons if len(button) and not button.selected}
+                    selectedNodes   = [node for node in OrderedDict.fromkeys(oldSelNodes + selectedNodes) if node not in unselectedNodes]
     
-                cmds.select(selectedNodes, ne=True, replace=True)
+                cmds.select(selectedNodes, ne=True, replace=True) # one call, recorded in Maya's undo queue
         
         elif self.clearSelectedNodes:
             self.clearSelectedNodes = False
@@ -781,12 +930,7 @@ class PickerView(QtWidgets.QWidget):
     # ------------------------------------------------------
     @staticmethod    
     def toUndoClass(className, pickerView, data):
-        undoCls = getattr(undo, className, None)
-        if undoCls is None:
-            raise NameError(
-                f"Class '{className}' not found in module '{undo.__name__}'. "
-                "Please ensure the class name is correct and the module is properly imported.")
-        undoInstance = undoCls(pickerView, True)
+        undoInstance = undo.getUndoClass(className)(pickerView, True)
         undoInstance.set(data)
         return undoInstance
         
@@ -802,99 +946,95 @@ class PickerView(QtWidgets.QWidget):
         
     
     def setUndoData(self, data):
-        for undoData in data['undos']['undoDatas']:
-            cmd = self.toUndoClass(undoData['undoClassName'], self, undoData)
-            self.undoStack.push(cmd) 
-        if data['undos']['undoDatas']:
-            self.undoStack.setIndex(data['undos']['index'])
+        '''
+        The saved commands stay raw data until undo / redo reaches them, see UndoStack.restore
+        '''
+        if not self.undoStack.enableUndo:
+            return
+        self.undoStack.restore(data['undos']['undoDatas'], data['undos']['index'])
+        
+        
+    def replayJournal(self, entries: 'list[dict]'):
+        '''
+        Redo the edits of a crashed session on top of the journal's snapshot (already set), then compact the journal
+        '''
+        self.journal.paused = True
+        try:
+            pickerJournal.replay(self.undoStack, entries, self.nodeTable)
+        finally:
+            self.journal.paused = False
+        self.journal.snapshot()
 
     # ------------------------------------------------------
+    def updateDocument(self, undoToFile=True) -> 'pickerModel.PickerDocument':
+        '''
+        Write the view state, the undo data and the stacking order into the document
+        '''
+        document = self.document
+        document.tabName          = self.getTabName()
+        document.sceneScale       = self.sceneScale
+        document.buttonsParentPos = (self.buttonsParentPos.x(), self.buttonsParentPos.y())
+        document.midView          = self.midView
+        document.viewOffset       = (self.viewOffset.x(), self.viewOffset.y())
+        document.backgroundInfo   = self.pickerBackground.get()
+        document.undos            = self.getUndoData(undoToFile)
+        document.setOrder([button.buttonId for button in self.allPickerButtons])
+        return document
+        
+        
     def get(self, undoToFile=True) -> dict:
+        '''
+        The data comes straight from the document, the button records already hold the local float geometry
+        '''
+        return self.updateDocument(undoToFile).toData()
+        
         
-        origSceneScale = self.sceneScale
-        '''
-        Maximizing the view to retrieve button data helps avoid precision loss
-        While this may not be the most elegant approach
-        it effectively resolves the issue of precision loss :)
-        '''
-        data = {'tabName'         : self.getTabName(),
-                'origSceneScale'  : origSceneScale,
-                'sceneScale'      : self.sceneScale,
-                'buttonsParentPos': [self.buttonsParentPos.x(), self.buttonsParentPos.y()],
-                'midView'         : self.midView,
-                'viewOffset'      : [self.viewOffset.x(), self.viewOffset.y()],
-                'namespace'       : self.namespace,
-                'cacheSavePath'   : self.cacheSavePath}
-              
-        buttonsData = []
-        for button in self.getAllPickerButtons():
-            localPos  = button.localPos
-            globalPos = pickerUtils.localToGlobal(localPos, self.buttonsParentPos, self.sceneScale)
-            '''
-            globalPos represents the button's center. Internally
-            it's converted to the top-left corner position for proper alignment
-            '''
-            cenrerPos = button.cenrerPos2(globalPos, self.sceneScale)
-            
-            color     = button.color
-            textColor = button.textColor
-            
-            buttonData= {'globalPos'   : [cenrerPos.x(), cenrerPos.y()],
-                         'localPos'    : [localPos.x(), localPos.y()],
-                         'color'       : [color.red(), color.green(), color.blue()],
-                         'scaleX'      : button.scaleX,
-                         'scaleY'      : button.scaleY,
-                         'textColor'   : [textColor.red(), textColor.green(), textColor.blue()],
-                         'labelText'   : button.labelText,
-                         'oldNodes'    : button.oldNodes,
-                         'nodes'       : button.nodes,
-                         'buttonId'    : button.buttonId,
-                         'code'        : button.code}
-            buttonsData.append(buttonData)
-            
-        data['buttons'] = buttonsData
-        '''
-        Revert to the view before zooming
-        mainly to keep the original tab's view unchanged when duplicating a tab
-        '''
-        # get undo data
-        data['undos'] = self.getUndoData(undoToFile)
-        data['backgroundInfo'] = self.pickerBackground.get()
-        return data
+    def getSnapshot(self, undoToFile=True) -> 'pickerModel.PickerDocument':
+        '''
+        A copy of the document to save from another thread, get() without the encoding
+        '''
+        return self.updateDocument(undoToFile).snapshot()
     
         
     def set(self, data: dict):
         try:
-            self.namespace = data['namespace']
-            self.cacheSavePath = data['cacheSavePath']
+            document      = pickerModel.PickerDocument.fromData(data)
+            records       = list(document)
+            document.records = {}
+            self.document = document # the buttons register their records again when created
             
-            self.sceneScale = self.origScale = data['sceneScale']
-            self.buttonsParentPos = QtCore.QPointF(*data['buttonsParentPos'])
+            self.sceneScale = self.origScale = document.sceneScale
+            self.buttonsParentPos = QtCore.QPointF(*document.buttonsParentPos)
 
-            for buttonData in data['buttons']:
+            buttonsInfo = []
+            localPositions = []
+            for record in records:
                 '''
-                Please refactor the logic for creating buttons!! 
-                It no longer relies on buttonGlobalPos !!
-                because the button's position will always be updated to the correct coordinates from the local position after creation!!!
+                The button widgets are built on the records, the records keep the saved data
                 '''
-                self.buttonGlobalPos = QtCore.QPointF(*buttonData['globalPos']) 
-                
-                _data = {'color'     : QtGui.QColor(*buttonData['color']),
-                         'scaleX'    : buttonData['scaleX'],
-                         'scaleY'    : buttonData['scaleY'],
-                         'textColor' : QtGui.QColor(*buttonData['textColor']),
-                         'labelText' : buttonData['labelText']} 
-        
-                button = self.createButton(buttonData['oldNodes'], _data, buttonData['buttonId'], buttonData['code'])
-                button.updateButton(buttonData['nodes'], buttonData['oldNodes'])
-                
+                _data = {'color'     : QtGui.QColor(*record.color),
+                         'scaleX'    : record.scaleX,
+                         'scaleY'    : record.scaleY,
+                         'textColor' : QtGui.QColor(*record.textColor),
+                         'labelText' : record.labelText} 
+                         
+                buttonsInfo.append({'globalPos': QtCore.QPointF(*record.center(document.buttonsParentPos, document.sceneScale)),
+                                    'nodeIds'  : record.nodeIds,
+                                    'data'     : _data,
+                                    'buttonId' : record.buttonId,
+                                    'code'     : record.code,
+                                    'record'   : record})
+                localPositions.append((record.x, record.y))
+                                    
+            buttons = self.createButtons(buttonsInfo)
+            
+            for button, localPos in zip(buttons, localPositions):
                 '''
                 Due to the conversion from local coordinates to world coordinates and the subsequent calculation of the button's center point
                 floating-point precision errors are inevitable. To ensure accuracy
                 we update the button's previous local coordinates to guarantee correctness. 
-                Although the code is far from elegant, it perfectly restores the button to its previous position
                 '''
-                button.localPos = QtCore.QPointF(*buttonData['localPos']) # update Local Pos
+                button.localPos = QtCore.QPointF(*localPos) # update Local Pos
                 
             self.viewOffset = QtCore.QPointF(*data['viewOffset'])
             self.midView    = data['midView']
@@ -908,3 +1048,171 @@ class PickerView(QtWidgets.QWidget):
         except Exception as e:
             raise ValueError(f'Error processing button data: {e}')
         self.updateButtonsPos(True)   
+        
+        
+    def duplicateFrom(self, picker: 'PickerView', withUndo: bool = False):
+        '''
+        Copy another picker from memory, nothing is serialized or parsed
+        Node paths, node ids and code dicts are shared with the original, they are replaced, never edited in place (copy-on-write)
+        The undo history is only copied on demand, its commands share their data with the original's as well
+        '''
+        self.namespace        = picker.namespace
+        self.sceneScale       = picker.sceneScale
+        self.origScale        = picker.origScale
+        self.buttonsParentPos = QtCore.QPointF(picker.buttonsParentPos)
+        self.nodeTable        = picker.nodeTable.copy()
+        
+        buttonsInfo = []
+        for button in picker.allPickerButtons:
+            globalPos = pickerUtils.localToGlobal(button.localPos, self.buttonsParentPos, self.sceneScale)
+            buttonsInfo.append({'globalPos': button.cenrerPos2(globalPos, self.sceneScale),
+                                'nodeIds'  : button.nodeIds,
+                                'data'     : button.get(),
+                                'buttonId' : button.buttonId,
+                                'code'     : button.code})
+                                
+        buttons = self.createButtons(buttonsInfo)
+        for button, sourceButton in zip(buttons, picker.allPickerButtons):
+            button.localPos = QtCore.QPointF(sourceButton.localPos) # see set()
+            
+        self.viewOffset = QtCore.QPointF(picker.viewOffset)
+        self.midView    = picker.midView
+        if self.midView:
+            self.resizeEvent(QtGui.QResizeEvent(self.size(), self.size()))
+            
+        if withUndo:
+            self.setUndoData({'undos': picker.getUndoData()})
+        self.pickerBackground.set(picker.pickerBackground.get())
+        self.updateButtonsPos(True)
+        
+        
+    def reconcile(self, data: dict):
+        '''
+        Bring the open picker in line with data (e.g. the same picker saved in another scene) without rebuilding it
+        The view (zoom / pan) and the unchanged buttons are kept, the undo history is the one of data
+        '''
+        self.namespace     = data['namespace']
+        self.cacheSavePath = data['cacheSavePath']
+        self.pickerId      = data.get('pickerId') or self.pickerId
+        
+        self.applyButtonsDiff(data['buttons'], path.NodeTable(data.get('nodeTable', [])))
+        
+        if self.pickerBackground.get() != data['backgroundInfo']:
+            self.pickerBackground.set(data['backgroundInfo'])
+            
+        self.undoStack.clear()
+        self.setUndoData(data)
+        self.journal.discard() # data is the saved state now
+        
+        
+    def reloadFromFile(self, data: dict) -> bool:
+        '''
+        Pick up the picker's file saved from somewhere else, only the changed buttons and the background are touched
+        The view, the namespace, the selection and the unchanged buttons are kept
+        The undo history is cleared when something changed, its commands may refer to buttons or node ids that are gone
+        
+        Returns: False when the file holds what the picker shows (e.g. our own save)
+        '''
+        # the undo commands hold node ids of the current table, a new table makes them point to other nodes
+        nodeTable    = path.NodeTable(data.get('nodeTable', []))
+        tableChanged = nodeTable.get() != self.nodeTable.get()
+        created, updated, deleted = self.applyButtonsDiff(data['buttons'], nodeTable if tableChanged else self.nodeTable)
+        
+        backgroundChanged = self.pickerBackground.get() != data['backgroundInfo']
+        if backgroundChanged:
+            self.pickerBackground.set(data['backgroundInfo'])
+            
+        if not (tableChanged or created or updated or deleted or backgroundChanged):
+            return False
+        self.undoStack.clear()
+        self.journal.discard()
+        return True
+        
+        
+    def applyButtonsDiff(self, buttonsData: 'list[dict]', nodeTable: path.NodeTable) -> 'tuple[int, int, int]':
+        '''
+        Patch the buttons to match buttonsData (saved button data) keyed by buttonId
+        Only the changed buttons are touched, the missing ones are created and the extra ones deleted
+        The stacking order follows buttonsData
+        
+        Returns: (created, updated, deleted)
+        '''
+        oldNodeTable   = self.nodeTable
+        self.nodeTable = nodeTable # the patched buttons resolve their nodes in the new table
+        try:
+            return self._applyButtonsDiff(buttonsData, nodeTable, oldNodeTable)
+        except Exception:
+            self.nodeTable = oldNodeTable # the table is only kept with the whole diff applied
+            raise
+            
+            
+    def _applyButtonsDiff(self, buttonsData: 'list[dict]', nodeTable: path.NodeTable, oldNodeTable: path.NodeTable) -> 'tuple[int, int, int]':
+        newButtonIds = set()
+        createDatas  = []
+        movedButtons = []
+        updated      = 0
+        for buttonData in buttonsData:
+            newButtonIds.add(buttonData['buttonId'])
+            button = self.allPickerButtonsIdMap.get(buttonData['buttonId'])
+            if button is None:
+                createDatas.append(buttonData)
+                continue
+                
+            oldNodes = oldNodeTable.names(button.nodeIds)
+            nodeIds  = tuple(nodeTable.buttonNodeIds(buttonData))
+            # the ids always point into the new table, even when the nodes are the same
+            if nodeIds != button.nodeIds or oldNodes != nodeTable.names(nodeIds):
+                button.updateNodeIds(nodeIds)
+                self.updateButtonList(button)
+                
+            changed, moved = self._patchButton(button, buttonData)
+            if moved:
+                movedButtons.append(button)
+            if changed or oldNodes != button.oldNodes:
+                updated += 1
+                button.update()
+                
+        deletedButtons = [button for buttonId, button in self.allPickerButtonsIdMap.items() if buttonId not in newButtonIds]
+        for button in deletedButtons:
+            button.deleteLater()
+            self._updateButtonsCache(button)
+            
+        createdButtons = undo.createButtonsByInfo(createDatas, self) if createDatas else []
+        if movedButtons or createdButtons:
+            self.updateButtonsPos(True, movedButtons + createdButtons)
+        
+        self.allPickerButtons.restore([self.allPickerButtonsIdMap[buttonData['buttonId']] for buttonData in buttonsData])
+        return len(createdButtons), updated, len(deletedButtons)
+        
+        
+    def _patchButton(self, button: 'PickerButton', buttonData: dict) -> 'tuple[bool, bool]':
+        '''
+        Returns: (anything changed, geometry changed)
+        '''
+        changed = moved = False
+        
+        color = QtGui.QColor(*buttonData['color'])
+        if color != button.color:
+            button.updateColor(color)
+            changed = True
+            
+        textColor = QtGui.QColor(*buttonData['textColor'])
+        if textColor != button.textColor:
+            button.updateLabelColor(textColor)
+            changed = True
+            
+        localPos = QtCore.QPointF(*buttonData['localPos'])
+        if (buttonData['scaleX'], buttonData['scaleY']) != (button.scaleX, button.scaleY) or localPos != button.localPos:
+            button.scaleX, button.scaleY = buttonData['scaleX'], buttonData['scaleY']
+            button.localPos = localPos
+            changed = moved = True
+            
+        if buttonData['code'] != button.code:
+            button.code = buttonData['code']
+            button._setToolTop()
+            changed = True
+            
+        if buttonData['labelText'] != button.labelText:
+            button.updateLabelText(buttonData['labelText'], self.sceneScale)
+            changed = True
+        return changed, moved
@@ -1,72 +1,94 @@
 import maya.cmds as cmds
 
 
+def _validNodes(button: 'PickerButton', validNodeIds: dict) -> 'list[tuple[int, str]]':
+    '''
+    (nodeId, node) of the button's nodes that exist and are unique in the scene
+    validNodeIds caches the result per node id, so nodes shared by several buttons are only checked once
+    '''
+    nodes = []
+    for nodeId, node in zip(button.nodeIds, button.nodes):
+        valid = validNodeIds.get(nodeId)
+        if valid is None:
+            valid = validNodeIds[nodeId] = len(cmds.ls(node, long=True)) == 1
+        if valid:
+            nodes.append((nodeId, node))
+    return nodes
+    
+    
 def releaseAddSelection(allPickerButtons   : 'list[PickerButton]', 
                         nonMaxPickerButtons: 'list[PickerButton]', 
                         MaxPickerButtons   : 'list[PickerButton]', 
                         selectedButtons    : 'list[PickerButton]') -> list:
+    '''
+    Buttons are matched by node ids (see path.NodeTable), the selected nodes are returned in selection order
+    '''
+    validNodeIds  = {}
+    selectedNodes = {} # nodeId -> node, ordered
+    selectedSet   = set(selectedButtons)
     
-    selectedNodes = []
+    def _select(button):
+        button.setSelected(True)
+        if button not in selectedSet:
+            selectedSet.add(button)
+            selectedButtons.append(button)
 
     for button in list(selectedButtons):
-        nodes = [node for node in button
-                 if cmds.objExists(node) and len(cmds.ls(node, long=True)) == 1]
+        nodes = _validNodes(button, validNodeIds)
         if nodes:
-            selectedNodes.extend(nodes)
+            selectedNodes.update(nodes)
         else:
             button.setSelected(False)
             selectedButtons.remove(button)
+            selectedSet.discard(button)
     
-    if selectedNodes:
-        # maxButton to button
-        cacheSelectedButtons = list(selectedButtons)
+    if not selectedNodes:
+        return []
         
-        for selectedButton in cacheSelectedButtons:
-            if not selectedButton.isMaxButton:
-                continue
+    # non max buttons hold a single node
+    nodeIdButtons = {}
+    for button in nonMaxPickerButtons:
+        if button.nodeIds:
+            nodeIdButtons.setdefault(button.nodeIds[0], []).append(button)
             
-            for button in nonMaxPickerButtons:
-                if not (button in selectedButton and not button.selected):
+    # maxButton to button
+    for selectedButton in list(selectedButtons):
+        if not selectedButton.isMaxButton:
+            continue
+        
+        for nodeId in selectedButton.nodeIds:
+            for button in nodeIdButtons.get(nodeId, ()):
+                if button.selected:
                     continue
-                
-                mayaNode = button.nodes[0]
-                if not cmds.objExists(mayaNode):
+                nodes = _validNodes(button, validNodeIds)
+                if not nodes:
                     continue
-                    
-                button.setSelected(True)
-                if mayaNode not in selectedNodes:
-                    selectedNodes.append(node)
-                    
-                if button not in selectedButtons:
-                    selectedButtons.append(button)
-
-            # check max button
-            if not all(cmds.objExists(node) for node in selectedButton):
-                if selectedButton in cacheSelectedButtons:
-                    selectedButtons.remove(selectedButton)
-                selectedButton.setSelected(False)
-        
-        # update nonButton         
-        for button in nonMaxPickerButtons:
-            if button[0] in selectedNodes and not button.selected:
-                button.setSelected(True)
-                if button not in selectedButtons:
-                    selectedButtons.append(button)        
-          
-        # button to maxButton
-        for maxButton in MaxPickerButtons:
-            if maxButton.selected:
-                continue
-            if all(node in selectedNodes for node in maxButton):
-                maxButton.setSelected(True)
-                if maxButton not in selectedButtons:
-                    selectedButtons.append(maxButton)
-                 
-        #cmds.select(selectedNodes, ne=True, replace=True)
-        return selectedNodes
-    return []
-
+                _select(button)
+                selectedNodes.setdefault(*nodes[0])
 
+        # check max button
+        if len(_validNodes(selectedButton, validNodeIds)) != len(selectedButton.nodeIds):
+            if selectedButton in selectedSet:
+                selectedButtons.remove(selectedButton)
+                selectedSet.discard(selectedButton)
+            selectedButton.setSelected(False)
+    
+    # update nonButton
+    for nodeId in selectedNodes:
+        for button in nodeIdButtons.get(nodeId, ()):
+            if not button.selected:
+                _select(button)
+      
+    # button to maxButton
+    for maxButton in MaxPickerButtons:
+        if maxButton.selected:
+            continue
+        if all(nodeId in selectedNodes for nodeId in maxButton.nodeIds):
+            _select(maxButton)
+             
+    return list(selectedNodes.values())
+    
+    
 def releaseSubSelection(clickedButton  : 'PickerButton',
                         selectedButtons: 'list[PickerButton]') -> None:
                             
@@ -3,97 +3,77 @@ import maya.cmds as cmds
 
 if int(cmds.about(version=True)) >= 2025:
     from PySide6 import QtWidgets, QtCore, QtGui
-    UndoStack   = QtGui.QUndoStack
     UndoCommand = QtGui.QUndoCommand
 else:
     from PySide2 import QtWidgets, QtCore, QtGui
-    UndoStack   = QtWidgets.QUndoStack
     UndoCommand = QtWidgets.QUndoCommand
 
-from . import align, pickerUtils, mirror, zorder
+from . import align, pickerUtils, mirror, zorder, undoStack
 
 
-class PickerViewUndoStackBase(UndoStack):
+class PickerViewUndoStackBase(undoStack.UndoStack):
     def __init__(self, parent=None, 
                        enableUndo: 'undo switch'=True, 
-                       queue:      'undo depth' =20):
-        super().__init__(parent)
-        self.enableUndo   = enableUndo
-        
-        self.oldUndoQueue = queue # undo length
-        
-        self.picker = parent
-        self.cacheAllCmd = {'index'    : -1, 
-                            'undoDatas': []}
+                       queue:      'undo depth' =20,
+                       byteBudget: 'undo memory in bytes, 0: no limit'=0,
+                       spill:      'move old commands to a temp file'=False):
+        super().__init__(self._commandFromData, self._commandText, parent)
+        self.enableUndo = enableUndo
+        self.picker     = parent
                             
         self.setUndoLimit(queue)
+        self.setByteBudget(byteBudget, spill)
            
            
+    def _commandFromData(self, data: dict):
+        undoInstance = getUndoClass(data['undoClassName'])(self.picker)
+        undoInstance.set(data)
+        return undoInstance
+        
+        
+    def _commandText(self, data: dict) -> str:
+        className = data['undoClassName']
+        text = _UNDO_TEXTS.get(className)
+        if text is None:
+            # the text is set in __init__, set() is not needed
+            text = _UNDO_TEXTS[className] = getUndoClass(className)(self.picker).text()
+        return text
+        
+        
     def push(self, command):
         if self.enableUndo:
             super().push(command)  
         else:
             command.redo() 
-            
-            
-    def setUndoLimit(self, undoQueue):
-        if self.oldUndoQueue != undoQueue:
-            self.oldUndoQueue = undoQueue
-            self._getAllCmdData()
-            self.clear()
-            
-        super().setUndoLimit(undoQueue)
+            if self.journal is not None:
+                self.journal.pushed(command)
         
-        self._setCmdData()
-
         
-    def _getAllCmdData(self):
-        self._resetCache()
-        self.cacheAllCmd['index'] = self.index()
-        for index in range(self.count()):
-            self.cacheAllCmd['undoDatas'].append(self.command(index).get())
-            
+UNDO_CLASSES = {} # class name -> undo class, filled by PickerViewUndoBase.__init_subclass__
+_UNDO_TEXTS  = {} # class name -> undo text
 
-    def _setCmdData(self):
-        if not self.cacheAllCmd['undoDatas']:
-            return
+# id() of the commands merged with the previous command of the same id, see UndoStack.push
+SCALE_MERGE_ID, SCALE_X_MERGE_ID, SCALE_Y_MERGE_ID, UP_MERGE_ID, DOWN_MERGE_ID = range(1, 6)
 
-        cacheCmdCount = len(self.cacheAllCmd['undoDatas'])
-        oldIndex      = self.cacheAllCmd['index']
-        
-        newCmd = []
-        if cacheCmdCount < self.oldUndoQueue:
-            newCmd   = self.cacheAllCmd['undoDatas']
-            newIndex = oldIndex
-        else:
-            '''
-            Currently, only the case where the new undo length is less than the previous undo index has been handled!!
-            '''
-            if oldIndex > self.oldUndoQueue:
-                newCmd = self.cacheAllCmd['undoDatas'][self.oldUndoQueue : oldIndex]
-                newIndex = oldIndex
-            # elif ...:
-            #     pass
-                
-        if newCmd:
-            for undoData in newCmd:
-                undoCls = globals().get(undoData['undoClassName'])
-                undoInstance = undoCls(self.picker, True)
-                undoInstance.set(undoData)
-                self.push(undoInstance) 
-            self.setIndex(newIndex)
- 
-        self._resetCache()
 
-            
-    def _resetCache(self):
-        self.cacheAllCmd['index'] = -1
-        self.cacheAllCmd['undoDatas'].clear()
+def getUndoClass(className: str) -> type:
+    '''
+    The saved undo data only holds the class name ('undoClassName')
+    '''
+    undoCls = UNDO_CLASSES.get(className)
+    if undoCls is None:
+        raise NameError(
+            f"Undo class '{className}' is not registered. "
+            "Please ensure the class name is correct and the class derives from PickerViewUndoBase.")
+    return undoCls
         
-
         
 class PickerViewUndoBase(UndoCommand):
     
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        UNDO_CLASSES[cls.__name__] = cls
+        
     def __init__(self, skipRedo: bool = False):
         super().__init__()
         self.skipRedo = skipRedo
@@ -234,7 +214,7 @@ class CreateButtonsCmd(PickerViewUndoBase):
         if not self.buttonDatas:
             self.buttonDatas = getSelectedButtonsInfo(self.pickerView, self.buttonIds) 
         else:
-            buttons = [createButtonByInfo(buttonData, self.pickerView) for buttonData in self.buttonDatas]
+            buttons = createButtonsByInfo(self.buttonDatas, self.pickerView)
             self.pickerView.updateButtonsPos(True, buttons) # update button pos
             
     def get(self):
@@ -339,57 +319,47 @@ class UpdateButtonCmd(PickerViewUndoBase):
         self.pickerView = pickerView
         
     def initialize(self):
-        self.buttonId       = self.pickerView.clickedButton.buttonId
-        self.buttonNodes    = self.pickerView.clickedButton.nodes
-        self.buttonOldNodes = self.pickerView.clickedButton.oldNodes
-        self.nweNodes       = self.pickerView.newNodes # maya nodes by menu
+        self.buttonId      = self.pickerView.clickedButton.buttonId
+        self.buttonNodeIds = list(self.pickerView.clickedButton.nodeIds)
+        self.newNodeIds    = self.pickerView.nodeTable.ids(self.pickerView.newNodes) # maya nodes by menu
         return self
     
-    def _update(self, nodes, oldNodes=None):
+    def _update(self, nodeIds):
         if self.buttonId in self.pickerView.allPickerButtonsIdMap:
             updateButton = self.pickerView.allPickerButtonsIdMap[self.buttonId]
-            updateButton.updateButton(nodes, oldNodes)
+            updateButton.updateNodeIds(nodeIds)
             self.pickerView.updateButtonList(updateButton)
             updateButton.update()
     
     def undo(self):
-        self._update(self.buttonNodes, self.buttonOldNodes)
+        self._update(self.buttonNodeIds)
       
     def redo(self):
         if not super().redo():
             return
-        self._update(self.nweNodes, None)
+        self._update(self.newNodeIds)
         
     def get(self):
-        return {'undoClassName'  : self.__class__.__name__,
-                'buttonId'       : self.buttonId,
-                'buttonNodes'    : self.buttonNodes,
-                'buttonOldNodes' : self.buttonOldNodes,
-                'nweNodes'       : self.nweNodes}
+        return {'undoClassName' : self.__class__.__name__,
+                'buttonId'      : self.buttonId,
+                'buttonNodeIds' : self.buttonNodeIds,
+                'newNodeIds'    : self.newNodeIds}
     
     def set(self, data):
-        self.buttonId       = data['buttonId']
-        self.buttonNodes    = data['buttonNodes']
-        self.buttonOldNodes = data['buttonOldNodes']
-        self.nweNodes       = data['nweNodes']
+        nodeTable     = self.pickerView.nodeTable
+        self.buttonId = data['buttonId']
+        # undo data saved before the node table existed keeps the node names
+        if 'buttonNodeIds' in data:
+            self.buttonNodeIds = data['buttonNodeIds']
+            self.newNodeIds    = data['newNodeIds']
+        else:
+            self.buttonNodeIds = nodeTable.ids(data['buttonOldNodes'] or data['buttonNodes'])
+            self.newNodeIds    = nodeTable.ids(data['nweNodes'])
         
         
 # ---------------------------------------------------------------------------
 def getButtonData(button):
-    localPos  = button.localPos
-    color     = button.color
-    textColor = button.textColor
-    buttonData = {'localPos'    : [localPos.x(), localPos.y()],
-                  'color'       : [color.red(), color.green(), color.blue()],
-                  'scaleX'      : button.scaleX,
-                  'scaleY'      : button.scaleY,
-                  'textColor'   : [textColor.red(), textColor.green(), textColor.blue()],
-                  'labelText'   : button.labelText,
-                  'oldNodes'    : button.oldNodes,
-                  'nodes'       : button.nodes,
-                  'buttonId'    : button.buttonId,
-                  'code'        : button.code}
-    return buttonData
+    return button.record.toData()
     
     
 def getSelectedButtonsInfo(pickerView, buttonsIds):
@@ -404,34 +374,42 @@ def getSelectedButtonsInfo(pickerView, buttonsIds):
     
     
 def createButtonByInfo(buttonData, pickerView):
-    localPos  = QtCore.QPointF(*buttonData['localPos'])
-    globalPos = pickerUtils.localToGlobal(localPos, pickerView.buttonsParentPos, pickerView.sceneScale)
-    cenrerPos = globalPos + QtCore.QPointF(buttonData['scaleX'] * pickerView.sceneScale / 2, buttonData['scaleY'] * pickerView.sceneScale / 2)  
-
-    pickerView.buttonGlobalPos = cenrerPos
-    _data = {'color'     : QtGui.QColor(*buttonData['color']),
-             'scaleX'    : buttonData['scaleX'],
-             'scaleY'    : buttonData['scaleY'],
-             'textColor' : QtGui.QColor(*buttonData['textColor']),
-             'labelText' : buttonData['labelText']} 
-
-    button = pickerView.createButton(buttonData['oldNodes'], _data, buttonData['buttonId'], buttonData['code'])
-    button.updateButton(buttonData['nodes'], buttonData['oldNodes'])
+    return createButtonsByInfo([buttonData], pickerView)[0]
     
-    '''
-    Due to the conversion from local coordinates to world coordinates and the subsequent calculation of the button's center point
-    floating-point precision errors are inevitable. To ensure accuracy
-    we update the button's previous local coordinates to guarantee correctness. 
-    Although the code is far from elegant, it perfectly restores the button to its previous position
-    '''
-    button.localPos = localPos # update localPos
-    return button
     
-def updateButtonsZorder(buttonIds, buttonsMap):
-    for buttonId in buttonIds:
-        if buttonId in buttonsMap:
-            button = buttonsMap[buttonId]
-            button.raise_()
+def createButtonsByInfo(buttonDatas, pickerView):
+    buttonsInfo = []
+    for buttonData in buttonDatas:
+        localPos  = QtCore.QPointF(*buttonData['localPos'])
+        globalPos = pickerUtils.localToGlobal(localPos, pickerView.buttonsParentPos, pickerView.sceneScale)
+        cenrerPos = globalPos + QtCore.QPointF(buttonData['scaleX'] * pickerView.sceneScale / 2, buttonData['scaleY'] * pickerView.sceneScale / 2)  
+
+        _data = {'color'     : QtGui.QColor(*buttonData['color']),
+                 'scaleX'    : buttonData['scaleX'],
+                 'scaleY'    : buttonData['scaleY'],
+                 'textColor' : QtGui.QColor(*buttonData['textColor']),
+                 'labelText' : buttonData['labelText']} 
+                 
+        buttonsInfo.append({'globalPos': cenrerPos,
+                            'nodeIds'  : pickerView.nodeTable.buttonNodeIds(buttonData),
+                            'data'     : _data,
+                            'buttonId' : buttonData['buttonId'],
+                            'code'     : buttonData['code']})
+
+    buttons = pickerView.createButtons(buttonsInfo)
+    for button, buttonData in zip(buttons, buttonDatas):
+        '''
+        Due to the conversion from local coordinates to world coordinates and the subsequent calculation of the button's center point
+        floating-point precision errors are inevitable. To ensure accuracy
+        we update the button's previous local coordinates to guarantee correctness. 
+        Although the code is far from elegant, it perfectly restores the button to its previous position
+        '''
+        button.localPos = QtCore.QPointF(*buttonData['localPos']) # update localPos
+    return buttons
+    
+def updateButtonsZorder(buttonIds, pickerView):
+    buttons = getButtonsByCacheButtonsID(buttonIds, pickerView)
+    pickerView.allPickerButtons.restore(buttons)
 
 
 def getButtonsByCacheButtonsID(buttonsId, pickerView):
@@ -460,13 +438,11 @@ class DeleteButtonCmd(PickerViewUndoBase):
         
     def undo(self):
         
-        buttons = [createButtonByInfo(buttonData, self.pickerView) for buttonData in self.buttonDatas]
+        buttons = createButtonsByInfo(self.buttonDatas, self.pickerView)
         self.pickerView.updateButtonsPos(True, buttons) # update button pos
             
         # update z orde !!    
-        updateButtonsZorder(self.AllButtonZOrder, self.pickerView.allPickerButtonsIdMap)   
-        # update cache buttons zorder
-        self.pickerView.allPickerButtons = self.pickerView.getAllPickerButtons() 
+        updateButtonsZorder(self.AllButtonZOrder, self.pickerView)   
         
          
     def redo(self):
@@ -547,14 +523,13 @@ class ZOrderBaseCmd(PickerViewUndoBase):
         self.allButtonsId    = [button.buttonId for button in self.pickerView.allPickerButtons]
         # cache Z Order
         self.AllButtonZOrder = [button.buttonId for button in self.pickerView.allPickerButtons]  
+        self.repeat          = 1 # merged key presses
         return self
           
     def undo(self):
         # update z orde !!    
-        updateButtonsZorder(self.AllButtonZOrder, self.pickerView.allPickerButtonsIdMap)   
+        updateButtonsZorder(self.AllButtonZOrder, self.pickerView)   
         self.pickerView.pickerBackground.lower()
-        # update buttons zorder
-        self.pickerView.allPickerButtons = self.pickerView.getAllPickerButtons() 
         
         
     def redo(self):
@@ -562,23 +537,34 @@ class ZOrderBaseCmd(PickerViewUndoBase):
             return
         buttons = getButtonsByCacheButtonsID(self.buttonsId, self.pickerView)
 
-        self.run(buttons)
+        for _ in range(self.repeat):
+            self.run(buttons)
         self.pickerView.pickerBackground.lower()
-        self.pickerView.allPickerButtons = self.pickerView.getAllPickerButtons()  # update buttons zorder
         
     def run(self, buttons):
         pass
         
+    def mergeWith(self, other) -> bool:
+        '''
+        Up / Down pressed again on the same buttons: one step, undone to the order before the first press
+        '''
+        if set(other.buttonsId) != set(self.buttonsId):
+            return False
+        self.repeat += other.repeat
+        return True
+        
     def get(self):
         return {'undoClassName'   : self.__class__.__name__,
                 'buttonsId'       : self.buttonsId,
                 'allButtonsId'    : self.allButtonsId,
-                'AllButtonZOrder' : self.AllButtonZOrder}
+                'AllButtonZOrder' : self.AllButtonZOrder,
+                'repeat'          : self.repeat}
     
     def set(self, data):
         self.buttonsId       = data['buttonsId']
         self.allButtonsId    = data['allButtonsId']
         self.AllButtonZOrder = data['AllButtonZOrder']
+        self.repeat          = data.get('repeat', 1)
 
 
 class RaiseCmd(ZOrderBaseCmd):
@@ -588,7 +574,7 @@ class RaiseCmd(ZOrderBaseCmd):
 
 
     def run(self, buttons):
-        zorder.raiseSelectedButtons(buttons)
+        zorder.raiseSelectedButtons(buttons, self.pickerView.allPickerButtons)
         
 
 class LowerCmd(ZOrderBaseCmd):
@@ -598,7 +584,7 @@ class LowerCmd(ZOrderBaseCmd):
 
 
     def run(self, buttons):
-        zorder.lowerSelectedButtons(buttons)
+        zorder.lowerSelectedButtons(buttons, self.pickerView.allPickerButtons)
         
         
 class UpCmd(ZOrderBaseCmd):
@@ -606,19 +592,23 @@ class UpCmd(ZOrderBaseCmd):
         super().__init__(pickerView, skipRedo)
         self.setText('Move Selected Buttons Up')
         
+    def id(self) -> int:
+        return UP_MERGE_ID
+        
     def run(self, buttons):
-        allButton = getButtonsByCacheButtonsID(self.allButtonsId, self.pickerView)
-        zorder.moveSelectedButtonsUp(buttons, allButton)
+        zorder.moveSelectedButtonsUp(buttons, self.pickerView.allPickerButtons)
         
 
 class DownCmd(ZOrderBaseCmd):
     def __init__(self, pickerView, skipRedo=False):
         super().__init__(pickerView, skipRedo)
         self.setText('Move Selected Buttons Down')
+        
+    def id(self) -> int:
+        return DOWN_MERGE_ID
  
     def run(self, buttons):
-        allButton = getButtonsByCacheButtonsID(self.allButtonsId, self.pickerView)
-        zorder.moveSelectedButtonsDown(buttons, allButton)
+        zorder.moveSelectedButtonsDown(buttons, self.pickerView.allPickerButtons)
         
         
   
@@ -773,6 +763,20 @@ class UpdateSelectedButtonsScaleCmd(PickerViewUndoBase):
             button.updateScaleY(button.scaleY + self.scaleValue, self.pickerView.sceneScale, self.pickerView.buttonsParentPos)
             button.scaleText(self.pickerView.sceneScale)
             
+            
+    def id(self) -> int:
+        return SCALE_MERGE_ID
+        
+        
+    def mergeWith(self, other) -> bool:
+        '''
+        Repeated +/- on the same buttons, only in one direction so the size clamp gives the same result on redo
+        '''
+        if other.oldSelectedButtonsScale.keys() != self.oldSelectedButtonsScale.keys() or other.scaleValue * self.scaleValue <= 0:
+            return False
+        self.scaleValue += other.scaleValue
+        return True
+            
 
     def get(self):
         return {'undoClassName'          : self.__class__.__name__,
@@ -827,6 +831,24 @@ class UpdateButtonsScaleXCmd(PickerViewUndoBase):
             self.pickerView.buttonManager.updateToolBoxWidget(self.pickerView.selectedButtons[-1])
             
 
+    def id(self) -> int:
+        return SCALE_X_MERGE_ID
+        
+        
+    def mergeWith(self, other) -> bool:
+        '''
+        Slider released again on the same buttons: keep the first old scale / position and the last new ones
+        '''
+        if other.cacheOldButtonsScaleX.keys() != self.cacheOldButtonsScaleX.keys():
+            return False
+        self.cacheOldButtonsScaleX = dict(self.cacheOldButtonsScaleX) # may be shared with saved / duplicated undo data
+        for buttonId, (_, _, newPos) in other.cacheOldButtonsScaleX.items():
+            oldScale, oldPos, _ = self.cacheOldButtonsScaleX[buttonId]
+            self.cacheOldButtonsScaleX[buttonId] = [oldScale, oldPos, newPos]
+        self.newScaleValue = other.newScaleValue
+        return True
+        
+
     def get(self):
         return {'undoClassName'          : self.__class__.__name__,
                 'cacheOldButtonsScaleX'  : self.cacheOldButtonsScaleX,
@@ -883,6 +905,24 @@ class UpdateButtonsScaleYCmd(PickerViewUndoBase):
 
 
 
+    def id(self) -> int:
+        return SCALE_Y_MERGE_ID
+        
+        
+    def mergeWith(self, other) -> bool:
+        '''
+        Slider released again on the same buttons: keep the first old scale / position and the last new ones
+        '''
+        if other.cacheOldButtonsScaleY.keys() != self.cacheOldButtonsScaleY.keys():
+            return False
+        self.cacheOldButtonsScaleY = dict(self.cacheOldButtonsScaleY) # may be shared with saved / duplicated undo data
+        for buttonId, (_, _, newPos) in other.cacheOldButtonsScaleY.items():
+            oldScale, oldPos, _ = self.cacheOldButtonsScaleY[buttonId]
+            self.cacheOldButtonsScaleY[buttonId] = [oldScale, oldPos, newPos]
+        self.newScaleValue = other.newScaleValue
+        return True
+        
+
     def get(self):
         return {'undoClassName'          : self.__class__.__name__,
                 'cacheOldButtonsScaleY'  : self.cacheOldButtonsScaleY,
@@ -909,11 +949,14 @@ class UpdateButtonsNamespaceCmd(PickerViewUndoBase):
         self.pickerOldNamespace = self.pickerView.namespace
         self.pickerNewNamespace = NewNamespace
         
+        '''
+        Switching the namespace only changes the picker's namespace field, so the undo data is just the namespace delta
+        Clearing the namespace ('') rebases every button on its stripped names, only then are the old node ids cached
+        '''
         self.buttonsInfo = {}
-        for button in self.pickerView.allPickerButtons:
-            nodesData = {'oldNodes':button.oldNodes,
-                         'nodes'   :button.nodes}
-            self.buttonsInfo[button.buttonId] = nodesData   
+        if NewNamespace == '':
+            for button in self.pickerView.allPickerButtons:
+                self.buttonsInfo[button.buttonId] = {'nodeIds': list(button.nodeIds)}
         return self
     
 
@@ -925,7 +968,7 @@ class UpdateButtonsNamespaceCmd(PickerViewUndoBase):
             if buttonId not in self.pickerView.allPickerButtonsIdMap:
                 continue
             button = self.pickerView.allPickerButtonsIdMap[buttonId]
-            button.updateButton(info['nodes'], info['oldNodes'])
+            button.updateNodeIds(self.pickerView.nodeTable.buttonNodeIds(info))
         # update namespace widget
         self.pickerView.mainUI._selectNamespace(self.pickerOldNamespace)
       
@@ -934,9 +977,9 @@ class UpdateButtonsNamespaceCmd(PickerViewUndoBase):
             return
         
         self.pickerView.namespace = self.pickerNewNamespace
-        buttons = getButtonsByCacheButtonsID(list(self.buttonsInfo.keys()), self.pickerView)
-        for button in buttons:
-            button.updateNamespace(self.pickerNewNamespace)
+        if self.pickerNewNamespace == '':
+            for button in self.pickerView.allPickerButtons:
+                button.clearNamespace()
         
         '''
         The namespaceItem has already been manually selected during the first namespace switch; it should only be invoked on the next redo
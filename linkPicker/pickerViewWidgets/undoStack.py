@@ -0,0 +1,391 @@
+'''
+Undo stack with the QUndoStack api used by the picker (push, undo, redo, setIndex, command, ...)
+
+QUndoStack can only limit its history by command count and can't drop or swap single commands,
+this one also keeps a memory budget: each command's size is estimated from its get() data when it is pushed,
+and when the budget is exceeded the oldest commands are dropped or, with spill on, written to a temp file
+and read back when undo / redo reaches them
+
+Saved undo data is restored as RecordCommand stand-ins (restore), a command object is only built when
+undo / redo reaches it, so a long saved history costs nothing on load
+The stack doesn't know the command classes: it is given the commandFromData factory that builds a command from its data
+
+Like QUndoStack, a pushed command is merged into the previous one when both have the same id() (not -1) and
+mergeWith accepts it, here only when nothing was undone in between and within MERGE_WINDOW seconds
+'''
+import json
+import time
+import tempfile
+
+import maya.cmds as cmds
+
+if int(cmds.about(version=True)) >= 2025:
+    from PySide6 import QtCore
+else:
+    from PySide2 import QtCore
+
+
+def estimateSize(command) -> int:
+    '''
+    Bytes of the command's data as saved, a stable estimate of what the command keeps alive
+    '''
+    try:
+        return len(json.dumps(command.get(), default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class CommandStub(object):
+    '''
+    Stand-in for a command that is not built, has the get() / text() of the command
+    '''
+    __slots__ = ()
+
+    def text(self) -> str:
+        return ''
+
+
+    def get(self) -> dict:
+        return {}
+
+
+class RecordCommand(CommandStub):
+    '''
+    Saved data of a command, not deserialized yet
+    '''
+    __slots__ = ('data', '_text')
+
+    def __init__(self, data: dict, text: str):
+        self.data  = data
+        self._text = text
+
+
+    def text(self) -> str:
+        return self._text
+
+
+    def get(self) -> dict:
+        return self.data
+
+
+class SpilledCommand(CommandStub):
+    '''
+    Stand-in for a command moved to the spill file, holds only where its data is
+    '''
+    __slots__ = ('spillFile', 'offset', 'size', '_text')
+
+    def __init__(self, spillFile: 'SpillFile', offset: int, size: int, text: str):
+        self.spillFile = spillFile
+        self.offset    = offset
+        self.size      = size
+        self._text     = text
+
+
+    def text(self) -> str:
+        return self._text
+
+
+    def get(self) -> dict:
+        return self.spillFile.read(self.offset, self.size)
+
+
+class SpillFile(object):
+    '''
+    Append only temp file of command data, removed by the OS when closed
+    '''
+    def __init__(self):
+        self._file = None
+
+
+    def write(self, data: dict) -> 'tuple[int, int]':
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix='linkPickerUndo_')
+        raw = json.dumps(data).encode('utf-8')
+        self._file.seek(0, 2)
+        offset = self._file.tell()
+        self._file.write(raw)
+        return offset, len(raw)
+
+
+    def read(self, offset: int, size: int) -> dict:
+        self._file.seek(offset)
+        return json.loads(self._file.read(size).decode('utf-8'))
+
+
+    def clear(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class UndoStack(QtCore.QObject):
+
+    indexChanged    = QtCore.Signal(int)
+    canUndoChanged  = QtCore.Signal(bool)
+    canRedoChanged  = QtCore.Signal(bool)
+    undoTextChanged = QtCore.Signal(str)
+    redoTextChanged = QtCore.Signal(str)
+
+    MERGE_WINDOW = 1.0 # seconds
+
+    def __init__(self, commandFromData: 'callable', commandText: 'callable' = None, parent=None):
+        '''
+        commandFromData: data -> command, rebuilds a command from its get() data (the restored and the spilled commands)
+        commandText    : data -> undo / redo text of the command, without building it
+        '''
+        super().__init__(parent)
+        self.commandFromData = commandFromData
+        self.commandText     = commandText or (lambda data: '')
+        self._commands   = [] # commands or CommandStub, bottom -> top
+        self._sizes      = [] # estimated bytes per command, 0 when spilled or without a budget
+        self._index      = 0
+        self._undoLimit  = 0  # commands, 0: no limit
+        self._byteBudget = 0  # bytes, 0: no limit
+        self._spill      = False
+        self._spillFile  = SpillFile()
+        self._lastPush   = None # time of the last push, None after undo / redo: no merge
+        self.journal     = None # pickerJournal.PickerJournal, told about every push / undo / redo
+
+
+    # api ------------------------------------------------------------------------
+    def count(self) -> int:
+        return len(self._commands)
+
+
+    def index(self) -> int:
+        return self._index
+
+
+    def command(self, index: int):
+        '''
+        The command, or its CommandStub, both have get() and text()
+        '''
+        if 0 <= index < len(self._commands):
+            return self._commands[index]
+        return None
+
+
+    def text(self, index: int) -> str:
+        command = self.command(index)
+        return command.text() if command is not None else ''
+
+
+    def canUndo(self) -> bool:
+        return self._index > 0
+
+
+    def canRedo(self) -> bool:
+        return self._index < len(self._commands)
+
+
+    def undoText(self) -> str:
+        return self.text(self._index - 1) if self.canUndo() else ''
+
+
+    def redoText(self) -> str:
+        return self.text(self._index) if self.canRedo() else ''
+
+
+    def undoLimit(self) -> int:
+        return self._undoLimit
+
+
+    def setUndoLimit(self, undoLimit: int):
+        self._undoLimit = undoLimit
+        self._trim()
+        self._emitChanged()
+
+
+    def byteBudget(self) -> int:
+        return self._byteBudget
+
+
+    def setByteBudget(self, byteBudget: int, spill: bool = False):
+        '''
+        byteBudget: estimated bytes kept in memory, 0 for no limit
+        spill     : move the oldest commands to a temp file instead of dropping them
+        '''
+        self._byteBudget = byteBudget
+        self._spill      = spill
+        self._estimateSizes()
+        self._trim()
+        self._emitChanged()
+
+
+    def memoryUsage(self) -> int:
+        return sum(self._sizes)
+
+
+    def push(self, command):
+        command.redo()
+        del self._commands[self._index:]
+        del self._sizes[self._index:]
+
+        pushTime, lastPush = time.monotonic(), self._lastPush
+        self._lastPush = pushTime
+        if lastPush is not None and pushTime - lastPush <= self.MERGE_WINDOW and self._merge(command):
+            if self.journal is not None:
+                self.journal.pushed(self._commands[self._index - 1], merged=True)
+            self._emitChanged()
+            return
+
+        self._commands.append(command)
+        self._sizes.append(self._estimate(command))
+        self._index = len(self._commands)
+        self._trim()
+        if self.journal is not None:
+            self.journal.pushed(command)
+        self._emitChanged()
+
+
+    def breakMerge(self):
+        '''
+        The next push starts a new step
+        '''
+        self._lastPush = None
+
+
+    def undo(self):
+        if not self.canUndo():
+            return
+        self._lastPush = None
+        self._index -= 1
+        self._load(self._index).undo()
+        self._indexMoved()
+
+
+    def redo(self):
+        if not self.canRedo():
+            return
+        self._lastPush = None
+        self._load(self._index).redo()
+        self._index += 1
+        self._indexMoved()
+
+
+    def setIndex(self, index: int):
+        index = max(0, min(index, len(self._commands)))
+        self._lastPush = None
+        while self._index > index:
+            self._index -= 1
+            self._load(self._index).undo()
+        while self._index < index:
+            self._load(self._index).redo()
+            self._index += 1
+        self._indexMoved()
+
+
+    def restore(self, undoDatas: 'list[dict]', index: int):
+        '''
+        Set the history from saved data (PickerView.getUndoData), the picker is already in the state of the index
+        Nothing is deserialized or run here, see _load
+        '''
+        self._commands = [RecordCommand(data, self.commandText(data)) for data in undoDatas]
+        self._sizes    = [0] * len(self._commands)
+        self._index    = max(0, min(index, len(self._commands)))
+        self._lastPush = None
+        self._estimateSizes()
+        self._trim()
+        self._emitChanged()
+
+
+    def clear(self):
+        self._commands.clear()
+        self._sizes.clear()
+        self._index = 0
+        self._lastPush = None
+        self._spillFile.clear()
+        self._emitChanged()
+
+    # internal -------------------------------------------------------------------
+    def _estimate(self, command) -> int:
+        '''
+        Sizes are only needed, and computed, with a memory budget: no serialization on push otherwise
+        '''
+        return estimateSize(command) if self._byteBudget > 0 else 0
+        
+        
+    def _estimateSizes(self):
+        '''
+        Sizes of the commands pushed or restored without a memory budget, only computed once a budget is set
+        '''
+        if self._byteBudget <= 0:
+            return
+        for index, command in enumerate(self._commands):
+            if self._sizes[index] or isinstance(command, SpilledCommand):
+                continue
+            if isinstance(command, RecordCommand):
+                self._sizes[index] = len(json.dumps(command.data, default=str))
+            else:
+                self._sizes[index] = estimateSize(command)
+
+
+    def _merge(self, command) -> bool:
+        if self._index == 0 or command.id() == -1:
+            return False
+        top = self._commands[self._index - 1]
+        if isinstance(top, CommandStub) or top.id() != command.id() or not top.mergeWith(command):
+            return False
+        self._sizes[self._index - 1] = self._estimate(top)
+        return True
+
+
+    def _load(self, index: int):
+        command = self._commands[index]
+        if isinstance(command, CommandStub):
+            command = self._commands[index] = self.commandFromData(command.get())
+            self._sizes[index] = self._estimate(command) # trimmed again once the index moved, see _indexMoved
+        return command
+
+
+    def _dropBottom(self):
+        del self._commands[0]
+        del self._sizes[0]
+        self._index -= 1
+
+
+    def _trim(self):
+        '''
+        Count limit first, in place: the farthest redo steps are dropped, then the oldest done commands
+        Then the byte budget: the oldest commands are spilled (the newest one always stays) or dropped
+        '''
+        if self._undoLimit > 0 and len(self._commands) > self._undoLimit:
+            keep = max(self._undoLimit, self._index)
+            del self._commands[keep:]
+            del self._sizes[keep:]
+            while len(self._commands) > self._undoLimit:
+                self._dropBottom()
+
+        if self._byteBudget <= 0:
+            return
+        usage = sum(self._sizes)
+        if self._spill:
+            for index in range(len(self._commands) - 1):
+                if usage <= self._byteBudget:
+                    break
+                command = self._commands[index]
+                if isinstance(command, SpilledCommand):
+                    continue
+                offset, size = self._spillFile.write(command.get())
+                self._commands[index] = SpilledCommand(self._spillFile, offset, size, command.text())
+                usage -= self._sizes[index]
+                self._sizes[index] = 0
+        else:
+            while usage > self._byteBudget and self._index > 1:
+                usage -= self._sizes[0]
+                self._dropBottom()
+
+
+    def _indexMoved(self):
+        self._trim() # the commands loaded by undo / redo may exceed the budget again
+        if self.journal is not None:
+            self.journal.indexMoved(self._index)
+        self._emitChanged()
+
+
+    def _emitChanged(self):
+        self.indexChanged.emit(self._index)
+        self.canUndoChanged.emit(self.canUndo())
+        self.canRedoChanged.emit(self.canRedo())
+        self.undoTextChanged.emit(self.undoText())
+        self.redoTextChanged.emit(self.redoText())
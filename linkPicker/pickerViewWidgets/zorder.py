@@ -1,39 +1,227 @@
 
-def raiseSelectedButtons(selectedButtons: 'list[PickerButton]') -> None:                    
-    for button in selectedButtons:
-        button.raise_()
-             
-        
-def lowerSelectedButtons(selectedButtons: 'list[PickerButton]') -> None:
-    for button in selectedButtons:
-        button.lower()
-        
-        
-def __raiseButtons(selectedButtons: 'list[PickerButton]') -> None:
-    for button in selectedButtons:
-        button.raise_()
-      
-        
-def moveSelectedButtonsUp(selectedButtons: 'list[PickerButton]', 
-                          allButtons     : 'list[PickerButton]') -> None:
+
+class ButtonsZOrder(list):
+    '''
+    Picker buttons kept in stacking order (bottom -> top)
+
+    Every button's z-rank is cached, so index() and "in" are O(1) instead of a list scan
+    Every mutator keeps the cache right: the ones that only move a span update its ranks in place (remove / raise / lower),
+    the others mark it dirty and the ranks are rebuilt lazily on the next lookup
+    '''
+    def __init__(self, buttons=()):
+        super().__init__(buttons)
+        self._ranks = {}
+        self._dirty = True
+
+
+    def _updateRanks(self):
+        if not self._dirty:
+            return
+        self._ranks = {button: rank for rank, button in enumerate(self)}
+        self._dirty = False
+
+
+    def rank(self, button) -> int:
+        self._updateRanks()
+        return self._ranks[button]
+
+
+    def index(self, button, *args) -> int:
+        try:
+            return self.rank(button)
+        except KeyError:
+            raise ValueError(f'{button} is not in the z-order list')
+
+
+    def __contains__(self, button) -> bool:
+        self._updateRanks()
+        return button in self._ranks
+
+
+    def _setRanks(self, start: int, stop: int = None):
+        '''
+        Only the ranks in [start, stop) moved, the rest of the cache stays valid
+        '''
+        if self._dirty:
+            return
+        stop = len(self) if stop is None else stop
+        for rank in range(start, stop):
+            self._ranks[list.__getitem__(self, rank)] = rank
+
+
+    def append(self, button):
+        super().append(button)
+        if not self._dirty:
+            self._ranks[button] = len(self) - 1
+
+
+    def extend(self, buttons):
+        for button in buttons:
+            self.append(button)
+
+
+    def __iadd__(self, buttons):
+        self.extend(buttons)
+        return self
+
+
+    def remove(self, button):
+        index = self.index(button)
+        super().__delitem__(index)
+        del self._ranks[button]
+        self._setRanks(index)
+
+
+    def insert(self, index, button):
+        super().insert(index, button)
+        self._dirty = True
+
+
+    def pop(self, index=-1):
+        button = super().pop(index)
+        self._dirty = True
+        return button
+
+
+    def clear(self):
+        super().clear()
+        self._ranks.clear()
+        self._dirty = False
+
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._dirty = True
+
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._dirty = True
+
+
+    def __imul__(self, count):
+        super().__imul__(count)
+        self._dirty = True
+        return self
+
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._dirty = True
+
+
+    def reverse(self):
+        super().reverse()
+        self._dirty = True
+
+    # ------------------------------------------------------------------------
+    def _swap(self, lowerIndex: int):
+        '''
+        Swap the buttons at lowerIndex and lowerIndex + 1, only the two widgets involved are restacked
+        '''
+        lower, upper = list.__getitem__(self, lowerIndex), list.__getitem__(self, lowerIndex + 1)
+        list.__setitem__(self, lowerIndex, upper)
+        list.__setitem__(self, lowerIndex + 1, lower)
+        if not self._dirty:
+            self._ranks[upper] = lowerIndex
+            self._ranks[lower] = lowerIndex + 1
+        upper.stackUnder(lower)
+
+
+    def moveUp(self, buttons: 'list[PickerButton]') -> None:
+        for button in reversed(buttons):
+            index = self.rank(button)
+            if index == len(self) - 1:
+                continue
+            self._swap(index)
+
+
+    def moveDown(self, buttons: 'list[PickerButton]') -> None:
+        for button in buttons:
+            index = self.rank(button)
+            if index == 0:
+                continue
+            self._swap(index - 1)
+
+
+    def raiseButtons(self, buttons: 'list[PickerButton]') -> None:
+        '''
+        Move the buttons to the top, the last one ends up topmost
+        Only the span above the lowest raised button is rewritten
+        '''
+        moved = list(dict.fromkeys(button for button in buttons if button in self))
+        if not moved:
+            return
+        first    = min(self.rank(button) for button in moved)
+        movedSet = set(moved)
+        span     = [button for button in list.__getitem__(self, slice(first, None)) if button not in movedSet]
+        list.__setitem__(self, slice(first, None), span + moved)
+        self._setRanks(first)
+        for button in moved:
+            button.raise_()
+
+
+    def lowerButtons(self, buttons: 'list[PickerButton]') -> None:
+        '''
+        Move the buttons to the bottom, the last one ends up bottommost
+        Only the span below the highest lowered button is rewritten
+        '''
+        moved = list(dict.fromkeys(button for button in buttons if button in self))
+        if not moved:
+            return
+        last     = max(self.rank(button) for button in moved) + 1
+        movedSet = set(moved)
+        span     = [button for button in list.__getitem__(self, slice(0, last)) if button not in movedSet]
+        list.__setitem__(self, slice(0, last), moved[::-1] + span)
+        self._setRanks(0, last)
+        for button in moved:
+            button.lower()
+
+
+    def restore(self, buttons: 'list[PickerButton]') -> None:
+        '''
+        Restack to the given order (e.g. a cached z-order), buttons missing from it keep their relative order on top
+        Only the span between the first and the last changed rank is restacked
+        '''
+        order = [button for button in buttons if button in self]
+        orderSet = set(order)
+        order.extend(button for button in self if button not in orderSet)
+
+        changed = [index for index, button in enumerate(order) if list.__getitem__(self, index) is not button]
+        if not changed:
+            return
+        first, last = changed[0], changed[-1]
+
+        for index in range(last, first - 1, -1):
+            if index == len(order) - 1:
+                order[index].raise_()
+            else:
+                order[index].stackUnder(order[index + 1])
+
+        list.__setitem__(self, slice(first, last + 1), order[first:last + 1])
+        self._dirty = True
+
+
+def raiseSelectedButtons(selectedButtons: 'list[PickerButton]',
+                         allButtons     : ButtonsZOrder) -> None:
+    allButtons.raiseButtons(selectedButtons)
+
+
+def lowerSelectedButtons(selectedButtons: 'list[PickerButton]',
+                         allButtons     : ButtonsZOrder) -> None:
+    allButtons.lowerButtons(selectedButtons)
+
+
+def moveSelectedButtonsUp(selectedButtons: 'list[PickerButton]',
+                          allButtons     : ButtonsZOrder) -> None:
     if len(allButtons) <= 1 or not selectedButtons:
         return
-    for button in reversed(selectedButtons):
-        index = allButtons.index(button) 
-        if index == len(allButtons) - 1: 
-            continue 
-        allButtons[index], allButtons[index + 1] = allButtons[index + 1], allButtons[index]
-    __raiseButtons(allButtons)
+    allButtons.moveUp(selectedButtons)
 
 
-def moveSelectedButtonsDown(selectedButtons: 'list[PickerButton]', 
-                            allButtons     : 'list[PickerButton]') -> None:
+def moveSelectedButtonsDown(selectedButtons: 'list[PickerButton]',
+                            allButtons     : ButtonsZOrder) -> None:
     if len(allButtons) <= 1 or not selectedButtons:
         return
-    for button in selectedButtons:
-        index = allButtons.index(button)
-        if index == 0: 
-            continue
-        allButtons[index], allButtons[index - 1] = allButtons[index - 1], allButtons[index]
-    __raiseButtons(allButtons)
-    
+    allButtons.moveDown(selectedButtons)
+
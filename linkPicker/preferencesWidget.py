@@ -61,6 +61,8 @@ class GeneralWidget(QtWidgets.QWidget):
         pickerLayout.addWidget(self.viewModeComboBox, 0, 1)
         pickerLayout.addWidget(self.ZoomSliderLabel, 1, 0)
         pickerLayout.addWidget(self.ZoomSlider, 1, 1)
+        pickerLayout.addWidget(self.selectionSyncLatencyLabel, 2, 0)
+        pickerLayout.addWidget(self.selectionSyncLatencyEdit, 2, 1)
         
         pickerGroupBox = createGroupbox('Picker', pickerLayout)
         
@@ -109,6 +111,12 @@ class GeneralWidget(QtWidgets.QWidget):
         self.ZoomSlider.setObjectName('ZoomSlider')
         self.ZoomSlider.setRange(1, 100)
         self.ZoomSlider.setValue(1)
+        
+        self.selectionSyncLatencyLabel = QtWidgets.QLabel('Selection Sync (ms):')
+        self.selectionSyncLatencyLabel.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignBottom)
+        self.selectionSyncLatencyEdit = widgets.NumberLineEdit('int', 0, 1, 0, 1000)
+        self.selectionSyncLatencyEdit.setFixedWidth(100)
+        self.selectionSyncLatencyEdit.setToolTip('Delay before the buttons follow a selection made in Maya, selections made in between are merged')
 
 
     def _createConnections(self):
@@ -130,7 +138,8 @@ class GeneralWidget(QtWidgets.QWidget):
 
                 
                 'viewModeComboBox'     : self.viewModeComboBox.currentIndex(),
-                'ZoomSlider'           : self.ZoomSlider.value()}
+                'ZoomSlider'           : self.ZoomSlider.value(),
+                'selectionSyncLatency' : self.selectionSyncLatencyEdit.get()}
         
     def set(self, data):
         self.showNamespaceCheckBox.setChecked(data['showNamespaceCheckBox'])
@@ -145,6 +154,7 @@ class GeneralWidget(QtWidgets.QWidget):
         self.viewModeComboBox.setCurrentIndex(data['viewModeComboBox'])
         self.viewModeComboBox.blockSignals(False)
         self.ZoomSlider.setValue(data['ZoomSlider'])
+        self.selectionSyncLatencyEdit.set(data.get('selectionSyncLatency', 0))
 
 
 class SettingsWidget(QtWidgets.QWidget):
@@ -171,6 +181,9 @@ class SettingsWidget(QtWidgets.QWidget):
         gridLayout.addWidget(self.finiteBut, 1, 2)
         gridLayout.addWidget(self.queueSizeLabel, 2, 0)
         gridLayout.addWidget(self.undoLenEdit, 2, 1)
+        gridLayout.addWidget(self.undoMemoryLabel, 3, 0)
+        gridLayout.addWidget(self.undoMemoryEdit, 3, 1)
+        gridLayout.addWidget(self.undoSpillCheckBox, 4, 1, 1, 2)
         gridLayout.setColumnStretch(3, 1)
 
         undoGroupBox = createGroupbox('Undo', gridLayout)
@@ -232,6 +245,14 @@ class SettingsWidget(QtWidgets.QWidget):
         
         self.undoLenEdit = widgets.NumberLineEdit('int', 20, 1, 1, 9999)
         self.undoLenEdit.setFixedWidth(100)
+        
+        self.undoMemoryLabel = QtWidgets.QLabel('Memory (MB):')
+        self.undoMemoryLabel.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignBottom)
+        self.undoMemoryEdit = widgets.NumberLineEdit('int', 0, 1, 0, 4096)
+        self.undoMemoryEdit.setFixedWidth(100)
+        self.undoMemoryEdit.setToolTip('Memory kept by the undo history of each tab, 0 for no limit')
+        self.undoSpillCheckBox = QtWidgets.QCheckBox('Move older steps to a temp file')
+        self.undoSpillCheckBox.setToolTip('Steps over the memory limit are kept on disk instead of being dropped')
         # file
         self.includeUndoDataCheckBox = QtWidgets.QCheckBox('Carry undo data when saving the file')
         self.includeUndoDataCheckBox.setChecked(False)
@@ -268,7 +289,9 @@ class SettingsWidget(QtWidgets.QWidget):
     def get(self):
         return {'undo'      : self.onBut.isChecked(),
                 'queue'     : self.undoLenEdit.get() if self.finiteBut.isChecked() else 0,
-                'undoToFile': self.includeUndoDataCheckBox.isChecked()}
+                'undoToFile': self.includeUndoDataCheckBox.isChecked(),
+                'undoMemory': self.undoMemoryEdit.get(),
+                'undoSpill' : self.undoSpillCheckBox.isChecked()}
         
     def set(self, data):
         self.onBut.setChecked(True) if data['undo'] else self.offBut.setChecked(True)
@@ -283,6 +306,8 @@ class SettingsWidget(QtWidgets.QWidget):
             self.lockQueueAttr(False)
 
         self.includeUndoDataCheckBox.setChecked(data['undoToFile'])
+        self.undoMemoryEdit.set(data.get('undoMemory', 0))
+        self.undoSpillCheckBox.setChecked(data.get('undoSpill', False))
  
  
 class ListWidget(QtWidgets.QListWidget):
@@ -429,7 +454,10 @@ class PreferencesWidget(QtWidgets.QDialog):
     def updateConfig(self):
         self.cacheData = self.get() # update cacheData
         
-        self.configManager.set(self.cacheData)
+        # keep the sections that have no widget (e.g. mirror rules)
+        data = self.configManager.get()
+        data.update(self.cacheData)
+        self.configManager.set(data)
         self.preferencesUpdated.emit()
         self.close()
         
@@ -0,0 +1,145 @@
+'''
+Picker saves off the main thread
+
+The main thread only takes a snapshot (PickerView.getSnapshot: a copy of the document, no encoding),
+one worker thread builds the data, encodes it and writes the file as a temp file renamed over the old one,
+so a crash or a full disk never leaves half a picker file
+Maya is main thread only: the results come back through maya.utils.executeDeferred, the meta node's
+setAttr of the encoded string runs there too
+Each scene node write holds every picker, a newer one replaces a write that is not applied yet
+Before Maya saves the scene the pending writes are applied (flush, see addCallbacks)
+'''
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import maya.utils
+import maya.api.OpenMaya as om2
+
+from . import metaNode
+
+
+_EXECUTOR     = ThreadPoolExecutor(max_workers=1, thread_name_prefix='linkPickerSave') # one thread: writes stay in order
+_SCENE_WRITE  = None # newest SceneWrite not applied yet
+_CALLBACK_IDS = []
+_WRITTEN      = {} # file -> sha1 of the bytes saveFile last wrote to it
+
+
+def writeText(filePath: str, text: str):
+    raw     = text.encode('utf-8')
+    tmpPath = f'{filePath}.tmp'
+    _WRITTEN[filePath] = hashlib.sha1(raw).hexdigest() # before the rename, the file watcher may fire right after it
+    try:
+        with open(tmpPath, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmpPath, filePath)
+    except OSError:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+
+
+def isOwnWrite(filePath: str) -> bool:
+    '''
+    The file holds what saveFile last wrote to it, a change of the file is our own save
+    '''
+    written = _WRITTEN.get(filePath)
+    if written is None:
+        return False
+    try:
+        with open(filePath, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest() == written
+    except OSError:
+        return False
+
+
+def saveFile(document: 'PickerDocument', filePath: str, onDone: 'callable'):
+    '''
+    Write the document to an .lpk file, onDone(error) is called on the main thread, error is None on success
+    onDone always runs, whatever the job raised
+    '''
+    def job():
+        error = None
+        try:
+            data = document.toData()
+            if data['tabName'].endswith('*'):
+                data['tabName'] = data['tabName'][:-1]
+            writeText(filePath, json.dumps(data, indent=4))
+        except Exception as e:
+            error = e
+        finally:
+            maya.utils.executeDeferred(onDone, error)
+
+    return _EXECUTOR.submit(job)
+
+
+class SceneWrite(object):
+    '''
+    Content of the scene's meta node: the pickers' documents and the data of the referenced meta nodes
+    '''
+    def __init__(self, documents: 'list[PickerDocument]', extraData: list):
+        self.documents = documents
+        self.extraData = extraData
+        self.text      = None
+        self.error     = None
+        self.encoded   = threading.Event()
+
+
+    def encode(self):
+        try:
+            data = [document.toData() for document in self.documents]
+            data.extend(self.extraData)
+            self.text = metaNode.encode(data)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.encoded.set()
+            maya.utils.executeDeferred(_applySceneWrite, self)
+
+
+def saveSceneNode(documents: 'list[PickerDocument]', extraData: list):
+    '''
+    Encode the pickers on the worker, the meta node is merged and set on the main thread afterwards
+    '''
+    global _SCENE_WRITE
+    write = _SCENE_WRITE = SceneWrite(documents, extraData)
+    _EXECUTOR.submit(write.encode)
+
+
+def _applySceneWrite(write: SceneWrite):
+    global _SCENE_WRITE
+    if write is not _SCENE_WRITE:
+        return # replaced by a newer write, or already applied by flush
+    _SCENE_WRITE = None
+    if write.error is not None:
+        om2.MGlobal.displayError(f'Error occurred while saving the pickers to the scene: {write.error}')
+        return
+    metaNode.mergeNodes().setRaw(write.text)
+
+
+def flush(*args):
+    '''
+    Wait for the queued saves and set the meta node now, instead of on the next idle
+    '''
+    _EXECUTOR.submit(lambda: None).result()
+    write = _SCENE_WRITE
+    if write is not None:
+        write.encoded.wait()
+        _applySceneWrite(write)
+
+
+def addCallbacks() -> 'list[int]':
+    '''
+    A scene saved while a write is pending gets the new picker data
+    The ids are returned so the owner can remove them with om2.MMessage.removeCallback
+    '''
+    _CALLBACK_IDS[:] = [om2.MSceneMessage.addCallback(om2.MSceneMessage.kBeforeSave, flush)]
+    return list(_CALLBACK_IDS)
+
+
+def removeCallbacks():
+    _CALLBACK_IDS.clear()
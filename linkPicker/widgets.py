@@ -104,7 +104,8 @@ class MyTabWidget(QtWidgets.QTabWidget):
     newTab     = QtCore.Signal()
     tabCount   = QtCore.Signal(int)
     
-    duplicateTriggered = QtCore.Signal(int)
+    duplicateTriggered         = QtCore.Signal(int)
+    duplicateWithUndoTriggered = QtCore.Signal(int)
     openClicked   = QtCore.Signal()
     
     def __init__(self, parent=None):
@@ -142,9 +143,11 @@ class MyTabWidget(QtWidgets.QTabWidget):
         # ---------------------------------------------------
         self.TableMenu = QtWidgets.QMenu(self)
         self.duplicateAction   = Action('Duplicate Tab',  self.TableMenu)
+        self.duplicateUndoAction = Action('Duplicate Tab With Undo', self.TableMenu)
         self.closeAllAction    = Action('Close All Tabs', self.TableMenu)
         self.closeOthersAction = Action('Close Others',   self.TableMenu)
         self.TableMenu.addAction(self.duplicateAction)
+        self.TableMenu.addAction(self.duplicateUndoAction)
         self.TableMenu.addSeparator()
         self.TableMenu.addAction(self.closeAllAction)
         self.TableMenu.addAction(self.closeOthersAction)
@@ -158,6 +161,7 @@ class MyTabWidget(QtWidgets.QTabWidget):
         self.tabBarDoubleClicked.connect(self._renameTab)
         
         self.duplicateAction.triggered.connect(lambda: self.duplicateTriggered.emit(self.duplicateAction.data()))
+        self.duplicateUndoAction.triggered.connect(lambda: self.duplicateWithUndoTriggered.emit(self.duplicateAction.data()))
         self.closeAllAction.triggered.connect(partial(self._closeAllTab, showWarning=True))
         self.closeOthersAction.triggered.connect(self._closeOthers)
         
@@ -299,6 +303,8 @@ class MyTabWidget(QtWidgets.QTabWidget):
                 return 
  
         widget = self.widget(index)  
+        if hasattr(widget, 'journal'):
+            widget.journal.discard() # closed on purpose, nothing to recover
         self.removeTab(index)
         widget.setParent(None)
         widget.deleteLater()
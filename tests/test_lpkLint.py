@@ -0,0 +1,44 @@
+import random
+import unittest
+
+from linkPicker import lpkLint
+
+
+def contains(outer: tuple, inner: tuple) -> bool:
+    return (outer[0] <= inner[0] and outer[1] <= inner[1]
+            and outer[0] + outer[2] >= inner[0] + inner[2] and outer[1] + outer[3] >= inner[1] + inner[3])
+
+
+class CoveredButtonsTest(unittest.TestCase):
+
+    def test_same_left_edge_and_width(self):
+        rects = [(0, 0, 40, 40, 'A'), (0, 0, 40, 80, 'B')]
+        self.assertEqual(lpkLint.findCoveredButtons(rects), [('A', 'B')])
+        self.assertEqual(lpkLint.findCoveredButtons(rects[::-1]), [('A', 'B')])
+
+
+    def test_identical_buttons(self):
+        self.assertEqual(lpkLint.findCoveredButtons([(5, 5, 20, 20, 'A'), (5, 5, 20, 20, 'B')]), [('B', 'A')])
+
+
+    def test_closed_rects_do_not_cover(self):
+        rects = [(0, 0, 10, 100, 'left'), (20, 10, 10, 10, 'right'), (0, 50, 5, 5, 'inside')]
+        self.assertEqual(lpkLint.findCoveredButtons(rects), [('inside', 'left')])
+
+
+    def test_matches_pairwise_check(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            rects = [(rng.randint(0, 50), rng.randint(0, 50), rng.randint(1, 30), rng.randint(1, 30), str(index))
+                     for index in range(40)]
+            rects = list({rect[:4]: rect for rect in rects}.values()) # identical rects are covered by either one
+            expected = {inner[4] for inner in rects for outer in rects if outer is not inner and contains(outer, inner)}
+
+            pairs = lpkLint.findCoveredButtons(rects)
+            byId  = {rect[4]: rect for rect in rects}
+            self.assertEqual({coveredId for coveredId, _ in pairs}, expected)
+            self.assertTrue(all(contains(byId[coveringId], byId[coveredId]) for coveredId, coveringId in pairs))
+
+
+if __name__ == '__main__':
+    unittest.main()
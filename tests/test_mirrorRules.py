@@ -0,0 +1,48 @@
+import unittest
+
+from linkPicker import mirrorRules
+
+
+class MirrorRulesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = mirrorRules.MirrorRules()
+
+
+    def test_markers(self):
+        for name, mirrorName in (('L_arm_ctrl', 'R_arm_ctrl'), ('arm_R', 'arm_L'), ('arm_l1', 'arm_r1'),
+                                 ('leftArm', 'rightArm'), ('armLeft', 'armRight'), ('LEFT_arm', 'RIGHT_arm'),
+                                 ('lt_leg', 'rt_leg')):
+            self.assertEqual(self.rules.mirrorName(name), mirrorName)
+            self.assertEqual(self.rules.mirrorName(mirrorName), name)
+
+
+    def test_markers_only_match_whole_words(self):
+        self.assertEqual(self.rules.mirrorName('Leg_Right'), 'Leg_Left') # not 'Reg_Right' or 'Leg_Light'
+        self.assertEqual(self.rules.mirrorName('Lid_ctrl'), 'Lid_ctrl')
+        self.assertEqual(self.rules.mirrorName('shoulder'), 'shoulder')
+        self.assertEqual(self.rules.mirrorName('spine_ctrl'), 'spine_ctrl')
+
+
+    def test_namespaces_and_parents_are_kept(self):
+        self.assertEqual(self.rules.mirrorName('L:grp|L:L_arm'), 'L:grp|L:R_arm')
+
+
+    def test_regex_rules_come_first(self):
+        rules = mirrorRules.MirrorRules({'regex'  : [[r'^(\w+)_lf$', r'\1_rt'], [r'^(\w+)_rt$', r'\1_lf']],
+                                         'markers': [['L', 'R']]})
+        self.assertEqual(rules.mirrorName('arm_lf'), 'arm_rt')
+        self.assertEqual(rules.mirrorName('L_arm_rt'), 'L_arm_lf') # the first matching rule wins
+        self.assertEqual(rules.mirrorName('L_arm'), 'R_arm')
+
+
+    def test_cached_rules(self):
+        mirrorRules.clearRules()
+        rules = mirrorRules.getMirrorRules()
+        self.assertIs(mirrorRules.getMirrorRules(), rules)
+        mirrorRules.clearRules()
+        self.assertIsNot(mirrorRules.getMirrorRules(), rules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from linkPicker import path
+
+
+class NodePathTest(unittest.TestCase):
+
+    def test_name_in_namespace(self):
+        nodePath = path.NodePath('char1:root|char1:arm_ctrl')
+        self.assertEqual(nodePath.name(), 'char1:root|char1:arm_ctrl')
+        self.assertEqual(nodePath.name('char2'), 'char2:root|char2:arm_ctrl')
+        self.assertEqual(nodePath.name(''), 'root|arm_ctrl')
+
+
+    def test_matches_updateNamespaceWithOptional(self):
+        for name in ('arm_ctrl', 'a:b:arm_ctrl', 'grp|a:arm_ctrl', 'ns:grp|arm_ctrl'):
+            for namespace in ('', 'char', 'char:sub'):
+                self.assertEqual(path.NodePath(name).name(namespace),
+                                 path.updateNamespaceWithOptional([name], namespace)[0])
+
+
+class NodeTableTest(unittest.TestCase):
+
+    def test_names_are_interned_once(self):
+        nodeTable = path.NodeTable(['arm', 'leg'])
+        self.assertEqual(nodeTable.ids(['leg', 'hand', 'arm']), [1, 2, 0])
+        self.assertEqual(nodeTable.get(), ['arm', 'leg', 'hand'])
+        self.assertEqual(nodeTable.get(2), ['hand'])
+
+
+    def test_names_in_namespace(self):
+        nodeTable = path.NodeTable(['rig:arm', 'rig:grp|rig:leg'])
+        self.assertEqual(nodeTable.names([1, 0], 'char'), ['char:grp|char:leg', 'char:arm'])
+        self.assertEqual(nodeTable.names([0]), ['rig:arm'])
+
+
+    def test_button_data_without_node_ids(self):
+        nodeTable = path.NodeTable(['arm'])
+        self.assertEqual(nodeTable.buttonNodeIds({'nodeIds': [0]}), [0])
+        self.assertEqual(nodeTable.buttonNodeIds({'oldNodes': ['leg'], 'nodes': ['ns:leg']}), [1])
+        self.assertEqual(nodeTable.buttonNodeIds({'nodes': ['arm']}), [0])
+
+
+    def test_copy_is_independent(self):
+        nodeTable = path.NodeTable(['arm'])
+        copy      = nodeTable.copy()
+        copy.add('leg')
+        self.assertEqual((len(nodeTable), len(copy)), (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import json
+import tempfile
+import unittest
+
+from linkPicker import pickerBatch, pickerModel
+
+
+class PickerBuilderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.builder = pickerBatch.PickerBuilder('Body')
+
+
+    def nodes(self, record: pickerModel.ButtonRecord) -> 'list[str]':
+        return self.builder.document.nodes(record)
+
+
+    def test_add_buttons_with_defaults(self):
+        arm, both = self.builder.addButtons([{'nodes': ['L_arm_ctrl'], 'x': 10, 'y': 20, 'color': (255, 0, 0)},
+                                             {'nodes': ['L_arm_ctrl', 'L_hand_ctrl']}])
+        self.assertEqual((arm.x, arm.y, arm.color, arm.scaleX), (10.0, 20.0, (255, 0, 0), 40))
+        self.assertEqual(both.textColor, pickerBatch.DEFAULT_BUTTON['textColor'])
+        self.assertEqual(both.nodeIds, (0, 1)) # the shared node is in the table once
+        self.assertTrue(both.isMaxButton)
+
+
+    def test_bulk_add(self):
+        records = self.builder.addButtons([{'nodes': [f'ctrl{index % 100}'], 'x': index} for index in range(5000)])
+        self.assertEqual((len(self.builder.document), len(self.builder.document.nodeTable)), (5000, 100))
+        self.assertEqual(self.nodes(records[-1]), ['ctrl99'])
+
+
+    def test_move_and_style(self):
+        records = self.builder.addButtons([{'nodes': ['a']}, {'nodes': ['b'], 'x': 5}])
+        self.builder.moveButtons(records, 10, -2)
+        self.builder.styleButtons(records, scaleX=1000, scaleY=1, labelText='x')
+        self.assertEqual([(record.x, record.y) for record in records], [(10.0, -2.0), (15.0, -2.0)])
+        self.assertEqual({(record.scaleX, record.scaleY, record.labelText) for record in records}, {(400, 10, 'x')})
+
+
+    def test_command_button(self):
+        record = self.builder.addCommandButton('print(1)', name='Reset')
+        self.builder.styleButtons([record], labelText='Reset all')
+        self.assertTrue(record.isCmdButton)
+        self.assertEqual(record.code, {'name': 'Reset all', 'type': 'Python', 'code': 'print(1)'})
+
+
+    def test_namespaces(self):
+        record = self.builder.addButton(['rig:grp|rig:arm'])
+        self.builder.setNamespace('char1')
+        self.assertEqual(self.nodes(record), ['char1:grp|char1:arm'])
+
+        self.builder.setNamespace('') # strips the namespaces for good
+        self.assertEqual(self.nodes(record), ['grp|arm'])
+        self.builder.setNamespace(':')
+        self.assertEqual(self.nodes(record), ['grp|arm'])
+
+
+    def test_mirror_without_maya(self):
+        records = self.builder.addButtons([{'nodes': ['ns:L_arm_ctrl'], 'x': 0, 'scaleX': 20},
+                                           {'nodes': ['ns:L_arm_ctrl', 'ns:spine_ctrl'], 'x': 100}])
+        mirrored = self.builder.mirrorButtons(records, axisX=60)
+
+        self.assertEqual([self.nodes(record) for record in mirrored], [['ns:R_arm_ctrl'], ['ns:R_arm_ctrl', 'ns:spine_ctrl']])
+        self.assertEqual([record.x for record in mirrored], [100.0, -20.0])
+
+
+    def test_save_same_layout_as_the_ui(self):
+        self.builder.addButton(['arm'], x=1, y=2)
+        with tempfile.TemporaryDirectory() as tempDir:
+            filePath = os.path.join(tempDir, 'body.lpk')
+            self.builder.save(filePath)
+            with open(filePath, 'r') as f:
+                data = json.load(f)
+            loaded = pickerBatch.PickerBuilder.fromFile(filePath)
+
+        self.assertEqual(data['cacheSavePath'], filePath)
+        self.assertEqual(set(data), {'tabName', 'origSceneScale', 'sceneScale', 'buttonsParentPos', 'midView', 'viewOffset',
+                                     'namespace', 'cacheSavePath', 'pickerId', 'nodeTable', 'buttons', 'undos', 'backgroundInfo'})
+        self.assertEqual(loaded.get(), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import json
+import marshal
+import hashlib
+import tempfile
+import unittest
+
+from linkPicker import pickerCache
+
+
+class PickerCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir  = tempfile.TemporaryDirectory()
+        self.cacheDir = pickerCache.CACHE_DIR
+        pickerCache.CACHE_DIR = os.path.join(self.tempDir.name, 'cache')
+        pickerCache._FILE_HASHES.clear()
+
+        self.data     = {'tabName': 'body', 'buttons': [{'buttonId': 'a', 'localPos': [1.5, 2]}], 'nodeTable': ['arm']}
+        self.filePath = self.write(self.data)
+
+
+    def tearDown(self):
+        pickerCache.CACHE_DIR = self.cacheDir
+        pickerCache._FILE_HASHES.clear()
+        self.tempDir.cleanup()
+
+
+    def write(self, data: dict, name: str = 'body.lpk') -> str:
+        filePath = os.path.join(self.tempDir.name, name)
+        with open(filePath, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        return filePath
+
+
+    def entryPath(self, filePath: str) -> str:
+        with open(filePath, 'rb') as f:
+            return pickerCache._entryPath(hashlib.sha1(f.read()).hexdigest())
+
+
+    def test_hit_skips_parsing(self):
+        self.assertEqual(pickerCache.load(self.filePath), self.data)
+        self.assertTrue(os.path.exists(self.entryPath(self.filePath)))
+
+        original, pickerCache.json = pickerCache.json, None # any parsing would fail
+        try:
+            pickerCache._FILE_HASHES.clear()
+            self.assertEqual(pickerCache.load(self.filePath), self.data)
+            # a copy of the file hits the same entry
+            copyPath = os.path.join(self.tempDir.name, 'copy.lpk')
+            with open(self.filePath, 'rb') as src, open(copyPath, 'wb') as dst:
+                dst.write(src.read())
+            self.assertEqual(pickerCache.load(copyPath), self.data)
+        finally:
+            pickerCache.json = original
+
+
+    def test_changed_file_is_parsed_again(self):
+        pickerCache.load(self.filePath)
+        data = dict(self.data, tabName='arms')
+        os.utime(self.write(data), ns=(0, 0)) # a different mtime
+        self.assertEqual(pickerCache.load(self.filePath), data)
+
+
+    def test_bad_entries_are_misses(self):
+        entryPath = self.entryPath(self.filePath)
+        os.makedirs(pickerCache.CACHE_DIR)
+        fileHash  = os.path.basename(entryPath)[:-len(pickerCache.CACHE_SUFFIX)]
+        for content in (b'garbage',
+                        marshal.dumps((pickerCache.CACHE_FORMAT, 'other hash', {'planted': True})),
+                        marshal.dumps((pickerCache.CACHE_FORMAT + 1, fileHash, {'planted': True}))):
+            with open(entryPath, 'wb') as f:
+                f.write(content)
+            pickerCache._FILE_HASHES.clear()
+            self.assertEqual(pickerCache.load(self.filePath), self.data)
+
+
+    def test_trim_removes_the_least_recently_used(self):
+        paths = [self.write(dict(self.data, tabName=str(index)), f'{index}.lpk') for index in range(3)]
+        for index, filePath in enumerate(paths):
+            pickerCache.load(filePath)
+            os.utime(self.entryPath(filePath), (index, index))
+        entrySize = os.path.getsize(self.entryPath(paths[0]))
+
+        pickerCache.trim(entrySize * 2)
+        self.assertEqual([os.path.exists(self.entryPath(filePath)) for filePath in paths], [False, True, True])
+
+        pickerCache.clear()
+        self.assertEqual(os.listdir(pickerCache.CACHE_DIR), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
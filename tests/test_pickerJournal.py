@@ -0,0 +1,218 @@
+import os
+import tempfile
+import unittest
+
+from linkPicker import pickerJournal, pickerModel
+
+
+class Picker(object):
+    '''
+    The parts of PickerView the journal uses
+    '''
+    def __init__(self, document: pickerModel.PickerDocument):
+        self.document      = document
+        self.cacheSavePath = ''
+        self.pickerId      = document.pickerId
+
+    @property
+    def nodeTable(self):
+        return self.document.nodeTable
+
+    def getSnapshot(self, undoToFile=True):
+        return self.document.snapshot()
+
+
+class Command(object):
+    def __init__(self, data: dict):
+        self.data = data
+
+    def get(self) -> dict:
+        return self.data
+
+
+class UndoStack(object):
+    '''
+    Replays CreateButtonsCmd-like data on a document, enough for pickerJournal.replay
+    '''
+    def __init__(self, document: pickerModel.PickerDocument):
+        self.document = document
+        self.commands = []
+        self.index    = 0
+
+    def commandFromData(self, data: dict) -> Command:
+        return Command(data)
+
+    def push(self, command: Command):
+        del self.commands[self.index:]
+        self.commands.append(command)
+        self.redo()
+
+    def redo(self):
+        for buttonData in self.commands[self.index].data['buttonDatas']:
+            self.document.addRecord(pickerModel.ButtonRecord.fromData(buttonData, self.document.nodeTable))
+        self.index += 1
+
+    def undo(self):
+        self.index -= 1
+        for buttonData in self.commands[self.index].data['buttonDatas']:
+            self.document.removeRecord(buttonData['buttonId'])
+
+    def setIndex(self, index: int):
+        while self.index > index:
+            self.undo()
+        while self.index < index:
+            self.redo()
+
+    def canUndo(self) -> bool:
+        return self.index > 0
+
+    def breakMerge(self):
+        pass
+
+
+def createCmd(record: pickerModel.ButtonRecord) -> Command:
+    return Command({'undoClassName': 'CreateButtonsCmd', 'buttonDatas': [record.toData()]})
+
+
+class JournalTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.journalDir, pickerJournal.JOURNAL_DIR = pickerJournal.JOURNAL_DIR, self.tempDir.name
+
+
+    def tearDown(self):
+        pickerJournal.getWriter().flush()
+        pickerJournal.JOURNAL_DIR = self.journalDir
+        self.tempDir.cleanup()
+
+
+    def journal(self, document: pickerModel.PickerDocument = None) -> pickerJournal.PickerJournal:
+        journal = pickerJournal.PickerJournal(Picker(pickerModel.PickerDocument('body') if document is None else document))
+        journal.snapshot()
+        return journal
+
+
+    def read(self, journal: pickerJournal.PickerJournal) -> 'tuple[dict, list[dict]]':
+        pickerJournal.getWriter().flush()
+        return pickerJournal.readJournal(journal.path)
+
+
+class ReplayTest(JournalTestCase):
+
+    def test_events_keep_their_nodes(self):
+        document = pickerModel.PickerDocument('body')
+        unused, arm = document.nodeTable.ids(['unused', 'arm']) # compacting the table would shift arm's id
+        document.addRecord(pickerModel.ButtonRecord('arm', nodeIds=[arm]))
+        picker  = Picker(document)
+        journal = pickerJournal.PickerJournal(picker)
+        journal.snapshot()
+
+        # an edit adding a node the snapshot's table does not have
+        leg    = document.nodeTable.add('leg')
+        record = document.addRecord(pickerModel.ButtonRecord('leg', nodeIds=[leg]))
+        journal.pushed(createCmd(record))
+        pickerJournal.getWriter().flush()
+
+        data, entries = pickerJournal.readJournal(journal.path)
+        recovered     = pickerModel.PickerDocument.fromData(data)
+        pickerJournal.replay(UndoStack(recovered), entries, recovered.nodeTable)
+
+        self.assertEqual({record.buttonId: recovered.nodes(record) for record in recovered},
+                         {'arm': ['arm'], 'leg': ['leg']})
+        self.assertEqual(recovered.toData()['nodeTable'], ['arm', 'leg'])
+
+        journal.discard()
+        pickerJournal.getWriter().flush()
+        self.assertFalse(os.path.exists(pickerJournal.journalPath('', picker.pickerId)))
+
+
+
+    def test_merge_and_index_events(self):
+        document = pickerModel.PickerDocument('body')
+        journal  = self.journal(document)
+        a = document.addRecord(pickerModel.ButtonRecord('a'))
+        journal.pushed(createCmd(a))
+        b = document.addRecord(pickerModel.ButtonRecord('b'))
+        journal.pushed(Command({'undoClassName': 'CreateButtonsCmd', 'buttonDatas': [a.toData(), b.toData()]}), merged=True)
+        journal.indexMoved(0)
+        journal.indexMoved(1)
+
+        data, entries = self.read(journal)
+        recovered     = pickerModel.PickerDocument.fromData(data)
+        undoStack     = UndoStack(recovered)
+        pickerJournal.replay(undoStack, entries, recovered.nodeTable)
+
+        self.assertEqual([entry['type'] for entry in entries], ['push', 'merge', 'index', 'index'])
+        self.assertEqual((len(undoStack.commands), undoStack.index, sorted(recovered.records)), (1, 1, ['a', 'b']))
+
+
+    def test_compaction(self):
+        document = pickerModel.PickerDocument('body')
+        journal  = self.journal(document)
+        compactEvery, pickerJournal.COMPACT_EVERY = pickerJournal.COMPACT_EVERY, 3
+        try:
+            for buttonId in 'abc':
+                journal.pushed(createCmd(document.addRecord(pickerModel.ButtonRecord(buttonId))))
+        finally:
+            pickerJournal.COMPACT_EVERY = compactEvery
+
+        data, entries = self.read(journal)
+        self.assertEqual((entries, [buttonData['buttonId'] for buttonData in data['buttons']]), ([], ['a', 'b', 'c']))
+
+
+class JournalFileTest(JournalTestCase):
+
+    def test_a_cut_line_ends_the_events(self):
+        journal = self.journal()
+        journal.indexMoved(0)
+        pickerJournal.getWriter().flush()
+        with open(journal.path, 'a', encoding='utf-8') as f:
+            f.write('{"type": "ind')
+
+        data, entries = pickerJournal.readJournal(journal.path)
+        self.assertEqual((data['tabName'], entries), ('body', [{'type': 'index', 'index': 0}]))
+
+        path = os.path.join(self.tempDir.name, 'other.journal')
+        with open(path, 'w') as f:
+            f.write('{"type": "push"}\n')
+        with self.assertRaises(ValueError):
+            pickerJournal.readJournal(path)
+
+
+    def test_journals_of_running_sessions_are_not_offered(self):
+        journal = self.journal()
+        pickerJournal.getWriter().flush()
+        self.assertTrue(pickerJournal.isLocked(journal.path))
+        self.assertEqual(pickerJournal.orphanJournals(), [])
+
+        # left by a crashed session: nobody holds its lock
+        crashed = os.path.join(pickerJournal.JOURNAL_DIR, f'picker_rig_1{pickerJournal.JOURNAL_SUFFIX}')
+        with open(crashed, 'w') as f:
+            f.write('{}\n')
+        self.assertEqual(pickerJournal.orphanJournals(), [crashed])
+        pickerJournal.removeJournal(crashed)
+        self.assertFalse(os.path.exists(crashed))
+
+        path = journal.path
+        journal.discard()
+        pickerJournal.getWriter().flush()
+        self.assertEqual((os.path.exists(path), pickerJournal.isLocked(path)), (False, False))
+
+
+    def test_pending_journal_of_a_file(self):
+        filePath = os.path.join(self.tempDir.name, 'body.lpk')
+        with open(filePath, 'w') as f:
+            f.write('{}')
+        path = pickerJournal.journalPath(filePath, None)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write('{}\n')
+
+        self.assertEqual(pickerJournal.pendingJournal(filePath), path)
+        os.utime(path, (0, 0)) # the file was saved after the journal
+        self.assertEqual(pickerJournal.pendingJournal(filePath), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
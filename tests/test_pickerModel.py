@@ -0,0 +1,137 @@
+import json
+import unittest
+
+from linkPicker import pickerModel
+
+
+def pickerData(namespace: str, pickerId: str = 'rig') -> dict:
+    document = pickerModel.PickerDocument('body', pickerId)
+    document.namespace = namespace
+    document.addRecord(pickerModel.ButtonRecord('button', 1.0, 2.0, nodeIds=[document.nodeTable.add('arm')]))
+    return document.toData()
+
+
+def stripGlobalPos(datas: 'list[dict]') -> 'list[dict]':
+    '''
+    packPickers drops the view dependent globalPos of the buttons
+    '''
+    return [dict(data, buttons=[{key: value for key, value in buttonData.items() if key != 'globalPos'}
+                                for buttonData in data['buttons']]) for data in datas]
+
+
+class DocumentTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        document = pickerModel.PickerDocument('body', 'rig')
+        document.namespace  = 'char1'
+        document.sceneScale = 1.5
+        document.viewOffset = (10.0, -5.0)
+        arm, leg = document.nodeTable.ids(['rig:arm', 'rig:leg'])
+        document.addRecord(pickerModel.ButtonRecord('arm', 1.0, 2.0, 30, 20, (255, 0, 0), labelText='A', nodeIds=[arm]))
+        document.addRecord(pickerModel.ButtonRecord('both', 5.0, 6.0, nodeIds=[arm, leg], code={'click': 'print(1)'}))
+
+        data     = document.toData()
+        restored = pickerModel.PickerDocument.fromData(data)
+
+        self.assertEqual(restored.toData(), data)
+        self.assertEqual([record.buttonId for record in restored], ['arm', 'both'])
+        self.assertEqual(restored.nodes(restored.records['both']), ['char1:arm', 'char1:leg'])
+        self.assertTrue(restored.records['both'].isMaxButton and restored.records['both'].isCmdButton)
+
+
+    def test_data_saved_before_the_node_table(self):
+        data = {'tabName': 'old', 'namespace': '',
+                'buttons': [{'buttonId': 'b', 'localPos': [0, 0], 'scaleX': 40, 'scaleY': 40, 'color': [1, 2, 3],
+                             'textColor': [0, 0, 0], 'labelText': '', 'nodes': ['ns:arm']}]}
+        document = pickerModel.PickerDocument.fromData(data)
+
+        self.assertEqual(document.nodeTable.get(), ['ns:arm'])
+        self.assertEqual(document.nodes(document.records['b']), ['ns:arm']) # '' keeps the saved names, like ':'
+        self.assertEqual(document.toData()['buttons'][0]['nodeIds'], [0])
+
+
+    def test_snapshot_shares_nothing_mutable(self):
+        document = pickerModel.PickerDocument('body')
+        document.addRecord(pickerModel.ButtonRecord('b', code={'click': 'a'}))
+        snapshot = document.snapshot()
+        document.records['b'].code['click'] = 'b'
+        document.nodeTable.add('arm')
+        document.backgroundInfo['opacity'] = 0.5
+
+        self.assertEqual(snapshot.records['b'].code, {'click': 'a'})
+        self.assertEqual((len(snapshot.nodeTable), snapshot.backgroundInfo['opacity'], snapshot.pickerId),
+                         (0, 1, document.pickerId))
+
+
+    def test_set_order(self):
+        document = pickerModel.PickerDocument()
+        for buttonId in 'abc':
+            document.addRecord(pickerModel.ButtonRecord(buttonId))
+        document.setOrder(['c', 'a'])
+        self.assertEqual([record.buttonId for record in document], ['c', 'a', 'b'])
+
+
+class PackPickersTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        datas = [pickerData('char1'), pickerData('char2', 'other')]
+        self.assertEqual(pickerModel.unpackPickers(json.loads(json.dumps(pickerModel.packPickers(datas)))),
+                         stripGlobalPos(datas))
+
+
+    def test_plain_list_of_older_scenes(self):
+        self.assertEqual(len(pickerModel.unpackPickers([pickerData('char1'), pickerData('char1')])), 1)
+
+
+    def test_invalid_data(self):
+        with self.assertRaises(TypeError):
+            pickerModel.unpackPickers('text')
+        with self.assertRaises(ValueError):
+            pickerModel.unpackPickers({'pickers': [{'tabName': 'body', 'template': 'missing'}]})
+
+
+class DedupePickersTest(unittest.TestCase):
+
+    def test_same_picker_in_two_namespaces_is_kept(self):
+        datas  = [pickerData('char1'), pickerData('char2')]
+        stored = pickerModel.packPickers(datas)
+
+        self.assertEqual([data['namespace'] for data in pickerModel.unpackPickers(stored)], ['char1', 'char2'])
+        self.assertEqual(len(stored['templates']), 1)
+        self.assertEqual(len(pickerModel.dedupePickers(datas)), 2)
+
+
+    def test_panned_copy_is_dropped(self):
+        copy = dict(pickerData('char1'), tabName='body*', viewOffset=[120.0, -40.0], sceneScale=2.5,
+                    undos={'index': 1, 'undoDatas': [{'undoClassName': 'MoveButtonsCmd'}]})
+        stored = pickerModel.packPickers([pickerData('char1'), copy])
+
+        self.assertEqual(len(stored['pickers']), 1)
+        self.assertEqual(stored['pickers'][0]['viewOffset'], [0.0, 0.0]) # the first one wins
+
+
+    def test_data_without_picker_id_is_matched_by_content(self):
+        old = pickerData('char1')
+        del old['pickerId']
+        self.assertEqual(len(pickerModel.dedupePickers([old, dict(old, viewOffset=[5.0, 5.0])])), 1)
+        self.assertEqual(len(pickerModel.dedupePickers([old, dict(old, namespace='char2')])), 2)
+
+
+class NodeTableCompactionTest(unittest.TestCase):
+
+    def test_unused_nodes_are_not_saved(self):
+        document = pickerModel.PickerDocument('body')
+        deleted, arm, leg = document.nodeTable.ids(['deleted', 'arm', 'leg'])
+        document.addRecord(pickerModel.ButtonRecord('button', nodeIds=[leg]))
+        document.undos = {'index': 1, 'undoDatas': [{'undoClassName': 'UpdateButtonCmd', 'buttonId': 'button',
+                                                     'buttonNodeIds': [arm], 'newNodeIds': [leg]}]}
+        data = document.toData()
+
+        self.assertEqual(data['nodeTable'], ['arm', 'leg'])
+        self.assertEqual(data['buttons'][0]['nodeIds'], [1])
+        self.assertEqual(data['undos']['undoDatas'][0]['buttonNodeIds'], [0])
+        self.assertEqual(document.undos['undoDatas'][0]['buttonNodeIds'], [arm]) # the live data is left as is
+
+
+if __name__ == '__main__':
+    unittest.main()
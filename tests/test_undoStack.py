@@ -0,0 +1,161 @@
+import sys
+import types
+import unittest
+from unittest import mock
+
+import linkPicker
+
+try:
+    import maya.cmds
+    hostModules = {}
+except ImportError:
+    # outside of Maya: the stack only needs cmds.about for the PySide switch, and QObject / Signal
+    class Signal(object):
+        def __init__(self, *types):
+            pass
+
+        def emit(self, *args):
+            pass
+
+    QtCore = types.SimpleNamespace(QObject=type('QObject', (object,), {'__init__': lambda self, parent=None: None}),
+                                   Signal=Signal)
+    cmds   = types.SimpleNamespace(about=lambda version=True: '2024')
+    hostModules = {'maya'          : types.SimpleNamespace(cmds=cmds),
+                   'maya.cmds'     : cmds,
+                   'PySide2'       : types.SimpleNamespace(QtCore=QtCore),
+                   'PySide2.QtCore': QtCore}
+
+with mock.patch.dict(sys.modules, hostModules): # only undoStack sees them
+    from linkPicker.pickerViewWidgets import undoStack
+
+
+class AppendCmd(object):
+    '''
+    Appends its values to a shared list, merges with the next AppendCmd of the same mergeId
+    '''
+    def __init__(self, state: list, values: list, mergeId: int = -1, pad: int = 0):
+        self.state   = state
+        self.values  = list(values)
+        self.mergeId = mergeId
+        self.pad     = pad
+
+    def redo(self):
+        self.state.extend(self.values)
+
+    def undo(self):
+        del self.state[len(self.state) - len(self.values):]
+
+    def id(self) -> int:
+        return self.mergeId
+
+    def mergeWith(self, other: 'AppendCmd') -> bool:
+        self.values.extend(other.values)
+        return True
+
+    def text(self) -> str:
+        return f'append {self.values}'
+
+    def get(self) -> dict:
+        return {'values': self.values, 'mergeId': self.mergeId, 'pad': 'x' * self.pad}
+
+
+class UndoStackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = []
+        self.built = [] # data of the commands rebuilt by the stack
+        self.stack = undoStack.UndoStack(self.commandFromData, lambda data: f"append {data['values']}")
+
+
+    def commandFromData(self, data: dict) -> AppendCmd:
+        self.built.append(data['values'])
+        return AppendCmd(self.state, data['values'], data['mergeId'], len(data['pad']))
+
+
+    def push(self, *values, **kwargs):
+        self.stack.breakMerge()
+        self.stack.push(AppendCmd(self.state, values, **kwargs))
+
+
+    def test_push_undo_redo(self):
+        self.push(1)
+        self.push(2)
+        self.assertEqual(self.state, [1, 2])
+
+        self.stack.undo()
+        self.assertEqual((self.state, self.stack.index(), self.stack.redoText()), ([1], 1, 'append [2]'))
+        self.stack.redo()
+        self.assertEqual(self.state, [1, 2])
+
+        self.stack.setIndex(0)
+        self.assertEqual(self.state, [])
+        self.push(3) # drops the redo steps
+        self.assertEqual((self.state, self.stack.count(), self.stack.canRedo()), ([3], 1, False))
+
+
+    def test_merge(self):
+        self.push(1, mergeId=1)
+        self.stack.push(AppendCmd(self.state, [2], mergeId=1))
+        self.assertEqual((self.stack.count(), self.stack.undoText()), (1, 'append [1, 2]'))
+
+        self.stack.push(AppendCmd(self.state, [3], mergeId=2)) # other id
+        self.assertEqual(self.stack.count(), 2)
+
+        self.stack.undo()
+        self.stack.push(AppendCmd(self.state, [4], mergeId=1)) # nothing merges right after an undo
+        self.assertEqual((self.stack.count(), self.state), (2, [1, 2, 4]))
+
+
+    def test_undo_limit(self):
+        self.stack.setUndoLimit(2)
+        for value in range(4):
+            self.push(value)
+        self.assertEqual((self.stack.count(), self.stack.index()), (2, 2))
+        self.assertEqual([self.stack.command(index).get()['values'] for index in range(2)], [[2], [3]])
+
+
+    def test_byte_budget_drops_the_oldest(self):
+        size = undoStack.estimateSize(AppendCmd(self.state, [0], pad=100))
+        self.stack.setByteBudget(size * 2)
+        for value in range(4):
+            self.push(value, pad=100)
+        self.assertEqual(self.stack.count(), 2)
+        self.assertLessEqual(self.stack.memoryUsage(), size * 2)
+
+
+    def test_spill(self):
+        size = undoStack.estimateSize(AppendCmd(self.state, [0], pad=100))
+        self.stack.setByteBudget(size * 2, spill=True)
+        for value in range(4):
+            self.push(value, pad=100)
+        self.assertEqual(self.stack.count(), 4)
+        self.assertIsInstance(self.stack.command(0), undoStack.SpilledCommand)
+        self.assertEqual(self.stack.text(0), 'append [0]')
+
+        self.stack.setIndex(0) # the spilled commands are read back and rebuilt
+        self.assertEqual(self.state, [])
+        self.assertEqual(self.built, [[1], [0]])
+        self.assertLessEqual(self.stack.memoryUsage(), size * 2)
+
+        self.stack.setIndex(4)
+        self.assertEqual(self.state, [0, 1, 2, 3])
+
+
+    def test_restore_builds_commands_on_demand(self):
+        self.state.extend([1, 2])
+        self.stack.restore([{'values': [1], 'mergeId': -1, 'pad': ''}, {'values': [2], 'mergeId': -1, 'pad': ''}], 2)
+        self.assertEqual((self.built, self.stack.undoText()), ([], 'append [2]'))
+
+        self.stack.undo()
+        self.assertEqual((self.built, self.state), ([[2]], [1]))
+
+
+    def test_no_size_estimate_without_budget(self):
+        self.push(1, pad=100)
+        self.assertEqual(self.stack.memoryUsage(), 0)
+        self.stack.setByteBudget(10 ** 6)
+        self.assertGreater(self.stack.memoryUsage(), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()